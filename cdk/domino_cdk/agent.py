@@ -1,11 +1,83 @@
-from typing import Any, Dict, Optional
+import re
+from typing import Any, Dict, List, Optional
 
 from aws_cdk.aws_s3 import Bucket
+from aws_cdk.region_info import Fact, FactName
 
-from domino_cdk.config import Install
+from domino_cdk.config import EKS, Install
+from domino_cdk.config.instance_types import INSTANCE_TYPES
 from domino_cdk.util import DominoCdkUtil
 
 
+def autoscaler_priorities(name: str, eks: EKS) -> Dict[int, List[str]]:
+    """
+    Priority expander config: spot nodegroups first, then non-GPU ones, then the smallest instances.
+    Patterns match the per-AZ ASG names of unmanaged (name-ng-az) and managed (eks-name-ng-az-uuid) nodegroups.
+    """
+
+    def rank(item):
+        ng_name, ng = item
+        specs = [INSTANCE_TYPES[it] for it in ng.resolved_instance_types if it in INSTANCE_TYPES]
+        gpu = getattr(ng, "gpu", False) or any(spec.gpus for spec in specs)
+        size = min((spec.vcpu, spec.memory_gib) for spec in specs) if specs else (0, 0)
+        return (not ng.spot, gpu, size, ng_name)
+
+    # Karpenter provisions the unmanaged nodegroups, the cluster-autoscaler only sees the managed ones
+    unmanaged = eks.unmanaged_nodegroups if eks.provisioner == "asg" else {}
+    nodegroups = sorted({**eks.managed_nodegroups, **unmanaged}.items(), key=rank)
+    return {
+        10 * (len(nodegroups) - i): [f"^(eks-)?{re.escape(f'{name}-{ng_name}')}-[a-z]{{2}}(-[a-z]+)+-[0-9][a-z](-.*)?$"]
+        for i, (ng_name, _) in enumerate(nodegroups)
+    }
+
+
+def ecr_registry(aws_account_id: str, aws_region: str) -> str:
+    return f"{aws_account_id}.dkr.ecr.{aws_region}.{Fact.find(aws_region, FactName.DOMAIN_SUFFIX)}"
+
+
+def cache_image_references(cfg: Any, cache: str, registry: str = "quay.io") -> Any:
+    """
+    Point image references (ie quay.io/domino/...) in installer configuration at a pull-through cache,
+    where `cache` is the ECR registry and rule prefix (ie 1234.dkr.ecr.us-west-2.amazonaws.com/domino-quay)
+    """
+    if isinstance(cfg, dict):
+        return {k: cache_image_references(v, cache, registry) for k, v in cfg.items()}
+    if isinstance(cfg, list):
+        return [cache_image_references(v, cache, registry) for v in cfg]
+    if isinstance(cfg, str) and cfg.startswith(f"{registry}/"):
+        return f"{cache}/{cfg[len(registry) + 1:]}"
+    return cfg
+
+
+def image_references(cfg: Any) -> List[str]:
+    """
+    Images in installer configuration: "image" values (ie quay.io/domino/nucleus:5.1.0) and Helm style
+    {registry, repository, tag} image values
+    """
+    images = []
+    if isinstance(cfg, dict):
+        if isinstance(cfg.get("repository"), str):
+            image = "/".join(filter(None, [cfg.get("registry"), cfg["repository"]]))
+            images.append(f"{image}:{cfg['tag']}" if cfg.get("tag") else image)
+        for k, v in cfg.items():
+            if k == "image" and isinstance(v, str):
+                images.append(v)
+            else:
+                images.extend(image_references(v))
+    elif isinstance(cfg, list):
+        for v in cfg:
+            images.extend(image_references(v))
+    return images
+
+
+def install_image_list(install: Install) -> List[str]:
+    """
+    Images to pre-pull into nodegroup image snapshots: those of the release overrides the generated
+    installer configuration is merged with, plus install.prepull_images
+    """
+    return list(dict.fromkeys([*image_references(install.overrides), *install.prepull_images]))
+
+
 def generate_install_config(
     name: str,
     install: Install,
@@ -19,6 +91,8 @@ def generate_install_config(
     efs_apid: str,
     r53_zone_ids: str,
     r53_owner_id: str,
+    eks: Optional[EKS] = None,
+    aws_account_id: Optional[str] = None,
 ) -> Dict:
     agent_cfg: Dict[str, Any] = {
         "name": name,
@@ -33,6 +107,9 @@ def generate_install_config(
                 "type": "ebs",
                 "access_modes": ["ReadWriteOnce"],
                 "base_path": "",
+                "provisioner": "ebs.csi.aws.com",
+                "parameters": install.storage.block.parameters(),
+                "volume_binding_mode": install.storage.block.volume_binding_mode,
             },
             "shared": {
                 "create": True,
@@ -116,6 +193,42 @@ def generate_install_config(
             "txt_owner_id": r53_owner_id,
         }
 
+    load_balancer = install.load_balancer
+    annotations: Dict[str, Any] = {
+        "service.beta.kubernetes.io/aws-load-balancer-ssl-negotiation-policy": "ELBSecurityPolicy-TLS-1-2-2017-01",
+        "service.beta.kubernetes.io/aws-load-balancer-ssl-cert": install.acm_cert_arn or "__FILL__",
+        "service.beta.kubernetes.io/aws-load-balancer-backend-protocol": "tcp",
+        "service.beta.kubernetes.io/aws-load-balancer-ssl-ports": "443",
+        # "service.beta.kubernetes.io/aws-load-balancer-security-groups":
+        #     "could-propagate-this-instead-of-create"
+    }
+    if load_balancer.type == "nlb":
+        # AWS Load Balancer Controller annotations, the in-tree controller doesn't support IP targets
+        annotations.update(
+            {
+                "service.beta.kubernetes.io/aws-load-balancer-type": "external",
+                "service.beta.kubernetes.io/aws-load-balancer-nlb-target-type": load_balancer.target_type,
+                "service.beta.kubernetes.io/aws-load-balancer-scheme": "internet-facing",
+                # Only TCP listeners take an idle timeout, the TLS listener of 443 keeps a fixed 350 seconds
+                "service.beta.kubernetes.io/aws-load-balancer-listener-attributes.TCP-80": f"tcp.idle_timeout.seconds={load_balancer.idle_timeout}",  # noqa
+            }
+        )
+        nlb_attributes = [f"load_balancing.cross_zone.enabled={str(load_balancer.cross_zone).lower()}"]
+        if monitoring_bucket:
+            nlb_attributes += [
+                "access_logs.s3.enabled=true",
+                f"access_logs.s3.bucket={monitoring_bucket.bucket_name}",
+                "access_logs.s3.prefix=NLBAccessLogs",
+            ]
+        annotations["service.beta.kubernetes.io/aws-load-balancer-attributes"] = ",".join(nlb_attributes)
+    else:
+        annotations.update(
+            {
+                "service.beta.kubernetes.io/aws-load-balancer-internal": False,
+                "service.beta.kubernetes.io/aws-load-balancer-connection-idle-timeout": str(load_balancer.idle_timeout),
+            }
+        )
+
     agent_cfg["release_overrides"]["nginx-ingress"]["chart_values"] = {
         "controller": {
             "kind": "Deployment",
@@ -123,16 +236,7 @@ def generate_install_config(
             "service": {
                 "enabled": True,
                 "type": "LoadBalancer",
-                "annotations": {
-                    "service.beta.kubernetes.io/aws-load-balancer-ssl-negotiation-policy": "ELBSecurityPolicy-TLS-1-2-2017-01",
-                    "service.beta.kubernetes.io/aws-load-balancer-ssl-cert": install.acm_cert_arn or "__FILL__",
-                    "service.beta.kubernetes.io/aws-load-balancer-internal": False,
-                    "service.beta.kubernetes.io/aws-load-balancer-backend-protocol": "tcp",
-                    "service.beta.kubernetes.io/aws-load-balancer-ssl-ports": "443",
-                    "service.beta.kubernetes.io/aws-load-balancer-connection-idle-timeout": "3600",  # noqa
-                    # "service.beta.kubernetes.io/aws-load-balancer-security-groups":
-                    #     "could-propagate-this-instead-of-create"
-                },
+                "annotations": annotations,
                 "loadBalancerSourceRanges": install.access_list,
             },
         }
@@ -195,7 +299,7 @@ def generate_install_config(
             },
         )
 
-    if monitoring_bucket:
+    if monitoring_bucket and load_balancer.type == "elb":
         agent_cfg["release_overrides"]["nginx-ingress"]["chart_values"]["controller"]["service"]["annotations"].update(
             {
                 "service.beta.kubernetes.io/aws-load-balancer-access-log-enabled": "true",
@@ -205,7 +309,25 @@ def generate_install_config(
             }
         )
 
-    if install.registry_username:
+    autoscaler_values: Dict[str, Any] = {"extraArgs": install.autoscaler.extra_args()}
+    if install.autoscaler.expander == "priority" and eks:
+        autoscaler_values["expanderPriorities"] = autoscaler_priorities(name, eks)
+    agent_cfg["release_overrides"]["cluster-autoscaler"] = {"chart_values": autoscaler_values}
+
+    if install.registry_cache:
+        if not aws_account_id:
+            raise ValueError("aws_account_id is required to use install.registry_cache")
+        agent_cfg["helm"] = {
+            # Nodes authenticate to ECR with their instance role, no pull secret needed
+            "image_registries": [
+                {
+                    "server": ecr_registry(aws_account_id, aws_region),
+                    "username": "",
+                    "password": "",
+                }
+            ]
+        }
+    elif install.registry_username:
         agent_cfg["helm"] = {
             "image_registries": [
                 {
@@ -8,6 +8,7 @@ from ruamel.yaml.comments import CommentedMap
 
 from domino_cdk import __version__
 from domino_cdk.config.acm import ACM
+from domino_cdk.config.capacity import check_capacity
 from domino_cdk.config.efs import EFS
 from domino_cdk.config.eks import EKS
 from domino_cdk.config.install import Install
@@ -177,6 +178,21 @@ class DominoCDKConfig:
 
         val("config", self)
 
+        if self.eks and self.vpc and self.eks.cni.custom_networking and not self.vpc.create:
+            errors.append("eks.cni.custom_networking uses the pod subnets of a VPC created by the stack (vpc.create)")
+
+        if self.eks and self.vpc and self.vpc.ip_family == "ipv6":
+            if self.eks.cni.custom_networking:
+                errors.append("eks.cni.custom_networking is not supported with vpc.ip_family ipv6")
+            if self.eks.dns.node_local_cache:
+                errors.append(
+                    "eks.dns.node_local_cache listens on an IPv4 address, not supported with vpc.ip_family ipv6"
+                )
+
+        # With IPv6, pods no longer take addresses from the IPv4 subnets
+        if self.vpc and self.eks and self.vpc.ip_family == "ipv4" and not errors:
+            check_capacity(self.vpc, self.eks)
+
         # Don't run these checks if we're just loading a template
         if self.aws_region != "__FILL__":
             vpc_azs = self.get_vpc_azs()
@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from logging import Logger
+from math import ceil
+from typing import Dict, List, Tuple
+
+from domino_cdk.config.eks import EKS
+from domino_cdk.config.instance_types import INSTANCE_TYPES, max_pods
+from domino_cdk.config.vpc import VPC
+
+log = Logger("domino_cdk.config.capacity")
+
+# AWS reserves the first four and the last address of every subnet
+RESERVED_SUBNET_IPS = 5
+
+
+@dataclass
+class SubnetUsage:
+    az: str
+    subnet: str
+    demand: int
+    capacity: int
+
+    @property
+    def headroom(self) -> int:
+        return self.capacity - self.demand
+
+
+def node_ip_demand(instance_type: str, prefix_delegation: bool, custom_networking: bool) -> Tuple[int, int]:
+    """
+    Worst-case (node subnet, pod subnet) IPs of one node: the VPC CNI filling every ENI it can
+    attach. With custom networking, secondary ENIs and pod IPs come from the pod subnet.
+    """
+    spec = INSTANCE_TYPES[instance_type]
+    pod_ips = max_pods(instance_type, prefix_delegation, custom_networking) - 2  # host network pods
+    if prefix_delegation:
+        pod_ips = ceil(pod_ips / 16) * 16
+    secondary_enis = spec.max_enis - 1  # each has its own primary IP
+    if custom_networking:
+        return 1, pod_ips + secondary_enis
+    return 1 + pod_ips + secondary_enis, 0
+
+
+def plan_capacity(vpc: VPC, eks: EKS) -> Tuple[List[SubnetUsage], List[str]]:
+    """Worst-case IP demand of all nodegroups at max_size against the subnets of each availability zone"""
+    notes = []
+    cni = eks.cni
+    az_names = vpc.availability_zones or [f"az{i + 1}" for i in range(vpc.max_azs)]
+
+    demand: Dict[str, List[int]] = {az: [0, 0] for az in az_names}
+    for name, ng in {**eks.managed_nodegroups, **eks.unmanaged_nodegroups}.items():
+        if unknown := [it for it in ng.resolved_instance_types if it not in INSTANCE_TYPES]:
+            notes.append(f"Nodegroup {name}: instance types {unknown} are not in the embedded catalog, skipped")
+            continue
+        per_node = [
+            node_ip_demand(it, cni.prefix_delegation, cni.custom_networking) for it in ng.resolved_instance_types
+        ]
+        worst = (max(p[0] for p in per_node), max(p[1] for p in per_node))
+        for az in ng.availability_zones or az_names[: eks.max_nodegroup_azs]:
+            az_demand = demand.setdefault(az, [0, 0])
+            az_demand[0] += worst[0] * ng.max_size
+            az_demand[1] += worst[1] * ng.max_size
+
+    if not vpc.create:
+        notes.append("Using an existing VPC, subnet sizes are unknown")
+        return [], notes
+
+    private_capacity = 2 ** (32 - vpc.private_cidr_mask) - RESERVED_SUBNET_IPS
+    pod_capacity = 2 ** (32 - vpc.pod_cidr_mask) - RESERVED_SUBNET_IPS
+    usages = []
+    for az, (node_demand, pod_demand) in demand.items():
+        usages.append(SubnetUsage(az, "private", node_demand, private_capacity))
+        if cni.custom_networking:
+            usages.append(SubnetUsage(az, "pod", pod_demand, pod_capacity))
+
+    return usages, notes
+
+
+def format_capacity_plan(usages: List[SubnetUsage], notes: List[str]) -> str:
+    lines = [f"{'AZ':<16} {'Subnet':<8} {'Demand':>8} {'Capacity':>8} {'Headroom':>8}"]
+    lines += [f"{u.az:<16} {u.subnet:<8} {u.demand:>8} {u.capacity:>8} {u.headroom:>8}" for u in usages]
+    return "\n".join(lines + notes)
+
+
+def check_capacity(vpc: VPC, eks: EKS):
+    usages, _ = plan_capacity(vpc, eks)
+    for u in usages:
+        if u.headroom < 0:
+            log.warning(
+                f"Warning: Worst-case IP demand of nodegroups in {u.az} ({u.demand}) exceeds the {u.subnet} subnet "
+                f"capacity ({u.capacity}). See `util.py capacity_plan`."
+            )
@@ -1,9 +1,363 @@
-from dataclasses import dataclass
-from typing import Dict, List, TypeVar
+from dataclasses import dataclass, fields, replace
+from ipaddress import IPv4Address
+from typing import Any, Dict, List, Optional, Tuple, TypeVar
 
+from domino_cdk.config.instance_types import (
+    EFA_INSTANCE_TYPES,
+    INSTANCE_TYPES,
+    match_instance_types,
+    max_pods,
+)
 from domino_cdk.config.util import check_leavins, from_loader
 
 
+@dataclass
+class Kubelet:
+    """
+    Kubelet settings merged into kubelet-config.json on nodes using the default EKS AMI, or set
+    as settings.kubernetes on Bottlerocket nodes (which have no serialize_image_pulls setting).
+    Settings left null keep the AMI's default. Nodegroup settings override the global ones.
+    event_record_qps: 0 - Event creation rate limit (0 disables the limit)
+    max_pods: 110 - Maximum pods per node (unmanaged nodegroups only)
+    serialize_image_pulls: true/false - Pull one image at a time. Set false for parallel pulls.
+    registry_pull_qps: 10 - Image registry pull rate limit (0 disables the limit)
+    registry_burst: 20 - Image registry pull burst size
+    kube_api_qps: 10 - Kubernetes API request rate limit
+    kube_api_burst: 20 - Kubernetes API request burst size
+    image_gc_high_threshold_percent: 85 - Disk usage percent that always triggers image garbage collection
+    image_gc_low_threshold_percent: 80 - Disk usage percent image garbage collection frees down to
+    cpu_manager_policy: none/static - CPU manager policy, static enables exclusive cores for pods
+    topology_manager_policy: none/best-effort/restricted/single-numa-node - Topology manager policy
+    cluster_dns: 169.254.20.10 - DNS server for pods. Defaults to the NodeLocal DNSCache address on unmanaged
+                                 and Bottlerocket nodegroups with eks.dns.node_local_cache.
+    """
+
+    event_record_qps: int
+    max_pods: int
+    serialize_image_pulls: bool
+    registry_pull_qps: int
+    registry_burst: int
+    kube_api_qps: int
+    kube_api_burst: int
+    image_gc_high_threshold_percent: int
+    image_gc_low_threshold_percent: int
+    cpu_manager_policy: str
+    topology_manager_policy: str
+    cluster_dns: str
+
+    _config_keys = {
+        "event_record_qps": "eventRecordQPS",
+        "max_pods": "maxPods",
+        "serialize_image_pulls": "serializeImagePulls",
+        "registry_pull_qps": "registryPullQPS",
+        "registry_burst": "registryBurst",
+        "kube_api_qps": "kubeAPIQPS",
+        "kube_api_burst": "kubeAPIBurst",
+        "image_gc_high_threshold_percent": "imageGCHighThresholdPercent",
+        "image_gc_low_threshold_percent": "imageGCLowThresholdPercent",
+        "cpu_manager_policy": "cpuManagerPolicy",
+        "topology_manager_policy": "topologyManagerPolicy",
+        "cluster_dns": "clusterDNS",
+    }
+    _bottlerocket_keys = {
+        "event_record_qps": "event-qps",
+        "max_pods": "max-pods",
+        "registry_pull_qps": "registry-qps",
+        "registry_burst": "registry-burst",
+        "kube_api_qps": "kube-api-qps",
+        "kube_api_burst": "kube-api-burst",
+        "image_gc_high_threshold_percent": "image-gc-high-threshold-percent",
+        "image_gc_low_threshold_percent": "image-gc-low-threshold-percent",
+        "cpu_manager_policy": "cpu-manager-policy",
+        "topology_manager_policy": "topology-manager-policy",
+        "cluster_dns": "cluster-dns-ip",
+    }
+
+    def __post_init__(self):
+        errors = []
+
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if f.type is int and value is not None and (type(value) is not int or value < 0):
+                errors.append(f"kubelet.{f.name} must be a non-negative integer, got: {value}")
+
+        if self.max_pods == 0:
+            errors.append("kubelet.max_pods must be greater than 0")
+
+        for threshold in ["image_gc_high_threshold_percent", "image_gc_low_threshold_percent"]:
+            value = getattr(self, threshold)
+            if type(value) is int and value > 100:
+                errors.append(f"kubelet.{threshold} must be a percentage (0-100), got: {value}")
+
+        high, low = self.image_gc_high_threshold_percent, self.image_gc_low_threshold_percent
+        if type(high) is int and type(low) is int and low >= high:
+            errors.append(
+                f"kubelet.image_gc_low_threshold_percent ({low}) must be lower than image_gc_high_threshold_percent ({high})"
+            )
+
+        if self.cpu_manager_policy not in [None, "none", "static"]:
+            errors.append(f"kubelet.cpu_manager_policy must be none or static, got: {self.cpu_manager_policy}")
+
+        if self.topology_manager_policy not in [None, "none", "best-effort", "restricted", "single-numa-node"]:
+            errors.append(
+                "kubelet.topology_manager_policy must be none, best-effort, restricted or single-numa-node, "
+                f"got: {self.topology_manager_policy}"
+            )
+
+        if self.cluster_dns is not None:
+            try:
+                IPv4Address(self.cluster_dns)
+            except ValueError:
+                errors.append(f"kubelet.cluster_dns must be an IPv4 address, got: {self.cluster_dns}")
+
+        if errors:
+            raise ValueError(errors)
+
+    def merge(self, override: Optional["Kubelet"]) -> "Kubelet":
+        if not override:
+            return self
+        return replace(self, **{k: v for k, v in vars(override).items() if v is not None})
+
+    def kubelet_config(self) -> Dict[str, Any]:
+        return {self._config_keys[k]: [v] if k == "cluster_dns" else v for k, v in vars(self).items() if v is not None}
+
+    def bottlerocket_settings(self) -> Dict[str, Any]:
+        return {self._bottlerocket_keys[k]: v for k, v in vars(self).items() if v is not None}
+
+    @staticmethod
+    def default() -> "Kubelet":
+        return Kubelet.load({"event_record_qps": 0})
+
+    @staticmethod
+    def load(c: Optional[dict]) -> Optional["Kubelet"]:
+        if c is None:
+            return None
+        out = Kubelet(**{k: c.pop(k, None) for k in Kubelet._config_keys})
+        check_leavins("kubelet attribute", "config.eks.kubelet", c)
+        return out
+
+
+IPVS_SCHEDULERS = ["rr", "wrr", "lc", "wlc", "lblc", "lblcr", "sh", "dh", "sed", "nq"]
+
+
+@dataclass
+class KubeProxy:
+    """
+    kube-proxy addon settings.
+    mode: iptables/ipvs - Service proxy mode. ipvs routes services through kernel hash tables, staying fast
+                          with thousands of services where iptables rule syncs slow down. Its kernel modules
+                          are loaded by user data on nodegroups using the default EKS AMI.
+    ipvs_scheduler: rr - IPVS scheduler: rr, wrr, lc, wlc, lblc, lblcr, sh, dh, sed or nq (ipvs only)
+    """
+
+    mode: str
+    ipvs_scheduler: str
+
+    def __post_init__(self):
+        errors = []
+
+        if self.mode not in ["iptables", "ipvs"]:
+            errors.append(f"kube_proxy.mode must be one of iptables, ipvs, got: {self.mode}")
+        if self.ipvs_scheduler is not None:
+            if self.mode != "ipvs":
+                errors.append("kube_proxy.ipvs_scheduler requires mode ipvs")
+            if self.ipvs_scheduler not in IPVS_SCHEDULERS:
+                errors.append(
+                    f"kube_proxy.ipvs_scheduler must be one of {', '.join(IPVS_SCHEDULERS)}, got: {self.ipvs_scheduler}"
+                )
+
+        if errors:
+            raise ValueError(errors)
+
+    def addon_configuration(self) -> Dict[str, Any]:
+        if self.mode != "ipvs":
+            return {}
+        return {"mode": "ipvs", "ipvs": {"scheduler": self.ipvs_scheduler or "rr"}}
+
+    def kernel_modules(self) -> List[str]:
+        if self.mode != "ipvs":
+            return []
+        # The ones kube-proxy checks for, and the scheduler's
+        modules = ["ip_vs", "ip_vs_rr", "ip_vs_wrr", "ip_vs_sh", f"ip_vs_{self.ipvs_scheduler or 'rr'}", "nf_conntrack"]
+        return list(dict.fromkeys(modules))
+
+    @staticmethod
+    def load(c: Optional[dict]) -> "KubeProxy":
+        c = c or {}
+        out = KubeProxy(mode=c.pop("mode", "iptables"), ipvs_scheduler=c.pop("ipvs_scheduler", None))
+        check_leavins("kube_proxy attribute", "config.eks.kube_proxy", c)
+        return out
+
+
+# Link-local address NodeLocal DNSCache listens on
+NODE_LOCAL_DNS_IP = "169.254.20.10"
+
+CONTROL_PLANE_LOG_TYPES = ["api", "audit", "authenticator", "controllerManager", "scheduler"]
+
+
+@dataclass
+class DNS:
+    """
+    Cluster DNS settings. Null values keep the coredns addon's defaults.
+    coredns_replicas: 2 - Fixed CoreDNS replica count
+    coredns_autoscaling: Scale CoreDNS replicas with the cluster's nodes and CPU cores (Kubernetes 1.25+)
+                         min_replicas: 2 - Minimum CoreDNS replicas
+                         max_replicas: 10 - Maximum CoreDNS replicas
+    node_local_cache: true/false - Run NodeLocal DNSCache on every node, so lookups are answered from a node-local
+                                   cache and misses go to CoreDNS over TCP, sparing conntrack entries. Pods use it
+                                   through kubelet cluster_dns, and on managed AL2 nodegroups (where EKS sets
+                                   the cluster DNS) through the kube-dns service address it also listens on,
+                                   unless kube_proxy.mode is ipvs (which owns that address on every node).
+    """
+
+    @dataclass
+    class Autoscaling:
+        min_replicas: int
+        max_replicas: int
+        _no_doc = True
+
+        @classmethod
+        def load(cls, c: Optional[dict]):
+            if c is None:
+                return None
+            out = cls(min_replicas=c.pop("min_replicas", 2), max_replicas=c.pop("max_replicas", 10))
+            check_leavins("coredns autoscaling attribute", "config.eks.dns.coredns_autoscaling", c)
+            return out
+
+    coredns_replicas: int
+    coredns_autoscaling: Autoscaling
+    node_local_cache: bool
+
+    def __post_init__(self):
+        errors = []
+
+        if self.coredns_replicas is not None and (type(self.coredns_replicas) is not int or self.coredns_replicas < 1):
+            errors.append(f"dns.coredns_replicas must be a positive integer, got: {self.coredns_replicas}")
+
+        if autoscaling := self.coredns_autoscaling:
+            if self.coredns_replicas is not None:
+                errors.append("dns.coredns_replicas and dns.coredns_autoscaling are mutually exclusive")
+            for f in fields(autoscaling):
+                value = getattr(autoscaling, f.name)
+                if type(value) is not int or value < 1:
+                    errors.append(f"dns.coredns_autoscaling.{f.name} must be a positive integer, got: {value}")
+            if type(autoscaling.min_replicas) is int and type(autoscaling.max_replicas) is int:
+                if autoscaling.min_replicas > autoscaling.max_replicas:
+                    errors.append(
+                        f"dns.coredns_autoscaling.min_replicas ({autoscaling.min_replicas}) must not exceed "
+                        f"max_replicas ({autoscaling.max_replicas})"
+                    )
+
+        if errors:
+            raise ValueError(errors)
+
+    def addon_configuration(self) -> Dict[str, Any]:
+        if self.coredns_replicas:
+            return {"replicaCount": self.coredns_replicas}
+        if autoscaling := self.coredns_autoscaling:
+            return {
+                "autoScaling": {
+                    "enabled": True,
+                    "minReplicas": autoscaling.min_replicas,
+                    "maxReplicas": autoscaling.max_replicas,
+                }
+            }
+        return {}
+
+    @staticmethod
+    def load(c: Optional[dict]) -> "DNS":
+        c = c or {}
+        out = DNS(
+            coredns_replicas=c.pop("coredns_replicas", None),
+            coredns_autoscaling=DNS.Autoscaling.load(c.pop("coredns_autoscaling", None)),
+            node_local_cache=c.pop("node_local_cache", False),
+        )
+        check_leavins("dns attribute", "config.eks.dns", c)
+        return out
+
+
+SPOT_ALLOCATION_STRATEGIES = [
+    "lowest-price",
+    "capacity-optimized",
+    "capacity-optimized-prioritized",
+    "price-capacity-optimized",
+]
+
+
+@dataclass
+class CNI:
+    """
+    Amazon VPC CNI (vpc-cni addon) settings. Null values keep the addon's defaults.
+    prefix_delegation: true/false - Assign /28 IPv4 prefixes instead of single IPs to node ENIs, raising pod density
+                                    and cutting EC2 API calls on pod launch. Requires Nitro instance types.
+    warm_ip_target: 5 - Free IPs to keep attached to each node
+    minimum_ip_target: 10 - Minimum IPs to keep attached to each node, ie the expected pods per node
+    warm_prefix_target: 1 - Free prefixes to keep attached to each node (prefix_delegation only)
+                            Targets left null keep the addon's defaults, 0 is passed on.
+    custom_networking: true/false - Place pods in the VPC's pod subnets (secondary CIDR) instead of the node subnets,
+                                    through one ENIConfig per availability zone. Requires vpc.create.
+    With prefix_delegation or custom_networking, kubelet max_pods is calculated from the instance types of
+    unmanaged nodegroups unless set explicitly.
+    """
+
+    prefix_delegation: bool
+    warm_ip_target: int
+    minimum_ip_target: int
+    warm_prefix_target: int
+    custom_networking: bool
+
+    def __post_init__(self):
+        errors = []
+
+        for target in ["warm_ip_target", "minimum_ip_target", "warm_prefix_target"]:
+            value = getattr(self, target)
+            if value is not None and (type(value) is not int or value < 0):
+                errors.append(f"cni.{target} must be a non-negative integer, got: {value}")
+
+        if self.warm_prefix_target is not None and not self.prefix_delegation:
+            errors.append("cni.warm_prefix_target requires prefix_delegation")
+
+        if errors:
+            raise ValueError(errors)
+
+    @property
+    def affects_max_pods(self) -> bool:
+        return bool(self.prefix_delegation or self.custom_networking)
+
+    def addon_configuration(self) -> Dict[str, Any]:
+        env = {
+            "ENABLE_PREFIX_DELEGATION": self.prefix_delegation,
+            "WARM_IP_TARGET": self.warm_ip_target,
+            "MINIMUM_IP_TARGET": self.minimum_ip_target,
+            "WARM_PREFIX_TARGET": self.warm_prefix_target,
+            "AWS_VPC_K8S_CNI_CUSTOM_NETWORK_CFG": self.custom_networking,
+        }
+        # The addon schema only takes strings. Falsy values are kept, they turn settings off again.
+        env = {k: str(v).lower() if type(v) is bool else str(v) for k, v in env.items() if v is not None}
+        if self.custom_networking:
+            env["ENI_CONFIG_LABEL_DEF"] = "topology.kubernetes.io/zone"
+        return {"env": env} if env else {}
+
+    def max_pods(self, instance_types: List[str]) -> Optional[int]:
+        if not self.affects_max_pods:
+            return None
+        pods = [max_pods(it, self.prefix_delegation, self.custom_networking) for it in instance_types]
+        return min(pods) if pods and None not in pods else None
+
+    @staticmethod
+    def load(c: Optional[dict]) -> "CNI":
+        c = c or {}
+        out = CNI(
+            prefix_delegation=c.pop("prefix_delegation", False),
+            warm_ip_target=c.pop("warm_ip_target", None),
+            minimum_ip_target=c.pop("minimum_ip_target", None),
+            warm_prefix_target=c.pop("warm_prefix_target", None),
+            custom_networking=c.pop("custom_networking", False),
+        )
+        check_leavins("cni attribute", "config.eks.cni", c)
+        return out
+
+
 @dataclass
 class EKS:
     """
@@ -14,6 +368,21 @@ class EKS:
     global_node_labels: some-label: "true"  - Labels to apply to all kubernetes nodes
     global_node_tags: some-tags: "true"  - Labels to apply to all kubernetes nodes
     secrets_encryption_key_arn: ARN  - KMS key arn to encrypt kubernetes secrets. A new key will be created if omitted.
+    kubelet: Default kubelet settings for all nodegroups using the default EKS AMI (see below)
+    provisioner: asg/karpenter - How unmanaged nodegroups are provisioned. asg creates per-AZ auto scaling groups
+                                 scaled by the cluster-autoscaler. karpenter installs Karpenter on the managed
+                                 nodegroups and turns each unmanaged nodegroup into a Karpenter NodePool and
+                                 EC2NodeClass with the same labels, taints, disk, kubelet settings and instance
+                                 types. min_size does not apply to NodePools, and max_size caps their vCPUs.
+    node_termination_handler: true/false - Deploy aws-node-termination-handler in queue-processor mode, draining
+                                           unmanaged nodegroup nodes on spot interruptions, rebalance
+                                           recommendations, scale in and scheduled maintenance.
+                                           Managed nodegroups are drained by EKS itself.
+    cni: VPC CNI settings (see below)
+    dns: CoreDNS and NodeLocal DNSCache settings (see below)
+    kube_proxy: kube-proxy settings (see below)
+    control_plane_logging: [api, audit] - Control plane log types sent to CloudWatch Logs, set when the cluster
+                                          is created. Any of api, audit, authenticator, controllerManager, scheduler.
     """
 
     @dataclass
@@ -43,20 +412,110 @@ class EKS:
                          will be injected _before_ the default one, and both will be ran. However, when
                          specifying a custom AMI, this will be the *only* user_data script in use.
         instance_types: ["m5.2xlarge", "m5.4xlarge"] - Instance types available to nodegroup
+        arch: x86_64/arm64 - CPU architecture of the instance types, selecting the matching EKS AMI.
+                             Leave this null to infer it from instance_types (ie arm64 for Graviton).
+        ami_family: al2/bottlerocket - EKS-optimized image family used when ami_id is null. Bottlerocket nodes
+                                       boot faster: labels, taints and kubelet settings are rendered as
+                                       Bottlerocket TOML settings, disk_size sizes the data volume, and
+                                       user_data holds extra TOML settings instead of a script. ssm_agent
+                                       enables the control container, and key_name the admin container.
+                                       Not compatible with image_snapshot_id, image_lazy_loading or warm_pool.
+        instance_requirements: Add every catalog instance type of this shape (and arch) to instance_types,
+                               ie to diversify spot nodegroups across families and generations.
+                               instance_types come first, then matches with the least extra memory and
+                               newest generation first.
+                               vcpu: 8 - Exact vCPU count, so all nodes have the same allocatable CPU
+                               memory_gib: 32 - Minimum memory
+                               gpus: 0 - Exact GPU count
+                               max_types: 20 - Maximum instance types in the resulting list
         labels: some-label: "true" - Labels to apply to all nodes in nodegroup
         tags: some-tag: "true" - Tags to apply to all nodes in nodegroup
+        kubelet: max_pods: 110 - Kubelet settings for this nodegroup, overriding eks.kubelet.
+                                 Only allowed when using the default EKS AMI.
+        image_snapshot_id: snap-123abc - EBS snapshot holding a pre-pulled containerd content store
+                                         (/var/lib/containerd) on an unpartitioned xfs or ext4 filesystem,
+                                         attached as a data volume and mounted as the containerd root.
+                                         Only allowed when using the default EKS AMI.
+                                         See `util.py generate_image_list`.
+        image_lazy_loading: soci/stargz - Install a lazy-loading containerd snapshotter, so containers from
+                                          SOCI-indexed (soci) or eStargz (stargz) images start before the
+                                          image is fully downloaded. Only allowed when using the default EKS AMI.
         ...
         Managed nodegroup-specific options:
         spot: true/false - Use spot instances, may affect reliability/availability of nodegroup
         desired_size: 1 - Preferred size of nodegroup
+        max_unavailable: 1 - Nodes replaced at once when the launch template or AMI changes
+        max_unavailable_percentage: 33 - Percentage of nodes replaced at once (instead of max_unavailable)
         ...
         Unmanaged nodegroup-specific options:
         gpu: true/false - Setup GPU instance support
         ssm_agent: true/false - Install SSM agent (ie for console access via aws web ui)
         taints: some-taint: "true" - Taints to apply to all nodes in nodegroup
                                      ie to taint gpu nodes, etc.)
+        warm_pool: Keep pre-initialized instances in an EC2 Auto Scaling warm pool for faster scale out.
+                   Requires the default EKS AMI, a single instance type and on-demand instances.
+                   min_size: 0 - Warm instances to keep in the pool at all times
+                   max_group_prepared_capacity: 10 - Maximum in-service + warm instances (null for max_size)
+                   pool_state: stopped/hibernated/running - State of instances in the pool. Hibernation
+                               must be supported by the instance type.
+                   reuse_on_scale_in: true/false - Return instances to the pool on scale in
+        spot_options: Spot/on-demand mix of the nodegroup. Requires spot: true.
+                      on_demand_base_capacity: 0 - On-demand instances to always run first
+                      on_demand_percentage_above_base_capacity: 0 - On-demand share (0-100) beyond the base
+                      allocation_strategy: capacity-optimized-prioritized - Spot allocation strategy: lowest-price,
+                                           capacity-optimized, capacity-optimized-prioritized (instance_types
+                                           order as priority) or price-capacity-optimized
+                      capacity_rebalance: true/false - Launch replacements for instances at elevated risk
+                                          of interruption before they are interrupted
+        placement_group: cluster/partition/spread - Launch each availability zone's instances in a placement group
+                                                    of this strategy, ie cluster for low-latency distributed training
+        efa: true/false - Attach the primary network interface as an Elastic Fabric Adapter, and allow all traffic
+                          between the nodegroup's nodes as EFA requires. Needs EFA-capable instance types.
+        instance_refresh: Replace instances through an EC2 Auto Scaling instance refresh whenever the launch
+                          template changes (ie an AMI bump). Leave null to only use the new template for new instances.
+                          min_healthy_percentage: 90 - Capacity (0-100) kept in service during the refresh
+                          instance_warmup: 300 - Seconds until a new instance counts as healthy (null for the
+                                           health check grace period)
+                          checkpoint_percentages: [50, 100] - Pause once this share of instances is replaced.
+                                                  Must end with 100.
+                          checkpoint_delay: 600 - Seconds to pause at each checkpoint
         """
 
+        @dataclass
+        class InstanceRequirements:
+            vcpu: int
+            memory_gib: int
+            gpus: int
+            max_types: int
+            _no_doc = True
+
+            def __post_init__(self):
+                errors = []
+
+                for f in fields(self):
+                    value = getattr(self, f.name)
+                    minimum = 0 if f.name in ["memory_gib", "gpus"] else 1
+                    if type(value) is not int or value < minimum:
+                        errors.append(f"instance_requirements.{f.name} must be an integer >= {minimum}, got: {value}")
+
+                if errors:
+                    raise ValueError(errors)
+
+            @classmethod
+            def load(cls, c: Optional[dict]):
+                if c is None:
+                    return None
+                out = cls(
+                    vcpu=c.pop("vcpu"),
+                    memory_gib=c.pop("memory_gib"),
+                    gpus=c.pop("gpus", 0),
+                    max_types=c.pop("max_types", 20),
+                )
+                check_leavins(
+                    "instance requirements attribute", "config.eks.[un]managed_nodegroups.instance_requirements", c
+                )
+                return out
+
         ssm_agent: bool
         disk_size: int
         key_name: str
@@ -69,6 +528,33 @@ class EKS:
         labels: Dict[str, str]
         tags: Dict[str, str]
         spot: bool
+        kubelet: Kubelet
+        image_snapshot_id: str
+        image_lazy_loading: str
+        arch: str
+        instance_requirements: InstanceRequirements
+        ami_family: str
+
+        @property
+        def resolved_instance_types(self) -> List[str]:
+            if not (req := self.instance_requirements):
+                return self.instance_types
+            matches = match_instance_types(req.vcpu, req.memory_gib, req.gpus, self.cpu_arch)
+            return list(dict.fromkeys([*self.instance_types, *matches]))[: max(req.max_types, len(self.instance_types))]
+
+        @property
+        def instance_archs(self) -> List[str]:
+            return sorted({INSTANCE_TYPES[it].arch for it in self.instance_types if it in INSTANCE_TYPES})
+
+        @property
+        def cpu_arch(self) -> str:
+            if self.arch:
+                return self.arch
+            return archs[0] if len(archs := self.instance_archs) == 1 else "x86_64"
+
+        @property
+        def containerd_options(self) -> List[str]:
+            return [opt for opt in ["image_snapshot_id", "image_lazy_loading"] if getattr(self, opt)]
 
         def base_load(ng):
             return {
@@ -84,23 +570,184 @@ class EKS:
                 "labels": ng.pop("labels"),
                 "tags": ng.pop("tags"),
                 "spot": ng.pop("spot", False),
+                "kubelet": Kubelet.load(ng.pop("kubelet", None)),
+                "image_snapshot_id": ng.pop("image_snapshot_id", None),
+                "image_lazy_loading": ng.pop("image_lazy_loading", None),
+                "arch": ng.pop("arch", None),
+                "instance_requirements": EKS.NodegroupBase.InstanceRequirements.load(
+                    ng.pop("instance_requirements", None)
+                ),
+                "ami_family": ng.pop("ami_family", "al2"),
             }
 
     @dataclass
     class ManagedNodegroup(NodegroupBase):
         desired_size: int
+        max_unavailable: int
+        max_unavailable_percentage: int
 
         @classmethod
         def load(cls, ng):
-            out = cls(**cls.base_load(ng), desired_size=ng.pop("desired_size"))
+            out = cls(
+                **cls.base_load(ng),
+                desired_size=ng.pop("desired_size"),
+                max_unavailable=ng.pop("max_unavailable", None),
+                max_unavailable_percentage=ng.pop("max_unavailable_percentage", None),
+            )
             check_leavins("managed nodegroup attribute", "config.eks.unmanaged_nodegroups", ng)
             return out
 
     @dataclass
     class UnmanagedNodegroup(NodegroupBase):
+        @dataclass
+        class WarmPool:
+            min_size: int
+            max_group_prepared_capacity: int
+            pool_state: str
+            reuse_on_scale_in: bool
+            _no_doc = True
+
+            def __post_init__(self):
+                errors = []
+
+                if self.pool_state not in ["stopped", "hibernated", "running"]:
+                    errors.append(
+                        f"warm_pool.pool_state must be stopped, hibernated or running, got: {self.pool_state}"
+                    )
+                if self.min_size < 0:
+                    errors.append(f"warm_pool.min_size must not be negative, got: {self.min_size}")
+                if self.max_group_prepared_capacity is not None and self.max_group_prepared_capacity < self.min_size:
+                    errors.append(
+                        f"warm_pool.max_group_prepared_capacity ({self.max_group_prepared_capacity}) "
+                        f"must not be lower than min_size ({self.min_size})"
+                    )
+
+                if errors:
+                    raise ValueError(errors)
+
+            @classmethod
+            def load(cls, c: Optional[dict]):
+                if c is None:
+                    return None
+                out = cls(
+                    min_size=c.pop("min_size", 0),
+                    max_group_prepared_capacity=c.pop("max_group_prepared_capacity", None),
+                    pool_state=c.pop("pool_state", "stopped"),
+                    reuse_on_scale_in=c.pop("reuse_on_scale_in", False),
+                )
+                check_leavins("warm pool attribute", "config.eks.unmanaged_nodegroups.warm_pool", c)
+                return out
+
+        @dataclass
+        class SpotOptions:
+            on_demand_base_capacity: int
+            on_demand_percentage_above_base_capacity: int
+            allocation_strategy: str
+            capacity_rebalance: bool
+            _no_doc = True
+
+            def __post_init__(self):
+                errors = []
+
+                if type(self.on_demand_base_capacity) is not int or self.on_demand_base_capacity < 0:
+                    errors.append(
+                        f"spot_options.on_demand_base_capacity must be a non-negative integer, got: {self.on_demand_base_capacity}"
+                    )
+                percentage = self.on_demand_percentage_above_base_capacity
+                if type(percentage) is not int or not 0 <= percentage <= 100:
+                    errors.append(
+                        f"spot_options.on_demand_percentage_above_base_capacity must be a percentage (0-100), got: {percentage}"
+                    )
+                if self.allocation_strategy not in SPOT_ALLOCATION_STRATEGIES:
+                    errors.append(
+                        f"spot_options.allocation_strategy must be one of {', '.join(SPOT_ALLOCATION_STRATEGIES)}, "
+                        f"got: {self.allocation_strategy}"
+                    )
+
+                if errors:
+                    raise ValueError(errors)
+
+            @classmethod
+            def load(cls, c: Optional[dict]):
+                if c is None:
+                    return None
+                out = cls(
+                    on_demand_base_capacity=c.pop("on_demand_base_capacity", 0),
+                    on_demand_percentage_above_base_capacity=c.pop("on_demand_percentage_above_base_capacity", 0),
+                    allocation_strategy=c.pop("allocation_strategy", "capacity-optimized-prioritized"),
+                    capacity_rebalance=c.pop("capacity_rebalance", False),
+                )
+                check_leavins("spot options attribute", "config.eks.unmanaged_nodegroups.spot_options", c)
+                return out
+
+        @dataclass
+        class InstanceRefresh:
+            min_healthy_percentage: int
+            instance_warmup: int
+            checkpoint_percentages: List[int]
+            checkpoint_delay: int
+            _no_doc = True
+
+            def __post_init__(self):
+                errors = []
+
+                if type(self.min_healthy_percentage) is not int or not 0 <= self.min_healthy_percentage <= 100:
+                    errors.append(
+                        "instance_refresh.min_healthy_percentage must be a percentage (0-100), "
+                        f"got: {self.min_healthy_percentage}"
+                    )
+                for seconds in ["instance_warmup", "checkpoint_delay"]:
+                    value = getattr(self, seconds)
+                    if value is not None and (type(value) is not int or value < 0):
+                        errors.append(f"instance_refresh.{seconds} must be a non-negative integer, got: {value}")
+                checkpoints = self.checkpoint_percentages
+                if checkpoints and (
+                    any(type(c) is not int or not 0 < c <= 100 for c in checkpoints)
+                    or checkpoints != sorted(set(checkpoints))
+                    or checkpoints[-1] != 100
+                ):
+                    errors.append(
+                        "instance_refresh.checkpoint_percentages must be increasing percentages ending with 100, "
+                        f"got: {checkpoints}"
+                    )
+                if self.checkpoint_delay is not None and not checkpoints:
+                    errors.append("instance_refresh.checkpoint_delay requires checkpoint_percentages")
+
+                if errors:
+                    raise ValueError(errors)
+
+            def preferences(self) -> Dict[str, Any]:
+                preferences = {
+                    "MinHealthyPercentage": self.min_healthy_percentage,
+                    "InstanceWarmup": self.instance_warmup,
+                    "CheckpointPercentages": self.checkpoint_percentages,
+                    "CheckpointDelay": self.checkpoint_delay,
+                    # Instances already on the new launch template are kept
+                    "SkipMatching": True,
+                }
+                return {k: v for k, v in preferences.items() if v not in [None, []]}
+
+            @classmethod
+            def load(cls, c: Optional[dict]):
+                if c is None:
+                    return None
+                out = cls(
+                    min_healthy_percentage=c.pop("min_healthy_percentage", 90),
+                    instance_warmup=c.pop("instance_warmup", None),
+                    checkpoint_percentages=c.pop("checkpoint_percentages", []),
+                    checkpoint_delay=c.pop("checkpoint_delay", None),
+                )
+                check_leavins("instance refresh attribute", "config.eks.unmanaged_nodegroups.instance_refresh", c)
+                return out
+
         gpu: bool
         imdsv2_required: bool
         taints: Dict[str, str]
+        warm_pool: WarmPool
+        spot_options: SpotOptions
+        placement_group: str
+        efa: bool
+        instance_refresh: InstanceRefresh
 
         @classmethod
         def load(cls, ng):
@@ -109,6 +756,11 @@ class EKS:
                 gpu=ng.pop("gpu"),
                 imdsv2_required=ng.pop("imdsv2_required"),
                 taints=ng.pop("taints", {}),
+                warm_pool=cls.WarmPool.load(ng.pop("warm_pool", None)),
+                spot_options=cls.SpotOptions.load(ng.pop("spot_options", None)),
+                placement_group=ng.pop("placement_group", None),
+                efa=ng.pop("efa", False),
+                instance_refresh=cls.InstanceRefresh.load(ng.pop("instance_refresh", None)),
             )
             check_leavins("unmanaged nodegroup attribute", "config.eks.unmanaged_nodegroups", ng)
             return out
@@ -121,38 +773,208 @@ class EKS:
     secrets_encryption_key_arn: str
     managed_nodegroups: Dict[str, ManagedNodegroup]
     unmanaged_nodegroups: Dict[str, UnmanagedNodegroup]
+    kubelet: Kubelet
+    cni: CNI
+    node_termination_handler: bool
+    provisioner: str
+    dns: DNS
+    kube_proxy: KubeProxy
+    control_plane_logging: List[str]
 
     def __post_init__(self):
         errors = []
 
-        def check_ami_exceptions(ng_name: str, ami_id: str, user_data: str, incompatible_options: List[str] = None):
-            if not ami_id:
-                return
+        for name, ng in self.managed_nodegroups.items():
+            errors.extend(self._check_managed_nodegroup(f"Managed nodegroup [{name}]", ng))
+        for name, ng in self.unmanaged_nodegroups.items():
+            errors.extend(self._check_unmanaged_nodegroup(f"Unmanaged nodegroup [{name}]", ng))
 
-            if not user_data:
-                errors.append(f"{ng_name}: User data must be provided when specifying a custom AMI")
+        if unknown := [t for t in self.control_plane_logging if t not in CONTROL_PLANE_LOG_TYPES]:
+            errors.append(
+                f"eks.control_plane_logging must only contain {', '.join(CONTROL_PLANE_LOG_TYPES)}, got: {unknown}"
+            )
 
-            if incompatible_options and any(getattr(ng, opt) for opt in incompatible_options):
-                options_msg = ", ".join(incompatible_options)
-                errors.append(
-                    f"{ng_name}: some options ({options_msg}) cannot be automatically configured when specifying a custom AMI. "
-                    "Please set them to a false-y value (false, 0, \"\", {}, null) and then configure them in user_data or the AMI."
-                )
+        if self.dns.coredns_autoscaling and self.version_tuple < (1, 25):
+            errors.append("eks.dns.coredns_autoscaling requires Kubernetes 1.25 or later")
 
-        for name, ng in self.managed_nodegroups.items():
-            error_name = f"Managed nodegroup [{name}]"
-            check_ami_exceptions(error_name, ng.ami_id, ng.user_data, ["ssm_agent", "labels", "disk_size"])
-            if ng.min_size == 0:
-                errors.append(
-                    f"Error: {error_name} has min_size of 0. Only unmanaged nodegroups support min_size of 0."
-                )
-        for name, ng in self.unmanaged_nodegroups.items():
-            error_name = f"Unmanaged nodegroup [{name}]"
-            check_ami_exceptions(error_name, ng.ami_id, ng.user_data, ["ssm_agent", "labels", "taints", "disk_size"])
+        errors.extend(self._check_provisioner())
 
         if errors:
             raise ValueError(errors)
 
+    @staticmethod
+    def _check_ami_exceptions(ng_name: str, ng: NodegroupBase, incompatible_options: List[str]) -> List[str]:
+        errors = []
+        if not ng.ami_id:
+            return errors
+
+        if not ng.user_data:
+            errors.append(f"{ng_name}: User data must be provided when specifying a custom AMI")
+
+        if any(getattr(ng, opt) for opt in incompatible_options):
+            options_msg = ", ".join(incompatible_options)
+            errors.append(
+                f"{ng_name}: some options ({options_msg}) cannot be automatically configured when specifying a custom AMI. "
+                "Please set them to a false-y value (false, 0, \"\", {}, null) and then configure them in user_data or the AMI."
+            )
+        return errors
+
+    @staticmethod
+    def _check_default_ami_options(ng_name: str, ng: NodegroupBase) -> List[str]:
+        errors = []
+        if options := [opt for opt in ["kubelet", *ng.containerd_options] if getattr(ng, opt)]:
+            if ng.ami_id:
+                errors.append(
+                    f"{ng_name}: {', '.join(options)} cannot be applied when specifying a custom AMI. "
+                    "Please configure them in user_data or the AMI."
+                )
+        if ng.image_snapshot_id and not ng.image_snapshot_id.startswith("snap-"):
+            errors.append(f"{ng_name}: image_snapshot_id must be an EBS snapshot id (snap-...)")
+        if ng.image_lazy_loading and ng.image_lazy_loading not in ["soci", "stargz"]:
+            errors.append(f"{ng_name}: image_lazy_loading must be one of soci, stargz")
+        return errors
+
+    @staticmethod
+    def _check_arch(ng_name: str, ng: NodegroupBase) -> List[str]:
+        errors = []
+        if ng.arch not in [None, "x86_64", "arm64"]:
+            errors.append(f"{ng_name}: arch must be one of x86_64, arm64, got: {ng.arch}")
+        archs = ng.instance_archs
+        if len(archs) > 1:
+            errors.append(
+                f"{ng_name}: instance_types mix CPU architectures ({', '.join(archs)}). "
+                "Use a separate nodegroup per architecture."
+            )
+        elif ng.arch and archs and archs != [ng.arch]:
+            errors.append(f"{ng_name}: arch is {ng.arch}, but instance_types are {archs[0]}")
+        return errors
+
+    def _check_ami_family(self, ng_name: str, ng: NodegroupBase) -> List[str]:
+        errors = []
+        if ng.ami_family not in ["al2", "bottlerocket"]:
+            errors.append(f"{ng_name}: ami_family must be one of al2, bottlerocket, got: {ng.ami_family}")
+        elif ng.ami_family == "bottlerocket":
+            if ng.ami_id:
+                errors.append(f"{ng_name}: ami_family bottlerocket cannot be combined with a custom ami_id")
+            unsupported = [*ng.containerd_options, *(["warm_pool"] if getattr(ng, "warm_pool", None) else [])]
+            if self.kubelet_for(ng).serialize_image_pulls is not None:
+                unsupported.append("kubelet serialize_image_pulls")
+            if unsupported:
+                errors.append(f"{ng_name}: {', '.join(unsupported)} not supported with ami_family bottlerocket")
+        return errors
+
+    def _check_nodegroup(self, ng_name: str, ng: NodegroupBase, ami_options: List[str]) -> List[str]:
+        errors = [
+            *self._check_ami_exceptions(ng_name, ng, ami_options),
+            *self._check_default_ami_options(ng_name, ng),
+            *self._check_arch(ng_name, ng),
+            *self._check_ami_family(ng_name, ng),
+        ]
+        if not ng.resolved_instance_types:
+            errors.append(
+                f"{ng_name}: no instance types. Set instance_types, or instance_requirements matching "
+                "instance types in the catalog."
+            )
+        return errors
+
+    def _check_managed_nodegroup(self, ng_name: str, ng: ManagedNodegroup) -> List[str]:
+        errors = self._check_nodegroup(ng_name, ng, ["ssm_agent", "labels", "disk_size"])
+        if (options := ng.containerd_options) and self.version_tuple < (1, 24):
+            errors.append(
+                f"Error: {ng_name} has {', '.join(options)} set. Managed nodegroups only use containerd "
+                "from Kubernetes 1.24 on."
+            )
+        if not ng.ami_id and self.kubelet_for(ng).max_pods:
+            errors.append(
+                f"Error: {ng_name} has kubelet max_pods set. EKS sets max pods on managed nodegroups, "
+                "only unmanaged nodegroups support kubelet max_pods."
+            )
+        if not ng.ami_id and ng.ami_family == "al2" and self.kubelet_for(ng).cluster_dns:
+            errors.append(
+                f"Error: {ng_name} has kubelet cluster_dns set. EKS sets the cluster DNS on managed AL2 nodegroups."
+            )
+        if ng.min_size == 0:
+            errors.append(f"Error: {ng_name} has min_size of 0. Only unmanaged nodegroups support min_size of 0.")
+        if ng.max_unavailable is not None and ng.max_unavailable_percentage is not None:
+            errors.append(f"{ng_name}: max_unavailable and max_unavailable_percentage are mutually exclusive")
+        for option in ["max_unavailable", "max_unavailable_percentage"]:
+            value = getattr(ng, option)
+            if value is not None and (type(value) is not int or not 1 <= value <= 100):
+                errors.append(f"{ng_name}: {option} must be an integer from 1 to 100, got: {value}")
+        return errors
+
+    def _check_unmanaged_nodegroup(self, ng_name: str, ng: UnmanagedNodegroup) -> List[str]:
+        errors = self._check_nodegroup(ng_name, ng, ["ssm_agent", "labels", "taints", "disk_size"])
+        if ng.gpu and not ng.ami_id and ng.cpu_arch != "x86_64":
+            errors.append(f"{ng_name}: gpu requires x86_64 instance types with the default EKS AMI")
+        if ng.warm_pool:
+            # Warm pools can't be combined with a mixed instances policy
+            if ng.ami_id:
+                errors.append(f"{ng_name}: warm_pool requires the default EKS AMI")
+            if ng.spot or len(ng.resolved_instance_types) != 1:
+                errors.append(f"{ng_name}: warm_pool requires on-demand instances of a single instance type")
+        if ng.spot_options and not ng.spot:
+            errors.append(f"{ng_name}: spot_options requires spot: true")
+        errors.extend(self._check_placement(ng_name, ng))
+        return errors
+
+    @staticmethod
+    def _check_placement(ng_name: str, ng: UnmanagedNodegroup) -> List[str]:
+        errors = []
+        if ng.placement_group not in [None, "cluster", "partition", "spread"]:
+            errors.append(
+                f"{ng_name}: placement_group must be one of cluster, partition, spread, got: {ng.placement_group}"
+            )
+        elif ng.placement_group == "spread" and ng.max_size > 7:
+            # Each availability zone's ASG gets its own group, which holds at most 7 running instances
+            errors.append(f"{ng_name}: spread placement groups hold at most 7 instances, got max_size: {ng.max_size}")
+        if ng.efa and (
+            unsupported := [
+                it for it in ng.resolved_instance_types if it in INSTANCE_TYPES and it not in EFA_INSTANCE_TYPES
+            ]
+        ):
+            errors.append(f"{ng_name}: efa is not supported by instance types {', '.join(unsupported)}")
+        return errors
+
+    def _check_provisioner(self) -> List[str]:
+        errors = []
+        if self.provisioner not in ["asg", "karpenter"]:
+            errors.append(f"eks.provisioner must be one of asg, karpenter, got: {self.provisioner}")
+        elif self.provisioner == "karpenter":
+            if not self.managed_nodegroups:
+                errors.append("eks.provisioner karpenter requires a managed nodegroup to run the Karpenter controller")
+            unsupported = [
+                "ami_id",
+                "image_snapshot_id",
+                "image_lazy_loading",
+                "warm_pool",
+                "placement_group",
+                "efa",
+                "key_name",
+                "instance_refresh",
+            ]
+            for name, ng in self.unmanaged_nodegroups.items():
+                if options := [opt for opt in unsupported if getattr(ng, opt)]:
+                    errors.append(
+                        f"Unmanaged nodegroup [{name}]: {', '.join(options)} not supported with eks.provisioner karpenter"
+                    )
+        return errors
+
+    @property
+    def version_tuple(self) -> Tuple[int, ...]:
+        return tuple(int(x) for x in str(self.version).split("."))
+
+    def kubelet_for(self, ng: NodegroupBase) -> Kubelet:
+        kubelet = (self.kubelet or Kubelet.default()).merge(ng.kubelet)
+        # EKS sets max pods on managed nodegroups itself, accounting for prefix delegation
+        if kubelet.max_pods is None and isinstance(ng, EKS.UnmanagedNodegroup) and not ng.ami_id:
+            kubelet = replace(kubelet, max_pods=self.cni.max_pods(ng.resolved_instance_types))
+        # EKS passes the kube-dns address to bootstrap.sh on managed AL2 nodegroups, overriding kubelet-config.json
+        managed_al2 = isinstance(ng, EKS.ManagedNodegroup) and ng.ami_family == "al2"
+        if kubelet.cluster_dns is None and self.dns.node_local_cache and not ng.ami_id and not managed_al2:
+            kubelet = replace(kubelet, cluster_dns=NODE_LOCAL_DNS_IP)
+        return kubelet
+
     @staticmethod
     def from_0_0_0(c: dict):
         def remap_mi(ng, unmanaged=False):
@@ -178,6 +1000,13 @@ class EKS:
                     for name, ng in c.pop("nodegroups", {}).items()
                 },
                 secrets_encryption_key_arn=None,
+                kubelet=Kubelet.default(),
+                cni=CNI.load(None),
+                node_termination_handler=False,
+                provisioner="asg",
+                dns=DNS.load(None),
+                kube_proxy=KubeProxy.load(None),
+                control_plane_logging=list(CONTROL_PLANE_LOG_TYPES),
             ),
             c,
         )
@@ -199,6 +1028,13 @@ class EKS:
                 unmanaged_nodegroups={
                     name: EKS.UnmanagedNodegroup.load(ng) for name, ng in c.pop("unmanaged_nodegroups", {}).items()
                 },
+                kubelet=Kubelet.load(c.pop("kubelet", None)) or Kubelet.default(),
+                cni=CNI.load(c.pop("cni", None)),
+                node_termination_handler=c.pop("node_termination_handler", False),
+                provisioner=c.pop("provisioner", "asg"),
+                dns=DNS.load(c.pop("dns", None)),
+                kube_proxy=KubeProxy.load(c.pop("kube_proxy", None)),
+                control_plane_logging=c.pop("control_plane_logging", list(CONTROL_PLANE_LOG_TYPES)),
             ),
             c,
         )
@@ -283,6 +283,32 @@ def generate_iam(stack_name: str, aws_account_id: str, region: str, manual: bool
     if not manual:
         ecr = []
 
+    registry_cache = {
+        "Effect": "Allow",
+        "Action": [
+            "ecr:CreatePullThroughCacheRule",
+            "ecr:CreateRepositoryCreationTemplate",
+            "ecr:DeletePullThroughCacheRule",
+            "ecr:DeleteRepositoryCreationTemplate",
+            "ecr:DescribePullThroughCacheRules",
+            "ecr:DescribeRepositoryCreationTemplates",
+            "ecr:UpdatePullThroughCacheRule",
+            "ecr:UpdateRepositoryCreationTemplate",
+            "secretsmanager:CreateSecret",
+            "secretsmanager:DeleteSecret",
+            "secretsmanager:DescribeSecret",
+            "secretsmanager:GetSecretValue",
+            "secretsmanager:PutSecretValue",
+            "secretsmanager:TagResource",
+            "secretsmanager:UpdateSecret",
+        ],
+        **from_cf_condition,
+        "Resource": [
+            f"arn:{partition}:ecr:*:{aws_account_id}:*",
+            f"arn:{partition}:secretsmanager:*:{aws_account_id}:secret:ecr-pullthroughcache/{stack_name}-*",
+        ],
+    }
+
     bastion = []
 
     if use_bastion:
@@ -342,10 +368,16 @@ def generate_iam(stack_name: str, aws_account_id: str, region: str, manual: bool
             "autoscaling:CreateAutoScalingGroup",
             "autoscaling:CreateOrUpdateTags",
             "autoscaling:DeleteAutoScalingGroup",
+            "autoscaling:DeleteLifecycleHook",
             "autoscaling:DeleteTags",
+            "autoscaling:DeleteWarmPool",
             "autoscaling:DescribeAutoScalingGroups",
+            "autoscaling:DescribeLifecycleHooks",
             "autoscaling:DescribeScalingActivities",
             "autoscaling:DescribeScheduledActions",
+            "autoscaling:DescribeWarmPool",
+            "autoscaling:PutLifecycleHook",
+            "autoscaling:PutWarmPool",
             "autoscaling:UpdateAutoScalingGroup",
             "ec2:*NetworkInterface*",
             "ec2:*Subnet*",
@@ -471,6 +503,7 @@ def generate_iam(stack_name: str, aws_account_id: str, region: str, manual: bool
                 backup,
                 *backup_efs,
                 *ecr,
+                registry_cache,
                 *bastion,
                 general,
                 kms,
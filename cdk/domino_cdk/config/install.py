@@ -1,7 +1,225 @@
+import re
 from dataclasses import dataclass
+from logging import Logger
 from typing import List, Optional
 
-from domino_cdk.config.util import from_loader
+from domino_cdk.config.util import check_leavins, from_loader
+
+log = Logger("domino_cdk.config.install")
+
+
+@dataclass
+class Autoscaler:
+    """
+    Cluster autoscaler settings, passed to the installer as cluster-autoscaler chart values.
+    Durations left null keep the autoscaler's defaults.
+    expander: priority/least-waste/most-pods/random - How to pick a nodegroup to scale up. priority prefers
+                                                      spot nodegroups, then non-GPU ones, then smaller instances.
+    balance_similar_node_groups: true/false - Keep the per-availability zone groups of a nodegroup the same size
+    scan_interval: 10s - How often the cluster is checked for pending pods
+    scale_down_delay_after_add: 10m - Wait after a scale up before considering scale downs
+    scale_down_unneeded_time: 10m - How long a node must be unneeded before it is removed
+    max_node_provision_time: 15m - How long to wait for a node to register before giving up on its group
+    """
+
+    expander: str
+    balance_similar_node_groups: bool
+    scan_interval: str
+    scale_down_delay_after_add: str
+    scale_down_unneeded_time: str
+    max_node_provision_time: str
+
+    _durations = ["scan_interval", "scale_down_delay_after_add", "scale_down_unneeded_time", "max_node_provision_time"]
+
+    def __post_init__(self):
+        errors = []
+
+        if self.expander not in ["priority", "least-waste", "most-pods", "random"]:
+            errors.append(
+                f"autoscaler.expander must be one of priority, least-waste, most-pods, random, got: {self.expander}"
+            )
+
+        for duration in self._durations:
+            value = getattr(self, duration)
+            if value is not None and not re.fullmatch(r"(\d+(h|m|s))+", str(value)):
+                errors.append(f"autoscaler.{duration} must be a duration (ie 30s, 10m, 1h30m), got: {value}")
+
+        if errors:
+            raise ValueError(errors)
+
+    def extra_args(self) -> dict:
+        args = {"expander": self.expander}
+        if self.balance_similar_node_groups:
+            args["balance-similar-node-groups"] = "true"
+            # Per-AZ groups of a nodegroup only differ by this label, which the autoscaler doesn't ignore itself
+            args["balancing-ignore-label"] = "topology.ebs.csi.aws.com/zone"
+        for duration in self._durations:
+            if value := getattr(self, duration):
+                args[duration.replace("_", "-")] = value
+        return args
+
+    @staticmethod
+    def load(c: Optional[dict]) -> "Autoscaler":
+        c = c or {}
+        out = Autoscaler(
+            expander=c.pop("expander", "priority"),
+            balance_similar_node_groups=c.pop("balance_similar_node_groups", True),
+            **{duration: c.pop(duration, None) for duration in Autoscaler._durations},
+        )
+        check_leavins("autoscaler attribute", "config.install.autoscaler", c)
+        return out
+
+
+@dataclass
+class LoadBalancer:
+    """
+    Load balancer in front of nginx-ingress.
+    type: elb/nlb - elb is a classic ELB. nlb is a Network Load Balancer provisioned by the AWS Load Balancer
+                    Controller (type external), which must be installed in the cluster.
+    target_type: ip/instance - nlb only. ip sends traffic straight to the ingress pods, skipping the node port hop.
+    cross_zone: true/false - nlb only. Spread traffic over the targets of all availability zones.
+    idle_timeout: 3600 - Seconds a connection may be idle (1-4000 on an elb, 60-6000 on an nlb). On an nlb it only
+                         applies to the TCP listener of port 80, the TLS listener of port 443 keeps NLB's fixed
+                         350 second idle timeout.
+    Access logs go to the monitoring bucket, if there is one.
+    """
+
+    type: str
+    target_type: str
+    cross_zone: bool
+    idle_timeout: int
+
+    _idle_timeout_range = {"elb": (1, 4000), "nlb": (60, 6000)}
+
+    def __post_init__(self):
+        errors = []
+
+        if self.type not in ["elb", "nlb"]:
+            errors.append(f"load_balancer.type must be one of elb, nlb, got: {self.type}")
+        if self.target_type not in ["ip", "instance"]:
+            errors.append(f"load_balancer.target_type must be one of ip, instance, got: {self.target_type}")
+        if self.type in self._idle_timeout_range:
+            low, high = self._idle_timeout_range[self.type]
+            if type(self.idle_timeout) is not int or not low <= self.idle_timeout <= high:
+                errors.append(
+                    f"load_balancer.idle_timeout must be {low}-{high} seconds on an {self.type}, got: {self.idle_timeout}"
+                )
+            elif self.type == "nlb" and self.idle_timeout > 350:
+                log.warning(
+                    f"Warning: load_balancer.idle_timeout ({self.idle_timeout}) only applies to port 80 on an nlb, "
+                    "HTTPS connections keep the fixed 350 second idle timeout of its TLS listener"
+                )
+
+        if errors:
+            raise ValueError(errors)
+
+    @staticmethod
+    def load(c: Optional[dict]) -> "LoadBalancer":
+        c = c or {}
+        out = LoadBalancer(
+            type=c.pop("type", "elb"),
+            target_type=c.pop("target_type", "ip"),
+            cross_zone=c.pop("cross_zone", True),
+            idle_timeout=c.pop("idle_timeout", 3600),
+        )
+        check_leavins("load balancer attribute", "config.install.load_balancer", c)
+        return out
+
+
+@dataclass
+class Storage:
+    """
+    Storage classes created by the installer.
+    block: dominodisk EBS storage class of git repos, workspace and model volumes
+      volume_type: gp3/gp2/io1/io2 - EBS volume type
+      iops: 3000 - Provisioned IOPS (gp3: 3000-80000, io1: 100-64000, io2: 100-256000), null for the volume type's
+                   baseline
+      throughput: 125 - gp3 only. Provisioned throughput in MiB/s (125-2000, at most iops / 4), null for the baseline
+      kms_key_id: ARN - KMS key ARN to encrypt volumes with. Volumes are always encrypted, with the aws/ebs key if null.
+      volume_binding_mode: WaitForFirstConsumer/Immediate - WaitForFirstConsumer creates volumes in the availability
+                                                            zone of the pod's node
+    """
+
+    @dataclass
+    class Block:
+        volume_type: str
+        iops: Optional[int]
+        throughput: Optional[int]
+        kms_key_id: Optional[str]
+        volume_binding_mode: str
+        _no_doc = True
+
+        _iops_range = {"gp3": (3000, 80000), "io1": (100, 64000), "io2": (100, 256000)}
+
+        def __post_init__(self):
+            errors = []
+
+            if self.volume_type not in ["gp3", "gp2", "io1", "io2"]:
+                errors.append(f"storage.block.volume_type must be one of gp3, gp2, io1, io2, got: {self.volume_type}")
+            elif self.iops is not None:
+                if self.volume_type == "gp2":
+                    errors.append("storage.block.iops can't be set for gp2 volumes, which scale iops with size")
+                elif type(self.iops) is not int or not (
+                    self._iops_range[self.volume_type][0] <= self.iops <= self._iops_range[self.volume_type][1]
+                ):
+                    errors.append(
+                        f"storage.block.iops must be {'-'.join(map(str, self._iops_range[self.volume_type]))} "
+                        f"for {self.volume_type} volumes, got: {self.iops}"
+                    )
+            elif self.volume_type in ["io1", "io2"]:
+                errors.append(f"storage.block.iops is required for {self.volume_type} volumes")
+
+            if self.throughput is not None:
+                if self.volume_type != "gp3":
+                    errors.append(f"storage.block.throughput can only be set for gp3 volumes, got: {self.volume_type}")
+                elif type(self.throughput) is not int or not 125 <= self.throughput <= 2000:
+                    errors.append(f"storage.block.throughput must be 125-2000 MiB/s, got: {self.throughput}")
+                elif self.throughput > (self.iops or 3000) / 4:
+                    errors.append(
+                        f"storage.block.throughput ({self.throughput}) must not exceed iops / 4 ({(self.iops or 3000) // 4})"
+                    )
+
+            if self.kms_key_id is not None and not re.match(r"^arn:[^:]+:kms:", str(self.kms_key_id)):
+                errors.append(f"storage.block.kms_key_id must be a KMS key ARN, got: {self.kms_key_id}")
+
+            if self.volume_binding_mode not in ["WaitForFirstConsumer", "Immediate"]:
+                errors.append(
+                    "storage.block.volume_binding_mode must be one of WaitForFirstConsumer, Immediate, "
+                    f"got: {self.volume_binding_mode}"
+                )
+
+            if errors:
+                raise ValueError(errors)
+
+        def parameters(self) -> dict:
+            """EBS CSI driver storage class parameters"""
+            params = {"type": self.volume_type, "encrypted": "true"}
+            if self.iops is not None:
+                params["iops"] = str(self.iops)
+            if self.throughput is not None:
+                params["throughput"] = str(self.throughput)
+            if self.kms_key_id:
+                params["kmsKeyId"] = self.kms_key_id
+            return params
+
+    block: Block
+
+    @staticmethod
+    def load(c: Optional[dict]) -> "Storage":
+        c = c or {}
+        block = c.pop("block", None) or {}
+        out = Storage(
+            block=Storage.Block(
+                volume_type=block.pop("volume_type", "gp3"),
+                iops=block.pop("iops", None),
+                throughput=block.pop("throughput", None),
+                kms_key_id=block.pop("kms_key_id", None),
+                volume_binding_mode=block.pop("volume_binding_mode", "WaitForFirstConsumer"),
+            )
+        )
+        check_leavins("block storage attribute", "config.install.storage.block", block)
+        check_leavins("storage attribute", "config.install.storage", c)
+        return out
 
 
 @dataclass
@@ -17,7 +235,15 @@ class Install:
     hostname: domino.example.com - Hostname of Domino install
     registry_username: some-username - Username for Domino quay.io image repositories
     registry_password: some-password - Password for Domino quay.io image repoistories
+    registry_cache: domino-quay - ECR repository prefix of a pull-through cache of quay.io, so nodes pull Domino
+                                  images in-region. Uses the registry credentials. Leave null to pull from quay.io.
     overrides: <dict/hash> - Overrides of Domino Installer (fleetcommand-agent) configuration.
+    prepull_images: [quay.io/domino/..., ...] - Extra images to bake into nodegroup image snapshots (image_snapshot_id),
+                                                besides the images set in overrides. `util.py generate_image_list`
+                                                prints the full list.
+    autoscaler: Cluster autoscaler settings (see below)
+    load_balancer: Ingress load balancer settings (see below)
+    storage: Storage class settings (see below)
     """
 
     access_list: List[str]  # TODO: What should this variable be? cidr_access_list? loadbalancer_source_ranges?
@@ -25,8 +251,29 @@ class Install:
     hostname: str
     registry_username: str
     registry_password: str
+    registry_cache: Optional[str]
     overrides: dict
     istio_compatible: bool
+    prepull_images: List[str]
+    autoscaler: Autoscaler
+    load_balancer: LoadBalancer
+    storage: Storage
+
+    def __post_init__(self):
+        errors = []
+
+        if self.registry_cache is not None:
+            # ECR pull-through cache rule prefix constraints
+            if not re.match(r"^(?=.{2,30}$)[a-z0-9]+(?:[._-][a-z0-9]+)*$", str(self.registry_cache)):
+                errors.append(
+                    "install.registry_cache must be 2-30 lowercase letters, digits and separators (._-), "
+                    f"got: {self.registry_cache}"
+                )
+            if not self.registry_username or not self.registry_password:
+                errors.append("install.registry_cache requires registry_username and registry_password")
+
+        if errors:
+            raise ValueError(errors)
 
     @staticmethod
     def from_0_0_0(c: dict) -> Optional['Install']:
@@ -38,7 +285,12 @@ class Install:
                 hostname=None,
                 registry_username=None,
                 registry_password=None,
+                registry_cache=None,
                 istio_compatible=False,
+                prepull_images=[],
+                autoscaler=Autoscaler.load(None),
+                load_balancer=LoadBalancer.load(None),
+                storage=Storage.load(None),
                 overrides=c,
             ),
             c,
@@ -54,8 +306,13 @@ class Install:
                 hostname=c.pop("hostname"),
                 registry_username=c.pop("registry_username"),
                 registry_password=c.pop("registry_password"),
+                registry_cache=c.pop("registry_cache", None),
                 overrides=c.pop("overrides"),
                 istio_compatible=c.pop("istio_compatible", False),
+                prepull_images=c.pop("prepull_images", []),
+                autoscaler=Autoscaler.load(c.pop("autoscaler", None)),
+                load_balancer=LoadBalancer.load(c.pop("load_balancer", None)),
+                storage=Storage.load(c.pop("storage", None)),
             ),
             c,
         )
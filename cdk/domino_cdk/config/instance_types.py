@@ -0,0 +1,161 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class InstanceSpec:
+    vcpu: int
+    memory_gib: float
+    gpus: int
+    arch: str
+    max_enis: int
+    ipv4_per_eni: int
+
+
+# (size, vcpu, memory GiB, gpus, max ENIs, IPv4 addresses per ENI)
+_SizeRow = Tuple[str, int, float, int, int, int]
+
+_general_purpose: List[_SizeRow] = [
+    ("large", 2, 8, 0, 3, 10),
+    ("xlarge", 4, 16, 0, 4, 15),
+    ("2xlarge", 8, 32, 0, 4, 15),
+    ("4xlarge", 16, 64, 0, 8, 30),
+    ("8xlarge", 32, 128, 0, 8, 30),
+    ("12xlarge", 48, 192, 0, 8, 30),
+    ("16xlarge", 64, 256, 0, 15, 50),
+    ("24xlarge", 96, 384, 0, 15, 50),
+]
+_graviton: List[_SizeRow] = [("medium", 1, 4, 0, 2, 4), *_general_purpose[:7]]
+_burstable: List[_SizeRow] = [
+    ("micro", 2, 1, 0, 2, 2),
+    ("small", 2, 2, 0, 3, 4),
+    ("medium", 2, 4, 0, 3, 6),
+    ("large", 2, 8, 0, 3, 12),
+    ("xlarge", 4, 16, 0, 4, 15),
+    ("2xlarge", 8, 32, 0, 4, 15),
+]
+_c5: List[_SizeRow] = [
+    ("large", 2, 4, 0, 3, 10),
+    ("xlarge", 4, 8, 0, 4, 15),
+    ("2xlarge", 8, 16, 0, 4, 15),
+    ("4xlarge", 16, 32, 0, 8, 30),
+    ("9xlarge", 36, 72, 0, 8, 30),
+    ("12xlarge", 48, 96, 0, 8, 30),
+    ("18xlarge", 72, 144, 0, 15, 50),
+    ("24xlarge", 96, 192, 0, 15, 50),
+]
+_g4dn: List[_SizeRow] = [
+    ("xlarge", 4, 16, 1, 3, 10),
+    ("2xlarge", 8, 32, 1, 3, 10),
+    ("4xlarge", 16, 64, 1, 3, 10),
+    ("8xlarge", 32, 128, 1, 4, 15),
+    ("12xlarge", 48, 192, 4, 8, 30),
+    ("16xlarge", 64, 256, 1, 4, 15),
+]
+_g5: List[_SizeRow] = [
+    ("xlarge", 4, 16, 1, 4, 15),
+    ("2xlarge", 8, 32, 1, 4, 15),
+    ("4xlarge", 16, 64, 1, 8, 30),
+    ("8xlarge", 32, 128, 1, 8, 30),
+    ("12xlarge", 48, 192, 4, 15, 50),
+    ("16xlarge", 64, 256, 1, 8, 30),
+    ("24xlarge", 96, 384, 4, 15, 50),
+    ("48xlarge", 192, 768, 8, 7, 50),
+]
+_p3: List[_SizeRow] = [
+    ("2xlarge", 8, 61, 1, 4, 15),
+    ("8xlarge", 32, 244, 4, 8, 30),
+    ("16xlarge", 64, 488, 8, 8, 30),
+]
+
+
+def _scale_memory(rows: List[_SizeRow], factor: float) -> List[_SizeRow]:
+    return [(size, vcpu, memory * factor, gpus, enis, ips) for size, vcpu, memory, gpus, enis, ips in rows]
+
+
+def _family(family: str, rows: List[_SizeRow], arch: str = "x86_64") -> Dict[str, InstanceSpec]:
+    return {f"{family}.{row[0]}": InstanceSpec(*row[1:4], arch, *row[4:]) for row in rows}
+
+
+# Embedded subset of the EC2 instance type catalog, for offline planning and validation.
+# ENI limits follow https://github.com/awslabs/amazon-eks-ami/blob/master/files/eni-max-pods.txt
+INSTANCE_TYPES: Dict[str, InstanceSpec] = {
+    **_family("t3", _burstable),
+    **_family("t3a", _burstable),
+    **_family("t4g", _burstable, "arm64"),
+    **{
+        k: v
+        for family in ["m5", "m5a", "m5d", "m6i", "m6a", "m7i"]
+        for k, v in _family(family, _general_purpose).items()
+    },
+    **{k: v for family in ["m6g", "m7g"] for k, v in _family(family, _graviton, "arm64").items()},
+    **_family("c5", _c5),
+    **{
+        k: v
+        for family in ["c6i", "c6a", "c7i"]
+        for k, v in _family(family, _scale_memory(_general_purpose, 0.5)).items()
+    },
+    **{k: v for family in ["c6g", "c7g"] for k, v in _family(family, _scale_memory(_graviton, 0.5), "arm64").items()},
+    **{
+        k: v
+        for family in ["r5", "r5a", "r5d", "r6i", "r6a", "r7i"]
+        for k, v in _family(family, _scale_memory(_general_purpose, 2)).items()
+    },
+    **{k: v for family in ["r6g", "r7g"] for k, v in _family(family, _scale_memory(_graviton, 2), "arm64").items()},
+    **_family("g4dn", _g4dn),
+    **_family("g5", _g5),
+    **_family("p3", _p3),
+    "p3dn.24xlarge": InstanceSpec(96, 768, 8, "x86_64", 15, 50),
+    "p4d.24xlarge": InstanceSpec(96, 1152, 8, "x86_64", 15, 50),
+}
+
+
+# Catalog instance types with Elastic Fabric Adapter support
+EFA_INSTANCE_TYPES = [
+    "g4dn.8xlarge",
+    "g4dn.12xlarge",
+    "g4dn.16xlarge",
+    "g5.8xlarge",
+    "g5.12xlarge",
+    "g5.16xlarge",
+    "g5.24xlarge",
+    "g5.48xlarge",
+    "p3dn.24xlarge",
+    "p4d.24xlarge",
+]
+
+
+def max_pods(instance_type: str, prefix_delegation: bool = False, custom_networking: bool = False) -> Optional[int]:
+    """Pod capacity of the VPC CNI on an instance type, like the EKS max-pods-calculator.sh"""
+    if not (spec := INSTANCE_TYPES.get(instance_type)):
+        return None
+
+    # With custom networking the primary ENI is not used for pods
+    enis = spec.max_enis - 1 if custom_networking else spec.max_enis
+    if prefix_delegation:
+        # Each secondary IP slot holds a /28 prefix, capped at the recommended pods per node
+        return min(enis * (spec.ipv4_per_eni - 1) * 16 + 2, 110 if spec.vcpu < 30 else 250)
+    return enis * (spec.ipv4_per_eni - 1) + 2
+
+
+def generation(instance_type: str) -> int:
+    return int(re.search(r"\d+", instance_type.split(".")[0]).group())
+
+
+def match_instance_types(vcpu: int, memory_gib: float, gpus: int, arch: str) -> List[str]:
+    """
+    Catalog instance types with exactly `vcpu` vCPUs and `gpus` GPUs and at least `memory_gib` memory,
+    ranked by the least extra memory, then the newest generation. Burstable (t*) types are left out,
+    as they are throttled once out of CPU credits.
+    """
+    matches = [
+        it
+        for it, spec in INSTANCE_TYPES.items()
+        if not it.startswith("t")
+        and spec.vcpu == vcpu
+        and spec.gpus == gpus
+        and spec.memory_gib >= memory_gib
+        and spec.arch == arch
+    ]
+    return sorted(matches, key=lambda it: (INSTANCE_TYPES[it].memory_gib - memory_gib, -generation(it), it))
@@ -2,15 +2,24 @@ from typing import Any, Dict, List, Optional
 
 from domino_cdk import __version__
 from domino_cdk.config import (
+    CNI,
+    DNS,
     EFS,
     EKS,
     S3,
     VPC,
+    Autoscaler,
     DominoCDKConfig,
     IngressRule,
     Install,
+    Kubelet,
+    KubeProxy,
+    LoadBalancer,
     Route53,
+    Storage,
 )
+from domino_cdk.config.eks import CONTROL_PLANE_LOG_TYPES
+from domino_cdk.config.vpc import DEFAULT_ENDPOINTS, RECOMMENDED_ENDPOINTS
 from domino_cdk.util import DominoCdkUtil
 
 
@@ -56,6 +65,11 @@ def config_template(
             unmanaged_nodegroups[f"{name}-{i}"] = EKS.UnmanagedNodegroup(
                 gpu=gpu,
                 imdsv2_required=True,
+                warm_pool=None,
+                spot_options=None,
+                placement_group=None,
+                efa=False,
+                instance_refresh=None,
                 ssm_agent=True,
                 disk_size=disk_size,
                 key_name=keypair_name,
@@ -69,6 +83,12 @@ def config_template(
                 tags={},
                 taints=taints or {},
                 spot=False,
+                kubelet=None,
+                image_snapshot_id=None,
+                image_lazy_loading=None,
+                arch=None,
+                instance_requirements=None,
+                ami_family="al2",
             )
 
     add_nodegroups(
@@ -103,11 +123,15 @@ def config_template(
         create=True,
         cidr='10.0.0.0/16',
         public_cidr_mask=27,
+        pod_cidrs=["100.164.0.0/16"],
+        pod_cidr_mask=18,
         private_cidr_mask=19,
         availability_zones=[],
         max_azs=2 if dev_defaults else 3,
         flow_logging=not disable_flow_logs,
-        endpoints=not dev_defaults,
+        # Nodes of a private cluster reach the rest of the AWS APIs through endpoints too, instead of the NAT gateways
+        endpoints=[] if dev_defaults else list(RECOMMENDED_ENDPOINTS if private_api else DEFAULT_ENDPOINTS),
+        ip_family="ipv4",
         bastion=VPC.Bastion(
             enabled=bastion,
             key_name=keypair_name,
@@ -138,6 +162,13 @@ def config_template(
         global_node_tags={},
         managed_nodegroups={},
         unmanaged_nodegroups=unmanaged_nodegroups,
+        kubelet=Kubelet.default(),
+        cni=CNI.load({"custom_networking": True}),
+        node_termination_handler=False,
+        provisioner="asg",
+        dns=DNS.load(None),
+        kube_proxy=KubeProxy.load(None),
+        control_plane_logging=list(CONTROL_PLANE_LOG_TYPES),
     )
 
     route53 = Route53(zone_ids=[])
@@ -194,7 +225,12 @@ def config_template(
         hostname=hostname,
         registry_username=registry_username,
         registry_password=registry_password,
+        registry_cache=None,
         istio_compatible=istio_compatible,
+        prepull_images=[],
+        autoscaler=Autoscaler.load(None),
+        load_balancer=LoadBalancer.load(None),
+        storage=Storage.load(None),
         overrides=overrides,
     )
 
@@ -1,8 +1,31 @@
+import re
 from dataclasses import dataclass
-from typing import List
+from ipaddress import IPv4Network, ip_network
+from typing import List, Union
 
 from domino_cdk.config.util import IngressRule, from_loader
 
+# What `endpoints: true` provisioned before the list was configurable. s3 is a gateway endpoint, the rest interfaces.
+DEFAULT_ENDPOINTS = ["s3", "ec2", "sts", "ecr.api", "autoscaling", "ecr.dkr"]
+# Everything nodes of a private cluster reach AWS APIs for: image pulls, logs, load balancers, EFS, KMS and SSM
+RECOMMENDED_ENDPOINTS = [
+    *DEFAULT_ENDPOINTS,
+    "eks",
+    "logs",
+    "elasticloadbalancing",
+    "elasticfilesystem",
+    "kms",
+    "ssm",
+    "ssmmessages",
+    "ec2messages",
+]
+
+
+def load_endpoints(endpoints: Union[bool, List[str], None]) -> List[str]:
+    if endpoints is True:
+        return list(DEFAULT_ENDPOINTS)
+    return endpoints or []
+
 
 @dataclass
 class VPC:
@@ -15,10 +38,22 @@ class VPC:
                             to accomodate all potential compute needs.
     public_cidr_mask: 27 - CIDR size of public subnets. Usually just houses NAT
                            gateways/bastions/public load balancers/etc.
+    pod_cidrs: ["100.164.0.0/16"] - Secondary CIDR ranges added to a created VPC for the per-AZ pod subnets
+                                    (see eks.cni.custom_networking). Up to 4, each /16 to /28.
+    pod_cidr_mask: 18 - CIDR size of each pod subnet, carved out of pod_cidrs for every availability zone
     availability_zones: Specific availability zones to use with vpc (optional)
     max_azs: 3 - Maximum amount of availability zones to configure for the VPC
                  MUST have at least two for the EKS control plane to provision
     flow_logging: false - Whether or not to enable VPC flow logging
+    endpoints: [s3, ec2, sts] - AWS services reached through VPC endpoints instead of the NAT gateways, cutting NAT
+                                data charges and latency. s3 is a gateway endpoint, the others interface endpoints
+                                in the private subnets. Recommended for private clusters: s3, ec2, sts, ecr.api,
+                                autoscaling, ecr.dkr, eks, logs, elasticloadbalancing, elasticfilesystem, kms, ssm,
+                                ssmmessages, ec2messages. true is s3, ec2, sts, ecr.api, autoscaling and ecr.dkr.
+    ip_family: ipv4/ipv6 - IP family of the EKS cluster. ipv6 adds an Amazon-provided IPv6 CIDR to a created VPC,
+                           with dual-stack subnets and an egress-only internet gateway, and gives pods IPv6
+                           addresses, so pod density no longer depends on IPv4 space. An existing VPC must
+                           already be dual-stack. Only applies when the cluster is created.
     """
 
     @dataclass
@@ -53,11 +88,14 @@ class VPC:
     cidr: str
     private_cidr_mask: int
     public_cidr_mask: int
+    pod_cidrs: List[str]
+    pod_cidr_mask: int
     availability_zones: List[str]
     max_azs: int
     bastion: Bastion
     flow_logging: bool
-    endpoints: bool
+    endpoints: List[str]
+    ip_family: str
 
     def __post_init__(self):
         if not self.id and not self.create:
@@ -66,6 +104,76 @@ class VPC:
             raise ValueError("Error: Must use at least two availability zones with EKS")
         if self.bastion.enabled and not self.bastion.ami_id and self.bastion.user_data:
             raise ValueError("Error: Bastion instance with user_data requires an ami_id!")
+        if invalid := [
+            e for e in self.endpoints if type(e) is not str or not re.fullmatch(r"[a-z0-9]+([.-][a-z0-9]+)*", e)
+        ]:
+            raise ValueError(f"Error: vpc.endpoints must be AWS service names (ie ecr.api), got: {invalid}")
+        if len(set(self.endpoints)) != len(self.endpoints):
+            raise ValueError(f"Error: vpc.endpoints has duplicates: {self.endpoints}")
+        if self.ip_family not in ["ipv4", "ipv6"]:
+            raise ValueError(f"Error: vpc.ip_family must be one of ipv4, ipv6, got: {self.ip_family}")
+        if self.create and (errors := self.check_pod_cidrs()):
+            raise ValueError(errors)
+
+    def check_pod_cidrs(self) -> List[str]:
+        # https://docs.aws.amazon.com/vpc/latest/userguide/vpc-cidr-blocks.html#add-cidr-block-restrictions
+        rfc1918 = [ip_network(x) for x in ["10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16"]]
+        errors = []
+
+        try:
+            pod_cidrs = [ip_network(c) for c in self.pod_cidrs]
+            primary = ip_network(self.cidr)
+        except ValueError as e:
+            return [f"Error: Invalid vpc.cidr/pod_cidrs: {e}"]
+
+        if not pod_cidrs:
+            return ["Error: vpc.pod_cidrs needs at least one CIDR range"]
+        if len(pod_cidrs) > 4:
+            errors.append("Error: vpc.pod_cidrs can't have more than 4 ranges (VPCs allow 5 CIDR blocks by default)")
+
+        primary_block = next((block for block in rfc1918 if primary.subnet_of(block)), None)
+        for i, cidr in enumerate(pod_cidrs):
+            if not isinstance(cidr, IPv4Network) or not 16 <= cidr.prefixlen <= 28:
+                errors.append(f"Error: vpc.pod_cidrs {cidr} must be an IPv4 range between /16 and /28")
+                continue
+            if cidr.overlaps(primary) or any(cidr.overlaps(other) for other in pod_cidrs[:i]):
+                errors.append(f"Error: vpc.pod_cidrs {cidr} overlaps with the VPC cidr or another pod cidr")
+            if cidr.overlaps(ip_network("198.19.0.0/16")):
+                errors.append(f"Error: vpc.pod_cidrs {cidr} overlaps with 198.19.0.0/16, which AWS reserves")
+            if primary_block and any(cidr.overlaps(block) for block in rfc1918 if block != primary_block):
+                errors.append(
+                    f"Error: vpc.pod_cidrs {cidr} is in a different RFC 1918 range than the VPC cidr ({primary_block}). "
+                    "Use the VPC cidr's range, 100.64.0.0/10 or a publicly routable range."
+                )
+
+        if errors:
+            return errors
+
+        available = sum(
+            2 ** (self.pod_cidr_mask - cidr.prefixlen) for cidr in pod_cidrs if cidr.prefixlen <= self.pod_cidr_mask
+        )
+        az_count = len(self.availability_zones or []) or self.max_azs
+        if not 16 <= self.pod_cidr_mask <= 28:
+            errors.append(f"Error: vpc.pod_cidr_mask must be between 16 and 28, got: {self.pod_cidr_mask}")
+        elif available < az_count:
+            errors.append(
+                f"Error: vpc.pod_cidrs only fit {available} /{self.pod_cidr_mask} pod subnets, "
+                f"but {az_count} availability zones need one each"
+            )
+
+        return errors
+
+    def pod_subnet_cidrs(self, az_count: int) -> List[str]:
+        """One pod subnet CIDR per availability zone, carved from pod_cidrs in order"""
+        subnets = [
+            str(subnet)
+            for cidr in self.pod_cidrs
+            if ip_network(cidr).prefixlen <= self.pod_cidr_mask
+            for subnet in ip_network(cidr).subnets(new_prefix=self.pod_cidr_mask)
+        ]
+        if len(subnets) < az_count:
+            raise ValueError(f"vpc.pod_cidrs don't fit {az_count} /{self.pod_cidr_mask} pod subnets")
+        return subnets[:az_count]
 
     @staticmethod
     def from_0_0_0(c: dict):
@@ -77,10 +185,13 @@ class VPC:
                 cidr=c.pop("cidr"),
                 private_cidr_mask=24,
                 public_cidr_mask=24,
+                pod_cidrs=["100.164.0.0/16"],
+                pod_cidr_mask=18,
                 availability_zones=c.pop("availability_zones", []),
                 max_azs=c.pop("max_azs"),
                 flow_logging=c.pop("flow_logging", False),
-                endpoints=c.pop("endpoints", True),
+                endpoints=load_endpoints(c.pop("endpoints", True)),
+                ip_family="ipv4",
                 bastion=VPC.Bastion(
                     enabled=False,
                     key_name=None,
@@ -104,10 +215,13 @@ class VPC:
                 cidr=c.pop("cidr"),
                 private_cidr_mask=c.pop("private_cidr_mask"),
                 public_cidr_mask=c.pop("public_cidr_mask"),
+                pod_cidrs=c.pop("pod_cidrs", ["100.164.0.0/16"]),
+                pod_cidr_mask=c.pop("pod_cidr_mask", 18),
                 availability_zones=c.pop("availability_zones", []),
                 max_azs=c.pop("max_azs"),
                 flow_logging=c.pop("flow_logging", False),
-                endpoints=c.pop("endpoints", True),
+                endpoints=load_endpoints(c.pop("endpoints", True)),
+                ip_family=c.pop("ip_family", "ipv4"),
                 bastion=VPC.Bastion(
                     enabled=bastion.pop("enabled"),
                     key_name=bastion.pop("key_name", None),
@@ -3,7 +3,11 @@ from typing import Optional
 import aws_cdk.aws_s3 as s3
 from aws_cdk import core as cdk
 
-from domino_cdk.agent import generate_install_config
+from domino_cdk.agent import (
+    cache_image_references,
+    ecr_registry,
+    generate_install_config,
+)
 from domino_cdk.aws_configurator import DominoAwsConfigurator
 from domino_cdk.config import DominoCDKConfig
 from domino_cdk.provisioners import (
@@ -57,6 +61,7 @@ class DominoStack(cdk.Stack):
             self.cfg.eks,
             self.vpc_stack.vpc,
             self.vpc_stack.private_subnet_name,
+            self.vpc_stack.pod_subnets,
             self.vpc_stack.bastion_sg,
             self.cfg.route53.zone_ids if self.cfg.route53 is not None else [],
             nest,
@@ -78,6 +83,7 @@ class DominoStack(cdk.Stack):
                 self.vpc_stack.vpc,
                 self.eks_stack.cluster.cluster_security_group,
                 nest,
+                ipv6_cidr=self.vpc_stack.ipv6_cidr_block,
             )
 
         if self.cfg.acm is not None:
@@ -161,9 +167,14 @@ class DominoStack(cdk.Stack):
                 efs_apid=self.efs_stack.efs_access_point.access_point_id,
                 r53_zone_ids=r53_zone_ids,
                 r53_owner_id=r53_owner_id,
+                eks=self.cfg.eks,
+                aws_account_id=self.account,
             )
 
             merged_cfg = DominoCdkUtil.deep_merge(agent_cfg, self.cfg.install.overrides)
+            if self.cfg.install.registry_cache:
+                cache = f"{ecr_registry(self.account, self.cfg.aws_region)}/{self.cfg.install.registry_cache}"
+                merged_cfg = cache_image_references(merged_cfg, cache)
 
             cdk.CfnOutput(self, "agent_config", value=DominoCdkUtil.ruamel_dump(merged_cfg))
 
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import aws_cdk.aws_backup as backup
 import aws_cdk.aws_ec2 as ec2
 import aws_cdk.aws_efs as efs
@@ -23,16 +25,24 @@ class DominoEfsProvisioner:
         vpc: ec2.Vpc,
         security_group: ec2.SecurityGroup,
         nest: bool,
+        ipv6_cidr: Optional[str] = None,
         **kwargs,
     ):
         self.parent = parent
         self.scope = cdk.NestedStack(self.parent, construct_id, **kwargs) if nest else self.parent
 
-        self.provision_efs(stack_name, cfg, vpc, security_group)
+        self.provision_efs(stack_name, cfg, vpc, security_group, ipv6_cidr)
         if cfg.backup.enable:
             self.provision_backup_vault(stack_name, cfg.backup)
 
-    def provision_efs(self, stack_name: str, cfg: config.EFS, vpc: ec2.Vpc, security_group: ec2.SecurityGroup):
+    def provision_efs(
+        self,
+        stack_name: str,
+        cfg: config.EFS,
+        vpc: ec2.Vpc,
+        security_group: ec2.SecurityGroup,
+        ipv6_cidr: Optional[str],
+    ):
         self.efs = efs.FileSystem(
             self.scope,
             "Efs",
@@ -47,6 +57,9 @@ class DominoEfsProvisioner:
             throughput_mode=efs.ThroughputMode.BURSTING,
             vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE),
         )
+        if ipv6_cidr:
+            # Pods of an IPv6 cluster mount from their IPv6 addresses
+            self.efs.connections.allow_default_port_from(ec2.Peer.ipv6(ipv6_cidr), "NFS from the VPC IPv6 CIDR")
 
         self.efs_access_point = self.efs.add_access_point(
             "access_point",
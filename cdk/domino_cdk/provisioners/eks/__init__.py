@@ -9,7 +9,14 @@ from aws_cdk.aws_s3 import Bucket
 from domino_cdk import config
 from domino_cdk.provisioners.eks.eks_cluster import DominoEksClusterProvisioner
 from domino_cdk.provisioners.eks.eks_iam import DominoEksIamProvisioner
+from domino_cdk.provisioners.eks.eks_karpenter import DominoEksKarpenterProvisioner
 from domino_cdk.provisioners.eks.eks_nodegroup import DominoEksNodegroupProvisioner
+from domino_cdk.provisioners.eks.eks_registry_cache import (
+    DominoEksRegistryCacheProvisioner,
+)
+from domino_cdk.provisioners.eks.eks_termination_handler import (
+    DominoEksTerminationHandlerProvisioner,
+)
 
 
 class DominoEksProvisioner:
@@ -21,6 +28,7 @@ class DominoEksProvisioner:
         eks_cfg: config.EKS,
         vpc: ec2.Vpc,
         private_subnet_name: str,
+        pod_subnets: List[ec2.ISubnet],
         bastion_sg: ec2.SecurityGroup,
         r53_zone_ids: List[str],
         nest: bool,
@@ -33,7 +41,8 @@ class DominoEksProvisioner:
 
         eks_version = eks.KubernetesVersion.of(eks_cfg.version)
 
-        self.cluster = DominoEksClusterProvisioner(self.scope).provision(
+        cluster_provisioner = DominoEksClusterProvisioner(self.scope)
+        self.cluster = cluster_provisioner.provision(
             stack_name,
             eks_version,
             eks_cfg.private_api,
@@ -41,14 +50,51 @@ class DominoEksProvisioner:
             vpc,
             bastion_sg,
             parent.cfg.tags,
+            eks_cfg.cni,
+            pod_subnets,
+            eks_cfg.dns,
+            eks_cfg.kube_proxy,
+            eks_cfg.control_plane_logging,
+            parent.cfg.vpc.ip_family,
+            parent.cfg.install.storage.block.kms_key_id if parent.cfg.install else None,
         )
         ng_role = DominoEksIamProvisioner(self.scope).provision(
-            stack_name, self.cluster.cluster_name, r53_zone_ids, buckets
+            stack_name, self.cluster.cluster_name, r53_zone_ids, buckets, parent.cfg.vpc.ip_family
         )
-        DominoEksNodegroupProvisioner(
-            self.scope, self.cluster, ng_role, stack_name, eks_cfg, eks_version, vpc, private_subnet_name, bastion_sg
+        nodegroup_provisioner = DominoEksNodegroupProvisioner(
+            self.scope,
+            self.cluster,
+            ng_role,
+            stack_name,
+            eks_cfg,
+            eks_version,
+            vpc,
+            private_subnet_name,
+            bastion_sg,
+            cluster_provisioner.eni_configs,
+            parent.cfg.vpc.ip_family,
         )
 
+        if eks_cfg.provisioner == "karpenter":
+            DominoEksKarpenterProvisioner(self.scope).provision(
+                stack_name, self.cluster, eks_cfg, ng_role, vpc, private_subnet_name
+            )
+
+        if eks_cfg.node_termination_handler and nodegroup_provisioner.unmanaged_asgs:
+            DominoEksTerminationHandlerProvisioner(self.scope).provision(
+                stack_name, self.cluster, nodegroup_provisioner.unmanaged_asgs
+            )
+
+        install_cfg = parent.cfg.install
+        if install_cfg is not None and install_cfg.registry_cache:
+            DominoEksRegistryCacheProvisioner(self.scope).provision(
+                stack_name,
+                install_cfg.registry_cache,
+                install_cfg.registry_username,
+                install_cfg.registry_password,
+                ng_role,
+            )
+
         cdk.CfnOutput(parent, "eks_cluster_name", value=self.cluster.cluster_name)
 
         region = cdk.Stack.of(self.scope).region
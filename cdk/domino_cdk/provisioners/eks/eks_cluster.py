@@ -1,15 +1,81 @@
 import re
-from typing import Dict
+from json import dumps as json_dumps
+from typing import Dict, List, Optional
 
 import aws_cdk.aws_ec2 as ec2
 import aws_cdk.aws_eks as eks
+import aws_cdk.aws_iam as iam
 import boto3
 from aws_cdk import core as cdk
 from aws_cdk.aws_kms import Key
 from aws_cdk.region_info import Fact, FactName
 
+from domino_cdk import config
+from domino_cdk.config.eks import CONTROL_PLANE_LOG_TYPES
+
 from ..lambda_utils import create_lambda
 
+CLUSTER_LOGGING_TYPES = {
+    "api": eks.ClusterLoggingTypes.API,
+    "audit": eks.ClusterLoggingTypes.AUDIT,
+    "authenticator": eks.ClusterLoggingTypes.AUTHENTICATOR,
+    "controllerManager": eks.ClusterLoggingTypes.CONTROLLER_MANAGER,
+    "scheduler": eks.ClusterLoggingTypes.SCHEDULER,
+}
+
+NODE_LOCAL_DNS_IMAGE = "registry.k8s.io/dns/k8s-dns-node-cache:1.23.1"
+
+# https://github.com/kubernetes/kubernetes/blob/master/cluster/addons/dns/nodelocaldns/nodelocaldns.yaml
+# node-cache fills in __PILLAR__CLUSTER__DNS__ (kube-dns-upstream) and __PILLAR__UPSTREAM__SERVERS__ itself
+NODE_LOCAL_DNS_COREFILE = """\
+cluster.local:53 {
+    errors
+    cache {
+        success 9984 30
+        denial 9984 5
+    }
+    reload
+    loop
+    bind __LOCAL_IPS__
+    forward . __PILLAR__CLUSTER__DNS__ {
+        force_tcp
+    }
+    prometheus :9253
+    health __LOCAL_DNS__:8080
+}
+in-addr.arpa:53 {
+    errors
+    cache 30
+    reload
+    loop
+    bind __LOCAL_IPS__
+    forward . __PILLAR__CLUSTER__DNS__ {
+        force_tcp
+    }
+    prometheus :9253
+}
+ip6.arpa:53 {
+    errors
+    cache 30
+    reload
+    loop
+    bind __LOCAL_IPS__
+    forward . __PILLAR__CLUSTER__DNS__ {
+        force_tcp
+    }
+    prometheus :9253
+}
+.:53 {
+    errors
+    cache 30
+    reload
+    loop
+    bind __LOCAL_IPS__
+    forward . __PILLAR__UPSTREAM__SERVERS__
+    prometheus :9253
+}
+"""
+
 
 class DominoEksClusterProvisioner:
     def __init__(
@@ -18,6 +84,7 @@ class DominoEksClusterProvisioner:
     ) -> None:
         self.scope = scope
         self._addon_cache = None
+        self.eni_configs: List[eks.KubernetesManifest] = []
 
     def provision(
         self,
@@ -28,6 +95,13 @@ class DominoEksClusterProvisioner:
         vpc: ec2.Vpc,
         bastion_sg: ec2.SecurityGroup,
         tags: Dict[str, str],
+        cni: config.CNI,
+        pod_subnets: List[ec2.ISubnet],
+        dns: config.DNS,
+        kube_proxy: config.KubeProxy,
+        control_plane_logging: List[str],
+        ip_family: str = "ipv4",
+        ebs_kms_key_arn: Optional[str] = None,
     ) -> eks.Cluster:
         partition = Fact.require_fact(self.scope.region, FactName.PARTITION)
 
@@ -78,9 +152,18 @@ class DominoEksClusterProvisioner:
             default_capacity=0,
             security_group=eks_sg,
             secrets_encryption_key=key,
+            cluster_logging=[CLUSTER_LOGGING_TYPES[t] for t in control_plane_logging] or None,
+            tags=tags,
             prune=False,  # https://github.com/aws/aws-cdk/issues/19843
         )
 
+        if ip_family == "ipv6":
+            # eks.Cluster has no IP family option in CDK v1, the cluster handler passes its config to CreateCluster
+            cluster_resource: cdk.CfnResource = (
+                cluster.node.find_child("Resource").node.find_child("Resource").node.default_child
+            )
+            cluster_resource.add_property_override("Config.kubernetesNetworkConfig.ipFamily", "ipv6")
+
         # To make sure log cleanup is called after cluster cleanup: cluster depends on custom so custom is guaranteed
         # to be created before the cluster and deleted after the cluster
         cluster.node.add_dependency(log_cleanup_lambda_resource)
@@ -100,7 +183,13 @@ class DominoEksClusterProvisioner:
                 "eks:TagResource",
                 "eks:UpdateClusterConfig",
             ],
-            properties={"cluster_name": cluster.cluster_name, "cluster_arn": cluster.cluster_arn, "tags": tags},
+            properties={
+                "cluster_name": cluster.cluster_name,
+                "cluster_arn": cluster.cluster_arn,
+                "tags": tags,
+                "control_plane_logging": control_plane_logging,
+                "control_plane_log_types": list(CONTROL_PLANE_LOG_TYPES),
+            },
         )
 
         if bastion_sg:
@@ -114,11 +203,24 @@ class DominoEksClusterProvisioner:
                 ),
             )
 
-        self.setup_addons(cluster, eks_version.version)
+        vpc_cni_addon = self.setup_addons(
+            cluster, eks_version.version, cni, dns, kube_proxy, ip_family, ebs_kms_key_arn
+        )
+        if cni.custom_networking:
+            self.setup_eni_configs(cluster, vpc_cni_addon, pod_subnets)
 
         return cluster
 
-    def setup_addons(self, cluster: eks.Cluster, eks_version: str) -> eks.CfnAddon:
+    def setup_addons(
+        self,
+        cluster: eks.Cluster,
+        eks_version: str,
+        cni: Optional[config.CNI] = None,
+        dns: Optional[config.DNS] = None,
+        kube_proxy: Optional[config.KubeProxy] = None,
+        ip_family: str = "ipv4",
+        ebs_kms_key_arn: Optional[str] = None,
+    ) -> eks.CfnAddon:
         def addon(addon: str) -> eks.CfnAddon:
             return eks.CfnAddon(
                 self.scope,
@@ -130,8 +232,27 @@ class DominoEksClusterProvisioner:
             )
 
         vpc_cni_addon = addon("vpc-cni")
-        addon("coredns")
-        addon("kube-proxy")
+        configuration = cni.addon_configuration() if cni else {}
+        if ip_family == "ipv6":
+            # Pods get addresses from IPv6 prefixes assigned to the node ENIs
+            env = {"ENABLE_IPv6": "true", "ENABLE_IPv4": "false", "ENABLE_PREFIX_DELEGATION": "true"}
+            configuration = {**configuration, "env": {**configuration.get("env", {}), **env}}
+        if configuration:
+            # CfnAddon predates addon configuration support in CDK v1
+            vpc_cni_addon.add_property_override("ConfigurationValues", json_dumps(configuration))
+        coredns_addon = addon("coredns")
+        if dns and (configuration := dns.addon_configuration()):
+            coredns_addon.add_property_override("ConfigurationValues", json_dumps(configuration))
+        kube_proxy_addon = addon("kube-proxy")
+        if kube_proxy and (configuration := kube_proxy.addon_configuration()):
+            kube_proxy_addon.add_property_override("ConfigurationValues", json_dumps(configuration))
+
+        # Provisions the volumes of the dominodisk storage class
+        ebs_csi_addon = addon("aws-ebs-csi-driver")
+        ebs_csi_addon.service_account_role_arn = self.setup_ebs_csi_role(cluster, ebs_kms_key_arn).role_arn
+
+        if dns and dns.node_local_cache:
+            self.setup_node_local_dns(cluster, coredns_addon, ipvs=bool(kube_proxy and kube_proxy.mode == "ipvs"))
 
         # Until https://github.com/aws/amazon-vpc-cni-k8s/issues/1291 is resolved
         patch = eks.KubernetesPatch(
@@ -146,6 +267,192 @@ class DominoEksClusterProvisioner:
 
         patch.node.add_dependency(vpc_cni_addon)
 
+        return vpc_cni_addon
+
+    def setup_ebs_csi_role(self, cluster: eks.Cluster, kms_key_arn: Optional[str]) -> iam.Role:
+        # IRSA role of the driver's controller service account, which the addon annotates
+        issuer = cluster.cluster_open_id_connect_issuer
+        conditions = cdk.CfnJson(
+            self.scope,
+            "EbsCsiOidcConditions",
+            value={
+                f"{issuer}:aud": "sts.amazonaws.com",
+                f"{issuer}:sub": "system:serviceaccount:kube-system:ebs-csi-controller-sa",
+            },
+        )
+        role = iam.Role(
+            self.scope,
+            "EbsCsiDriverRole",
+            assumed_by=iam.OpenIdConnectPrincipal(
+                cluster.open_id_connect_provider, conditions={"StringEquals": conditions}
+            ),
+            managed_policies=[iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AmazonEBSCSIDriverPolicy")],
+        )
+
+        if kms_key_arn:
+            # https://docs.aws.amazon.com/eks/latest/userguide/csi-iam-role.html
+            role.add_to_principal_policy(
+                iam.PolicyStatement(
+                    actions=["kms:CreateGrant", "kms:ListGrants", "kms:RevokeGrant"],
+                    resources=[kms_key_arn],
+                    conditions={"Bool": {"kms:GrantIsForAWSResource": "true"}},
+                )
+            )
+            role.add_to_principal_policy(
+                iam.PolicyStatement(
+                    actions=[
+                        "kms:Decrypt",
+                        "kms:DescribeKey",
+                        "kms:Encrypt",
+                        "kms:GenerateDataKey*",
+                        "kms:ReEncrypt*",
+                    ],
+                    resources=[kms_key_arn],
+                )
+            )
+
+        return role
+
+    def setup_eni_configs(self, cluster: eks.Cluster, vpc_cni_addon: eks.CfnAddon, pod_subnets: List[ec2.ISubnet]):
+        # With custom networking, the VPC CNI picks the ENIConfig named after the node's
+        # topology.kubernetes.io/zone label (ENI_CONFIG_LABEL_DEF), which kubelet sets on every node
+        for subnet in pod_subnets:
+            eni_config = cluster.add_manifest(
+                f"ENIConfig-{subnet.node.id}",
+                {
+                    "apiVersion": "crd.k8s.amazonaws.com/v1alpha1",
+                    "kind": "ENIConfig",
+                    "metadata": {"name": subnet.availability_zone},
+                    "spec": {
+                        "subnet": subnet.subnet_id,
+                        "securityGroups": [cluster.cluster_security_group_id],
+                    },
+                },
+            )
+            # The addon installs the ENIConfig CRD
+            eni_config.node.add_dependency(vpc_cni_addon)
+            self.eni_configs.append(eni_config)
+
+    def setup_node_local_dns(self, cluster: eks.Cluster, coredns_addon: eks.CfnAddon, ipvs: bool = False):
+        local_ips = [config.eks.NODE_LOCAL_DNS_IP]
+        kube_dns_ip = None
+        if not ipvs:
+            # The cache also takes over the kube-dns service address on each node, for pods whose kubelet
+            # still points there (ie managed AL2 nodegroups). IPVS binds that address to kube-ipvs0 itself.
+            kube_dns_ip = eks.KubernetesObjectValue(
+                self.scope,
+                "KubeDnsClusterIP",
+                cluster=cluster,
+                object_type="service",
+                object_name="kube-dns",
+                object_namespace="kube-system",
+                json_path=".spec.clusterIP",
+            )
+            kube_dns_ip.node.add_dependency(coredns_addon)
+            local_ips.append(kube_dns_ip.value)
+
+        labels = {"k8s-app": "node-local-dns"}
+        dns_ports = [
+            {"name": "dns", "port": 53, "protocol": "UDP"},
+            {"name": "dns-tcp", "port": 53, "protocol": "TCP"},
+        ]
+        manifest = cluster.add_manifest(
+            "NodeLocalDNS",
+            {
+                "apiVersion": "v1",
+                "kind": "ServiceAccount",
+                "metadata": {"name": "node-local-dns", "namespace": "kube-system"},
+            },
+            {
+                # Plain route to CoreDNS for cache misses, as kube-dns itself is answered by the cache
+                "apiVersion": "v1",
+                "kind": "Service",
+                "metadata": {
+                    "name": "kube-dns-upstream",
+                    "namespace": "kube-system",
+                    "labels": {"k8s-app": "kube-dns"},
+                },
+                "spec": {"ports": [{**p, "targetPort": 53} for p in dns_ports], "selector": {"k8s-app": "kube-dns"}},
+            },
+            {
+                "apiVersion": "v1",
+                "kind": "ConfigMap",
+                "metadata": {"name": "node-local-dns", "namespace": "kube-system"},
+                "data": {
+                    "Corefile": NODE_LOCAL_DNS_COREFILE.replace("__LOCAL_IPS__", " ".join(local_ips)).replace(
+                        "__LOCAL_DNS__", config.eks.NODE_LOCAL_DNS_IP
+                    )
+                },
+            },
+            {
+                "apiVersion": "apps/v1",
+                "kind": "DaemonSet",
+                "metadata": {"name": "node-local-dns", "namespace": "kube-system", "labels": labels},
+                "spec": {
+                    "updateStrategy": {"rollingUpdate": {"maxUnavailable": "10%"}},
+                    "selector": {"matchLabels": labels},
+                    "template": {
+                        "metadata": {"labels": labels, "annotations": {"prometheus.io/port": "9253"}},
+                        "spec": {
+                            "priorityClassName": "system-node-critical",
+                            "serviceAccountName": "node-local-dns",
+                            "hostNetwork": True,
+                            "dnsPolicy": "Default",
+                            "tolerations": [{"operator": "Exists"}],
+                            "containers": [
+                                {
+                                    "name": "node-cache",
+                                    "image": NODE_LOCAL_DNS_IMAGE,
+                                    "resources": {"requests": {"cpu": "25m", "memory": "5Mi"}},
+                                    "args": [
+                                        "-localip",
+                                        ",".join(local_ips),
+                                        "-conf",
+                                        "/etc/Corefile",
+                                        "-upstreamsvc",
+                                        "kube-dns-upstream",
+                                    ],
+                                    "securityContext": {"capabilities": {"add": ["NET_ADMIN"]}},
+                                    "ports": [
+                                        {"containerPort": 53, "name": "dns", "protocol": "UDP"},
+                                        {"containerPort": 53, "name": "dns-tcp", "protocol": "TCP"},
+                                        {"containerPort": 9253, "name": "metrics", "protocol": "TCP"},
+                                    ],
+                                    "livenessProbe": {
+                                        "httpGet": {
+                                            "host": config.eks.NODE_LOCAL_DNS_IP,
+                                            "path": "/health",
+                                            "port": 8080,
+                                        },
+                                        "initialDelaySeconds": 60,
+                                        "timeoutSeconds": 5,
+                                    },
+                                    "volumeMounts": [
+                                        {"mountPath": "/run/xtables.lock", "name": "xtables-lock"},
+                                        {"mountPath": "/etc/coredns", "name": "config-volume"},
+                                    ],
+                                }
+                            ],
+                            "volumes": [
+                                {
+                                    "name": "xtables-lock",
+                                    "hostPath": {"path": "/run/xtables.lock", "type": "FileOrCreate"},
+                                },
+                                {
+                                    "name": "config-volume",
+                                    "configMap": {
+                                        "name": "node-local-dns",
+                                        "items": [{"key": "Corefile", "path": "Corefile.base"}],
+                                    },
+                                },
+                            ],
+                        },
+                    },
+                },
+            },
+        )
+        manifest.node.add_dependency(kube_dns_ip or coredns_addon)
+
     def _get_addon_version(self, addon: str, eks_version: str):
         if not self._addon_cache:
             eks_client = boto3.client("eks", self.scope.region)
@@ -12,7 +12,14 @@ class DominoEksIamProvisioner:
     ) -> None:
         self.scope = scope
 
-    def provision(self, stack_name: str, cluster_name: str, r53_zone_ids: List[str], buckets: Dict[str, Bucket]):
+    def provision(
+        self,
+        stack_name: str,
+        cluster_name: str,
+        r53_zone_ids: List[str],
+        buckets: Dict[str, Bucket],
+        ip_family: str = "ipv4",
+    ):
         asg_group_statement = iam.PolicyStatement(
             actions=[
                 "autoscaling:DescribeAutoScalingInstances",
@@ -160,6 +167,12 @@ class DominoEksIamProvisioner:
             [ecr_policy.managed_policy_arn, autoscaler_policy.managed_policy_arn, snapshot_policy.managed_policy_arn]
         )
 
+        if ip_family == "ipv6":
+            # AmazonEKS_CNI_Policy only covers IPv4, and AWS has no managed IPv6 counterpart
+            cni_ipv6_policy = self.provision_cni_ipv6_policy(stack_name)
+            managed_policies.append(cni_ipv6_policy)
+            self.scope.untagged_resources["iam"].append(cni_ipv6_policy.managed_policy_arn)
+
         if r53_zone_ids:
             r53_policy = self.provision_r53_policy(stack_name, r53_zone_ids)
             managed_policies.append(r53_policy)
@@ -178,6 +191,30 @@ class DominoEksIamProvisioner:
             managed_policies=managed_policies,
         )
 
+    def provision_cni_ipv6_policy(self, stack_name: str) -> iam.ManagedPolicy:
+        # https://docs.aws.amazon.com/eks/latest/userguide/cni-iam-role.html#cni-iam-role-create-ipv6-policy
+        return iam.ManagedPolicy(
+            self.scope,
+            "cni-ipv6",
+            managed_policy_name=f"{stack_name}-cni-ipv6",
+            statements=[
+                iam.PolicyStatement(
+                    actions=[
+                        "ec2:AssignIpv6Addresses",
+                        "ec2:DescribeInstances",
+                        "ec2:DescribeTags",
+                        "ec2:DescribeNetworkInterfaces",
+                        "ec2:DescribeInstanceTypes",
+                    ],
+                    resources=["*"],
+                ),
+                iam.PolicyStatement(
+                    actions=["ec2:CreateTags"],
+                    resources=[f"arn:{cdk.Aws.PARTITION}:ec2:*:*:network-interface/*"],
+                ),
+            ],
+        )
+
     def provision_r53_policy(self, stack_name: str, r53_zone_ids: List[str]) -> iam.ManagedPolicy:
         return iam.ManagedPolicy(
             self.scope,
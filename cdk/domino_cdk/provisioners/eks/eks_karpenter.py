@@ -0,0 +1,273 @@
+from typing import Any, Dict, List
+
+import aws_cdk.aws_ec2 as ec2
+import aws_cdk.aws_eks as eks
+import aws_cdk.aws_events as events
+import aws_cdk.aws_iam as iam
+from aws_cdk import core as cdk
+
+from domino_cdk import config
+from domino_cdk.config.instance_types import INSTANCE_TYPES
+from domino_cdk.provisioners.eks.eks_nodegroup import (
+    BOTTLEROCKET_DATA_DEVICE,
+    KUBERNETES_ARCH,
+    bottlerocket_toml,
+    kernel_modules_script,
+    kubelet_config_script,
+    ssm_agent_script,
+)
+from domino_cdk.provisioners.eks.eks_termination_handler import interruption_queue
+
+KARPENTER_VERSION = "1.0.6"
+
+# Interruption events Karpenter cordons and replaces nodes on
+karpenter_event_patterns = {
+    "SpotInterruption": events.EventPattern(source=["aws.ec2"], detail_type=["EC2 Spot Instance Interruption Warning"]),
+    "Rebalance": events.EventPattern(source=["aws.ec2"], detail_type=["EC2 Instance Rebalance Recommendation"]),
+    "InstanceStateChange": events.EventPattern(
+        source=["aws.ec2"], detail_type=["EC2 Instance State-change Notification"]
+    ),
+    "ScheduledChange": events.EventPattern(source=["aws.health"], detail_type=["AWS Health Event"]),
+}
+
+# Karpenter's default Bottlerocket root volume size, the OS only
+BOTTLEROCKET_ROOT_SIZE = 4
+
+# Kubelet settings Karpenter manages itself, the rest are merged into kubelet-config.json by user data
+native_kubelet_settings = [
+    "max_pods",
+    "image_gc_high_threshold_percent",
+    "image_gc_low_threshold_percent",
+    "cluster_dns",
+]
+
+
+class DominoEksKarpenterProvisioner:
+    def __init__(
+        self,
+        scope: cdk.Construct,
+    ) -> None:
+        self.scope = scope
+
+    def provision(
+        self,
+        stack_name: str,
+        cluster: eks.Cluster,
+        eks_cfg: config.EKS,
+        ng_role: iam.Role,
+        vpc: ec2.Vpc,
+        private_subnet_name: str,
+    ) -> None:
+        region = cdk.Stack.of(self.scope).region
+        partition = cdk.Stack.of(self.scope).partition
+
+        queue = interruption_queue(
+            self.scope, "KarpenterInterruptionQueue", f"{stack_name}-karpenter", karpenter_event_patterns
+        )
+
+        # Nodes use the nodegroup role, which the managed nodegroups already map in aws-auth
+        instance_profile = iam.CfnInstanceProfile(
+            self.scope,
+            "KarpenterInstanceProfile",
+            instance_profile_name=f"{stack_name}-karpenter-node",
+            roles=[ng_role.role_name],
+        )
+
+        sa = cluster.add_service_account("KarpenterSA", name="karpenter", namespace="kube-system")
+        for statement in [
+            iam.PolicyStatement(
+                actions=[
+                    "ec2:CreateFleet",
+                    "ec2:CreateLaunchTemplate",
+                    "ec2:CreateTags",
+                    "ec2:DescribeAvailabilityZones",
+                    "ec2:DescribeImages",
+                    "ec2:DescribeInstances",
+                    "ec2:DescribeInstanceTypeOfferings",
+                    "ec2:DescribeInstanceTypes",
+                    "ec2:DescribeLaunchTemplates",
+                    "ec2:DescribeSecurityGroups",
+                    "ec2:DescribeSpotPriceHistory",
+                    "ec2:DescribeSubnets",
+                    "ec2:RunInstances",
+                    "iam:GetInstanceProfile",
+                    "pricing:GetProducts",
+                ],
+                resources=["*"],
+            ),
+            iam.PolicyStatement(
+                actions=["ec2:DeleteLaunchTemplate", "ec2:TerminateInstances"],
+                resources=["*"],
+                conditions={"StringLike": {"ec2:ResourceTag/karpenter.sh/nodepool": "*"}},
+            ),
+            iam.PolicyStatement(actions=["iam:PassRole"], resources=[ng_role.role_arn]),
+            iam.PolicyStatement(
+                actions=["ssm:GetParameter"], resources=[f"arn:{partition}:ssm:{region}::parameter/aws/service/*"]
+            ),
+            iam.PolicyStatement(actions=["eks:DescribeCluster"], resources=[cluster.cluster_arn]),
+            iam.PolicyStatement(
+                actions=["sqs:DeleteMessage", "sqs:GetQueueUrl", "sqs:ReceiveMessage"], resources=[queue.queue_arn]
+            ),
+        ]:
+            sa.add_to_principal_policy(statement)
+
+        chart = cluster.add_helm_chart(
+            "Karpenter",
+            chart="karpenter",
+            repository="oci://public.ecr.aws/karpenter/karpenter",
+            version=KARPENTER_VERSION,
+            namespace="kube-system",
+            values={
+                "settings": {
+                    "clusterName": cluster.cluster_name,
+                    "interruptionQueue": queue.queue_name,
+                },
+                "serviceAccount": {"create": False, "name": sa.service_account_name},
+            },
+        )
+        chart.node.add_dependency(sa)
+
+        subnets = vpc.select_subnets(subnet_group_name=private_subnet_name).subnets
+        for name, ng in eks_cfg.unmanaged_nodegroups.items():
+            manifest = cluster.add_manifest(
+                f"KarpenterNodePool{name}",
+                self._node_class(stack_name, name, ng, eks_cfg, instance_profile, cluster, subnets),
+                self._node_pool(name, ng, eks_cfg, subnets),
+            )
+            # The CRDs come with the chart
+            manifest.node.add_dependency(chart)
+
+    def _node_class(
+        self,
+        stack_name: str,
+        name: str,
+        ng: config.EKS.UnmanagedNodegroup,
+        eks_cfg: config.EKS,
+        instance_profile: iam.CfnInstanceProfile,
+        cluster: eks.Cluster,
+        subnets: List[ec2.ISubnet],
+    ) -> Dict[str, Any]:
+        kubelet = eks_cfg.kubelet_for(ng)
+        kubelet_config = kubelet.kubelet_config()
+        native_keys = [kubelet._config_keys[k] for k in native_kubelet_settings]
+
+        user_data = []
+        if ng.ami_family == "bottlerocket":
+            # Karpenter merges this with the cluster, label and taint settings it renders itself
+            user_data.append(
+                bottlerocket_toml(
+                    {
+                        "settings.kubernetes": {
+                            kubelet._bottlerocket_keys[k]: getattr(kubelet, k)
+                            for k in kubelet._bottlerocket_keys
+                            if k not in native_kubelet_settings and getattr(kubelet, k) is not None
+                        },
+                        "settings.host-containers.control": {"enabled": ng.ssm_agent},
+                    }
+                )
+            )
+        else:
+            if extra_kubelet_config := {k: v for k, v in kubelet_config.items() if k not in native_keys}:
+                user_data.append(kubelet_config_script(extra_kubelet_config))
+            if kernel_modules := eks_cfg.kube_proxy.kernel_modules():
+                user_data.append(kernel_modules_script(kernel_modules))
+            if ng.ssm_agent:
+                user_data.append(ssm_agent_script(ng.cpu_arch))
+        if ng.user_data:
+            user_data.append(ng.user_data)
+
+        block_devices = [("/dev/xvda", ng.disk_size)]
+        if ng.ami_family == "bottlerocket":
+            block_devices = [("/dev/xvda", BOTTLEROCKET_ROOT_SIZE), (BOTTLEROCKET_DATA_DEVICE, ng.disk_size)]
+
+        spec: Dict[str, Any] = {
+            "amiSelectorTerms": [{"alias": f"{ng.ami_family}@latest"}],
+            "instanceProfile": instance_profile.ref,
+            "subnetSelectorTerms": [{"id": subnet.subnet_id} for subnet in subnets],
+            "securityGroupSelectorTerms": [{"id": cluster.cluster_security_group_id}],
+            "blockDeviceMappings": [
+                {
+                    "deviceName": device_name,
+                    "ebs": {
+                        "volumeSize": f"{size}Gi",
+                        "volumeType": "gp3",
+                        "encrypted": True,
+                        "deleteOnTermination": True,
+                    },
+                }
+                for device_name, size in block_devices
+            ],
+            "metadataOptions": {
+                "httpEndpoint": "enabled",
+                "httpTokens": "required" if ng.imdsv2_required else "optional",
+                "httpPutResponseHopLimit": 2,
+            },
+            "tags": {**ng.tags, **eks_cfg.global_node_tags, "Name": f"{stack_name}-{name}"},
+        }
+        if native_kubelet := {k: v for k, v in kubelet_config.items() if k in native_keys}:
+            spec["kubelet"] = native_kubelet
+        if user_data:
+            spec["userData"] = "\n".join(user_data)
+
+        return {
+            "apiVersion": "karpenter.k8s.aws/v1",
+            "kind": "EC2NodeClass",
+            "metadata": {"name": name},
+            "spec": spec,
+        }
+
+    def _node_pool(
+        self,
+        name: str,
+        ng: config.EKS.UnmanagedNodegroup,
+        eks_cfg: config.EKS,
+        subnets: List[ec2.ISubnet],
+    ) -> Dict[str, Any]:
+        availability_zones = (
+            ng.availability_zones
+            or [az for az in dict.fromkeys(subnet.availability_zone for subnet in subnets)][: eks_cfg.max_nodegroup_azs]
+        )
+
+        capacity_types = ["on-demand"]
+        if ng.spot:
+            capacity_types = ["spot"]
+            if ng.spot_options and (
+                ng.spot_options.on_demand_base_capacity or ng.spot_options.on_demand_percentage_above_base_capacity
+            ):
+                capacity_types = ["spot", "on-demand"]
+
+        requirements = [
+            {"key": "node.kubernetes.io/instance-type", "operator": "In", "values": ng.resolved_instance_types},
+            {"key": "kubernetes.io/arch", "operator": "In", "values": [KUBERNETES_ARCH[ng.cpu_arch]]},
+            {"key": "karpenter.sh/capacity-type", "operator": "In", "values": capacity_types},
+            {"key": "topology.kubernetes.io/zone", "operator": "In", "values": availability_zones},
+        ]
+
+        taints = []
+        for key, value in ng.taints.items():
+            value, _, effect = value.rpartition(":")
+            taints.append({"key": key, "value": value, "effect": effect} if value else {"key": key, "effect": effect})
+
+        template_spec: Dict[str, Any] = {
+            "nodeClassRef": {"group": "karpenter.k8s.aws", "kind": "EC2NodeClass", "name": name},
+            "requirements": requirements,
+        }
+        if taints:
+            template_spec["taints"] = taints
+
+        spec: Dict[str, Any] = {
+            "template": {
+                "metadata": {"labels": {**ng.labels, **eks_cfg.global_node_labels}},
+                "spec": template_spec,
+            },
+        }
+        if all(it in INSTANCE_TYPES for it in ng.resolved_instance_types):
+            # The closest NodePool equivalent of max_size
+            spec["limits"] = {"cpu": ng.max_size * max(INSTANCE_TYPES[it].vcpu for it in ng.resolved_instance_types)}
+
+        return {
+            "apiVersion": "karpenter.sh/v1",
+            "kind": "NodePool",
+            "metadata": {"name": name},
+            "spec": spec,
+        }
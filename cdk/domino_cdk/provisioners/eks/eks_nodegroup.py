@@ -1,3 +1,4 @@
+from json import dumps as json_dumps
 from typing import Any, Dict, List, Optional, Union
 
 import aws_cdk.aws_ec2 as ec2
@@ -7,6 +8,114 @@ from aws_cdk import aws_autoscaling
 from aws_cdk import core as cdk
 
 from domino_cdk import config
+from domino_cdk.config.instance_types import INSTANCE_TYPES, max_pods
+
+from ..lambda_utils import create_lambda
+
+IMAGE_VOLUME_DEVICE = "/dev/xvdb"
+# Bottlerocket keeps its OS on a small root volume, and containers, images and logs on the data volume
+BOTTLEROCKET_DATA_DEVICE = "/dev/xvdb"
+
+# EC2 architecture names to the GOARCH-style names used by kubernetes.io/arch and release downloads
+KUBERNETES_ARCH = {"x86_64": "amd64", "arm64": "arm64"}
+
+# Lazy-loading snapshotters: release tarball (holding the grpc daemon), the socket it listens on and the
+# tarball's sha256 per arch, from the .sha256sum file published next to it. Nodes check their download
+# against the pinned sha256, so bump versions and checksums together.
+LAZY_LOADING_SNAPSHOTTERS: Dict[str, Dict[str, Any]] = {
+    "soci": {
+        "url": "https://github.com/awslabs/soci-snapshotter/releases/download/v0.4.0/soci-snapshotter-0.4.0-linux-{arch}.tar.gz",
+        "daemon": "soci-snapshotter-grpc",
+        "sha256": {"amd64": None, "arm64": None},
+    },
+    "stargz": {
+        "url": "https://github.com/containerd/stargz-snapshotter/releases/download/v0.14.3/stargz-snapshotter-v0.14.3-linux-{arch}.tar.gz",
+        "daemon": "containerd-stargz-grpc",
+        "sha256": {"amd64": None, "arm64": None},
+    },
+}
+
+
+def lazy_loading_script(image_lazy_loading: str, arch: str) -> str:
+    snapshotter = LAZY_LOADING_SNAPSHOTTERS[image_lazy_loading]
+    daemon = snapshotter["daemon"]
+    url = snapshotter["url"].format(arch=KUBERNETES_ARCH[arch])
+    if not (sha256 := snapshotter["sha256"][KUBERNETES_ARCH[arch]]):
+        raise ValueError(
+            f"No pinned sha256 of the {image_lazy_loading} snapshotter for {KUBERNETES_ARCH[arch]}, "
+            f"add the one of {url} to LAZY_LOADING_SNAPSHOTTERS"
+        )
+    # containerd is only pointed at the snapshotter once its verified daemon is in place, otherwise
+    # the node would join without being able to pull any image
+    return (
+        "SNAPSHOTTER_TARBALL=$(mktemp)\n"
+        f"if curl -fsSL --retry 5 --retry-delay 5 -o $SNAPSHOTTER_TARBALL {url} \\\n"
+        f'  && echo "{sha256}  $SNAPSHOTTER_TARBALL" | sha256sum -c - \\\n'
+        f"  && tar -xzf $SNAPSHOTTER_TARBALL -C /usr/local/bin {daemon}; then\n"
+        f"cat > /etc/systemd/system/{daemon}.service <<EOF\n"
+        "[Unit]\n"
+        f"Description={image_lazy_loading} lazy-loading snapshotter\n"
+        "Before=containerd.service\n"
+        "[Service]\n"
+        f"ExecStart=/usr/local/bin/{daemon}\n"
+        "Restart=always\n"
+        "[Install]\n"
+        "WantedBy=multi-user.target\n"
+        "EOF\n"
+        f"systemctl enable --now {daemon}.service\n"
+        "CONTAINERD_CONFIG=/etc/eks/containerd/containerd-config.toml\n"
+        "sed -i '/^\\[plugins.\"io.containerd.grpc.v1.cri\".containerd\\]$/a "
+        f"snapshotter = \"{image_lazy_loading}\"\\ndisable_snapshot_annotations = false' "
+        "$CONTAINERD_CONFIG\n"
+        "cat >> $CONTAINERD_CONFIG <<EOF\n"
+        f"[proxy_plugins.{image_lazy_loading}]\n"
+        'type = "snapshot"\n'
+        f'address = "/run/{daemon}/{daemon}.sock"\n'
+        "EOF\n"
+        "else\n"
+        f'echo "Could not download and verify the {image_lazy_loading} snapshotter, using the default one" >&2\n'
+        "fi\n"
+        "rm -f $SNAPSHOTTER_TARBALL"
+    )
+
+
+def kubelet_config_script(kubelet_config: Dict[str, Any]) -> str:
+    return (
+        'KUBELET_CONFIG=/etc/kubernetes/kubelet/kubelet-config.json\n'
+        f'echo "$(jq \'. + {json_dumps(kubelet_config)}\' $KUBELET_CONFIG)" > $KUBELET_CONFIG'
+    )
+
+
+def kernel_modules_script(modules: List[str]) -> str:
+    # Loaded now, and on every boot
+    return "\n".join(
+        [f"modprobe {module}" for module in modules]
+        + [f"echo {module} >> /etc/modules-load.d/kube-proxy.conf" for module in modules]
+    )
+
+
+def ssm_agent_script(arch: str) -> str:
+    return (
+        "yum install -y https://s3.amazonaws.com/ec2-downloads-windows/SSMAgent/latest/"
+        f"linux_{KUBERNETES_ARCH[arch]}/amazon-ssm-agent.rpm"
+    )
+
+
+def bottlerocket_toml(settings: Dict[str, Dict[str, Any]]) -> str:
+    """Bottlerocket user data from {table: {key: value}}, leaving out empty tables"""
+    lines = []
+    for table, values in settings.items():
+        if values:
+            lines.append(f"[{table}]")
+            lines += [f"{json_dumps(k)} = {json_dumps(v)}" for k, v in values.items()]
+    return "\n".join(lines)
+
+
+def bottlerocket_image(kubernetes_version: str, arch: str, gpu: bool) -> ec2.IMachineImage:
+    variant = f"aws-k8s-{kubernetes_version}{'-nvidia' if gpu else ''}"
+    return ec2.MachineImage.from_ssm_parameter(
+        f"/aws/service/bottlerocket/{variant}/{arch}/latest/image_id", os=ec2.OperatingSystemType.LINUX
+    )
 
 
 class DominoEksNodegroupProvisioner:
@@ -21,6 +130,8 @@ class DominoEksNodegroupProvisioner:
         vpc: ec2.Vpc,
         private_subnet_name: str,
         bastion_sg: ec2.SecurityGroup,
+        dependencies: List[cdk.IDependable] = None,
+        ip_family: str = "ipv4",
     ) -> None:
         self.scope = scope
         self.cluster = cluster
@@ -31,6 +142,12 @@ class DominoEksNodegroupProvisioner:
         self.vpc = vpc
         self.private_subnet_name = private_subnet_name
         self.bastion_sg = bastion_sg
+        # ie ENIConfigs, which must exist before nodes start their VPC CNI
+        self.dependencies = dependencies or []
+        self.ip_family = ip_family
+        self.unmanaged_asgs: List[aws_autoscaling.AutoScalingGroup] = []
+        # Nodegroup name to the properties of its ASG instance refresh (see asg_instance_refresh)
+        self.instance_refreshes: Dict[str, Dict[str, Any]] = {}
 
         max_nodegroup_azs = self.eks_cfg.max_nodegroup_azs
 
@@ -43,11 +160,44 @@ class DominoEksNodegroupProvisioner:
                         **self.eks_cfg.global_node_tags,
                         **{f"k8s.io/cluster-autoscaler/node-template/label/{k}": v for k, v in ng.labels.items()},
                         "k8s.io/cluster-autoscaler/node-template/resources/smarter-devices/fuse": "20",
+                        "k8s.io/cluster-autoscaler/node-template/label/kubernetes.io/arch": KUBERNETES_ARCH[
+                            ng.cpu_arch
+                        ],
+                        **{
+                            f"k8s.io/cluster-autoscaler/node-template/resources/{k}": v
+                            for k, v in self._node_template_resources(ng).items()
+                        },
                     }
                 prov_func(name, ng, max_nodegroup_azs)
 
         provision_nodegroup(self.eks_cfg.managed_nodegroups, self.provision_managed_nodegroup)
-        provision_nodegroup(self.eks_cfg.unmanaged_nodegroups, self.provision_unmanaged_nodegroup)
+        # With Karpenter, unmanaged nodegroups become NodePools instead (see eks_karpenter)
+        if self.eks_cfg.provisioner == "asg":
+            provision_nodegroup(self.eks_cfg.unmanaged_nodegroups, self.provision_unmanaged_nodegroup)
+            if self.instance_refreshes:
+                self._add_instance_refresh()
+
+    def _node_template_resources(self, ng: config.eks.T_NodegroupBase) -> Dict[str, str]:
+        # Lets the cluster-autoscaler size nodes of groups scaled to zero. With several instance types,
+        # the smallest of each resource is used so scale ups never count on capacity a node may lack.
+        instance_types = ng.resolved_instance_types
+        if not instance_types or any(it not in INSTANCE_TYPES for it in instance_types):
+            return {}
+        specs = [INSTANCE_TYPES[it] for it in instance_types]
+
+        cni = self.eks_cfg.cni
+        pods = self.eks_cfg.kubelet_for(ng).max_pods or min(
+            max_pods(it, cni.prefix_delegation, cni.custom_networking) for it in instance_types
+        )
+        resources = {
+            "cpu": str(min(spec.vcpu for spec in specs)),
+            "memory": f"{int(min(spec.memory_gib for spec in specs) * 1024)}Mi",
+            "ephemeral-storage": f"{ng.disk_size}Gi",
+            "pods": str(pods),
+        }
+        if gpus := min(spec.gpus for spec in specs):
+            resources["nvidia.com/gpu"] = str(gpus)
+        return resources
 
     def provision_managed_nodegroup(
         self, name: str, ng: config.eks.EKS.ManagedNodegroup, max_nodegroup_azs: int
@@ -56,7 +206,35 @@ class DominoEksNodegroupProvisioner:
         machine_image: Optional[ec2.IMachineImage] = (
             ec2.MachineImage.generic_linux({region: ng.ami_id}) if ng.ami_id else None
         )
-        mime_user_data: Optional[ec2.UserData] = self._handle_user_data(name, ng.ami_id, ng.ssm_agent, [ng.user_data])
+        ami_type = None
+        if ng.ami_family == "bottlerocket":
+            if any(INSTANCE_TYPES[it].gpus for it in ng.resolved_instance_types if it in INSTANCE_TYPES):
+                # There is no managed Bottlerocket NVIDIA AMI type here, so the image is set like a custom AMI
+                machine_image = bottlerocket_image(self.eks_version.version, ng.cpu_arch, True)
+            else:
+                ami_type = (
+                    eks.NodegroupAmiType.BOTTLEROCKET_ARM_64
+                    if ng.cpu_arch == "arm64"
+                    else eks.NodegroupAmiType.BOTTLEROCKET_X86_64
+                )
+            # EKS merges its own settings into the user data, unless the image is set
+            mime_user_data: Optional[ec2.UserData] = self._bottlerocket_user_data(
+                name, ng, cluster_settings=machine_image is not None
+            )
+        else:
+            # EKS picks the x86_64 AMI for launch templates without an image
+            if not ng.ami_id and ng.cpu_arch == "arm64":
+                ami_type = eks.NodegroupAmiType.AL2_ARM_64
+            mime_user_data = self._handle_user_data(
+                name,
+                ng.ami_id,
+                ng.ssm_agent,
+                ng.cpu_arch,
+                self.eks_cfg.kubelet_for(ng),
+                ng.image_snapshot_id,
+                ng.image_lazy_loading,
+                [ng.user_data],
+            )
 
         lt = self._launch_template(
             self.cluster,
@@ -71,10 +249,11 @@ class DominoEksNodegroupProvisioner:
         availability_zones = ng.availability_zones or self.vpc.availability_zones[:max_nodegroup_azs]
 
         for i, az in enumerate(availability_zones):
-            self.cluster.add_nodegroup_capacity(
+            nodegroup = self.cluster.add_nodegroup_capacity(
                 f"{self.stack_name}-{name}-{i}",
                 nodegroup_name=f"{self.stack_name}-{name}-{az}",
                 capacity_type=eks.CapacityType.SPOT if ng.spot else eks.CapacityType.ON_DEMAND,
+                ami_type=ami_type,
                 min_size=ng.min_size,
                 max_size=ng.max_size,
                 desired_size=ng.desired_size,
@@ -82,7 +261,7 @@ class DominoEksNodegroupProvisioner:
                     subnet_group_name=self.private_subnet_name,
                     availability_zones=[az],
                 ),
-                instance_types=[ec2.InstanceType(it) for it in ng.instance_types],
+                instance_types=[ec2.InstanceType(it) for it in ng.resolved_instance_types],
                 launch_template_spec=lts,
                 labels=ng.labels,
                 tags={
@@ -91,20 +270,19 @@ class DominoEksNodegroupProvisioner:
                 },
                 node_role=self.ng_role,
             )
+            if ng.max_unavailable or ng.max_unavailable_percentage:
+                cfn_nodegroup: eks.CfnNodegroup = nodegroup.node.default_child
+                cfn_nodegroup.update_config = eks.CfnNodegroup.UpdateConfigProperty(
+                    max_unavailable=ng.max_unavailable,
+                    max_unavailable_percentage=ng.max_unavailable_percentage,
+                )
+            if self.dependencies:
+                nodegroup.node.add_dependency(*self.dependencies)
 
     def provision_unmanaged_nodegroup(
         self, name: str, ng: config.eks.EKS.UnmanagedNodegroup, max_nodegroup_azs: int
     ) -> None:
-        region = cdk.Stack.of(self.scope).region
-        machine_image = (
-            ec2.MachineImage.generic_linux({region: ng.ami_id})
-            if ng.ami_id
-            else eks.EksOptimizedImage(
-                cpu_arch=eks.CpuArch.X86_64,
-                kubernetes_version=self.eks_version.version,
-                node_type=eks.NodeType.GPU if ng.gpu else eks.NodeType.STANDARD,
-            )
-        )
+        machine_image = self._unmanaged_machine_image(ng)
 
         if not ng.ami_id:
             ng.tags = {
@@ -134,6 +312,7 @@ class DominoEksNodegroupProvisioner:
 
         scope = cdk.Construct(self.scope, f"UnmanagedNodeGroup{name}")
         cfn_lt = None
+        asgs = []
         availability_zones = ng.availability_zones or self.vpc.availability_zones[:max_nodegroup_azs]
         for i, az in enumerate(availability_zones):
             indexed_name = f"{self.stack_name}-{name}-{az}"
@@ -141,7 +320,7 @@ class DominoEksNodegroupProvisioner:
                 scope,
                 f"{self.stack_name}-{name}-{i}",
                 auto_scaling_group_name=indexed_name,
-                instance_type=ec2.InstanceType(ng.instance_types[0]),
+                instance_type=ec2.InstanceType(ng.resolved_instance_types[0]),
                 machine_image=machine_image,
                 vpc=self.cluster.vpc,
                 min_capacity=ng.min_size,
@@ -153,6 +332,10 @@ class DominoEksNodegroupProvisioner:
                 role=self.ng_role,
                 security_group=self.unmanaged_sg,
             )
+            if self.dependencies:
+                asg.node.add_dependency(*self.dependencies)
+            self.unmanaged_asgs.append(asg)
+            asgs.append(asg)
             for k, v in (
                 {
                     **ng.tags,
@@ -167,7 +350,22 @@ class DominoEksNodegroupProvisioner:
             ).items():
                 cdk.Tags.of(asg).add(str(k), str(v), apply_to_launched_instances=True)
 
-            mime_user_data = self._handle_user_data(name, ng.ami_id, ng.ssm_agent, [ng.user_data, asg.user_data])
+            if ng.warm_pool:
+                self._add_warm_pool(asg, f"{self.stack_name}-{name}", az, ng.warm_pool)
+
+            if ng.ami_family == "bottlerocket":
+                mime_user_data = self._bottlerocket_user_data(name, ng, cluster_settings=True)
+            else:
+                mime_user_data = self._handle_user_data(
+                    name,
+                    ng.ami_id,
+                    ng.ssm_agent,
+                    ng.cpu_arch,
+                    self.eks_cfg.kubelet_for(ng),
+                    ng.image_snapshot_id,
+                    ng.image_lazy_loading,
+                    [ng.user_data, asg.user_data],
+                )
 
             if not cfn_lt:
                 lt = self._launch_template(
@@ -176,24 +374,17 @@ class DominoEksNodegroupProvisioner:
                     ng,
                     launch_template_name=indexed_name,
                     role=self.ng_role,
-                    instance_type=ec2.InstanceType(ng.instance_types[0]),
+                    instance_type=ec2.InstanceType(ng.resolved_instance_types[0]),
                     machine_image=machine_image,
                     user_data=mime_user_data,
                     security_group=self.unmanaged_sg,
                 )
                 # mimic adding the security group via the ASG during connect_auto_scaling_group_capacity
                 lt.connections.add_security_group(self.cluster.cluster_security_group)
+                if ng.efa:
+                    lt.connections.add_security_group(self._efa_security_group(scope, name))
                 cfn_lt: ec2.CfnLaunchTemplate = lt.node.default_child
-
-                http_tokens = "required" if ng.imdsv2_required else "optional"
-
-                lt_data = ec2.CfnLaunchTemplate.LaunchTemplateDataProperty(
-                    **cfn_lt.launch_template_data._values,
-                    metadata_options=ec2.CfnLaunchTemplate.MetadataOptionsProperty(
-                        http_endpoint="enabled", http_tokens=http_tokens, http_put_response_hop_limit=2
-                    ),
-                )
-                cfn_lt.launch_template_data = lt_data
+                cfn_lt.launch_template_data = self._unmanaged_launch_template_data(cfn_lt, ng)
 
             self.scope.untagged_resources["ec2"].append(cfn_lt.ref)
 
@@ -202,68 +393,396 @@ class DominoEksNodegroupProvisioner:
             # Remove the launch config from our stack
             asg.node.try_remove_child("LaunchConfig")
             cfn_asg.launch_configuration_name = None
-            # Attach the launch template to the auto scaling group
+            self._attach_launch_template(scope, i, cfn_asg, ng, cfn_lt, lt.version_number)
+
+            options: dict[str, Any] = {
+                # Bottlerocket user data already holds the cluster settings
+                "bootstrap_enabled": ng.ami_id is None
+                and ng.ami_family == "al2",
+            }
+            if options["bootstrap_enabled"]:
+                options["bootstrap_options"] = self._bootstrap_options(ng)
+
+            self.cluster.connect_auto_scaling_group_capacity(asg, **options)
+
+            if ng.warm_pool:
+                # Runs after bootstrap, for direct launches as well as instances leaving the warm pool
+                asg.user_data.add_commands("systemctl enable --now warm-pool-lifecycle.service")
+
+        if ng.instance_refresh and asgs:
+            self.instance_refreshes[name] = {
+                "asgs": asgs,
+                "launch_template_version": lt.version_number,
+                "preferences": ng.instance_refresh.preferences(),
+            }
+
+    def _unmanaged_machine_image(self, ng: config.eks.EKS.UnmanagedNodegroup) -> ec2.IMachineImage:
+        if ng.ami_id:
+            return ec2.MachineImage.generic_linux({cdk.Stack.of(self.scope).region: ng.ami_id})
+        if ng.ami_family == "bottlerocket":
+            return bottlerocket_image(self.eks_version.version, ng.cpu_arch, ng.gpu)
+        return eks.EksOptimizedImage(
+            cpu_arch=eks.CpuArch.ARM_64 if ng.cpu_arch == "arm64" else eks.CpuArch.X86_64,
+            kubernetes_version=self.eks_version.version,
+            node_type=eks.NodeType.GPU if ng.gpu else eks.NodeType.STANDARD,
+        )
+
+    def _unmanaged_launch_template_data(
+        self, cfn_lt: ec2.CfnLaunchTemplate, ng: config.eks.EKS.UnmanagedNodegroup
+    ) -> ec2.CfnLaunchTemplate.LaunchTemplateDataProperty:
+        http_tokens = "required" if ng.imdsv2_required else "optional"
+
+        lt_values = dict(cfn_lt.launch_template_data._values)
+        if ng.efa:
+            # Security groups move to the interface, launch templates can't set both
+            lt_values["network_interfaces"] = [
+                ec2.CfnLaunchTemplate.NetworkInterfaceProperty(
+                    device_index=0,
+                    interface_type="efa",
+                    groups=lt_values.pop("security_group_ids"),
+                    delete_on_termination=True,
+                )
+            ]
+
+        return ec2.CfnLaunchTemplate.LaunchTemplateDataProperty(
+            **lt_values,
+            metadata_options=ec2.CfnLaunchTemplate.MetadataOptionsProperty(
+                http_endpoint="enabled", http_tokens=http_tokens, http_put_response_hop_limit=2
+            ),
+            hibernation_options=ec2.CfnLaunchTemplate.HibernationOptionsProperty(configured=True)
+            if ng.warm_pool and ng.warm_pool.pool_state == "hibernated"
+            else None,
+        )
+
+    def _attach_launch_template(
+        self,
+        scope: cdk.Construct,
+        i: int,
+        cfn_asg: aws_autoscaling.CfnAutoScalingGroup,
+        ng: config.eks.EKS.UnmanagedNodegroup,
+        cfn_lt: ec2.CfnLaunchTemplate,
+        launch_template_version: str,
+    ) -> None:
+        if ng.placement_group:
+            # Cluster placement groups are limited to a single AZ, so each AZ's group gets its own
+            placement_group = ec2.CfnPlacementGroup(scope, f"PlacementGroup{i}", strategy=ng.placement_group)
+            cfn_asg.placement_group = placement_group.ref
+        # Attach the launch template to the auto scaling group
+        if ng.warm_pool:
+            # Warm pools don't support mixed instances policies
+            cfn_asg.launch_template = cfn_asg.LaunchTemplateSpecificationProperty(
+                launch_template_id=cfn_lt.ref,
+                version=launch_template_version,
+            )
+        else:
+            spot_options = ng.spot_options or config.EKS.UnmanagedNodegroup.SpotOptions.load({})
             cfn_asg.mixed_instances_policy = cfn_asg.MixedInstancesPolicyProperty(
                 launch_template=cfn_asg.LaunchTemplateProperty(
                     launch_template_specification=cfn_asg.LaunchTemplateSpecificationProperty(
                         launch_template_id=cfn_lt.ref,
-                        version=lt.version_number,
+                        version=launch_template_version,
                     ),
-                    overrides=[cfn_asg.LaunchTemplateOverridesProperty(instance_type=it) for it in ng.instance_types],
+                    overrides=[
+                        cfn_asg.LaunchTemplateOverridesProperty(instance_type=it) for it in ng.resolved_instance_types
+                    ],
                 ),
                 instances_distribution=cfn_asg.InstancesDistributionProperty(
-                    spot_allocation_strategy="capacity-optimized-prioritized",
-                    on_demand_percentage_above_base_capacity=0,  # all spot instances
-                    on_demand_base_capacity=0,
+                    spot_allocation_strategy=spot_options.allocation_strategy,
+                    on_demand_percentage_above_base_capacity=spot_options.on_demand_percentage_above_base_capacity,
+                    on_demand_base_capacity=spot_options.on_demand_base_capacity,
                 )
                 if ng.spot
                 else None,
             )
+            if ng.spot and spot_options.capacity_rebalance:
+                cfn_asg.capacity_rebalance = True
 
-            options: dict[str, Any] = {
-                "bootstrap_enabled": ng.ami_id is None,
-            }
-            if not ng.ami_id:
-                extra_args: list[str] = []
-                if labels := ng.labels:
-                    extra_args.append(
-                        "--node-labels={}".format(",".join(["{}={}".format(k, v) for k, v in labels.items()]))
-                    )
+    def _bootstrap_options(self, ng: config.eks.EKS.UnmanagedNodegroup) -> eks.BootstrapOptions:
+        region = cdk.Stack.of(self.scope).region
+        extra_args: list[str] = []
+        if labels := ng.labels:
+            extra_args.append("--node-labels={}".format(",".join(["{}={}".format(k, v) for k, v in labels.items()])))
 
-                if taints := ng.taints:
-                    extra_args.append(
-                        "--register-with-taints={}".format(",".join(["{}={}".format(k, v) for k, v in taints.items()]))
-                    )
-                options["bootstrap_options"] = eks.BootstrapOptions(kubelet_extra_args=" ".join(extra_args))
+        if taints := ng.taints:
+            extra_args.append(
+                "--register-with-taints={}".format(",".join(["{}={}".format(k, v) for k, v in taints.items()]))
+            )
+        bootstrap_options: Dict[str, Any] = {"kubelet_extra_args": " ".join(extra_args)}
+        kubelet = self.eks_cfg.kubelet_for(ng)
+        if kubelet.max_pods:
+            # bootstrap.sh would otherwise overwrite our maxPods with the ENI-based default
+            bootstrap_options["use_max_pods"] = False
+        if kubelet.cluster_dns:
+            # Same for clusterDNS, with the kube-dns address
+            bootstrap_options["dns_cluster_ip"] = kubelet.cluster_dns
+        additional_args = []
+        if ng.containerd_options and self.eks_cfg.version_tuple < (1, 24):
+            # Image snapshots and lazy loading are containerd features, older AMIs default to docker
+            additional_args.append("--container-runtime containerd")
+        if self.ip_family == "ipv6":
+            # bootstrap.sh needs the service CIDR for the kube-dns address, which EKS picks on creation
+            additional_args.append(
+                "--ip-family ipv6 --service-ipv6-cidr "
+                f"$(aws eks describe-cluster --region {region} --name {self.cluster.cluster_name} "
+                "--query cluster.kubernetesNetworkConfig.serviceIpv6Cidr --output text)"
+            )
+        if additional_args:
+            bootstrap_options["additional_args"] = " ".join(additional_args)
+        return eks.BootstrapOptions(**bootstrap_options)
+
+    def _add_instance_refresh(self):
+        # CloudFormation only points the ASGs at the new launch template version, existing instances
+        # are replaced by an instance refresh once the ASGs are updated.
+        stack = cdk.Stack.of(self.scope)
+        refresh = create_lambda(
+            scope=self.scope,
+            stack_name=self.stack_name,
+            name="asg_instance_refresh",
+            properties={
+                "stack_name": self.stack_name,
+                "nodegroups": {
+                    name: {
+                        "asg_names": [asg.auto_scaling_group_name for asg in r["asgs"]],
+                        "launch_template_version": r["launch_template_version"],
+                        "preferences": r["preferences"],
+                    }
+                    for name, r in self.instance_refreshes.items()
+                },
+            },
+            resources=[
+                f"arn:{stack.partition}:autoscaling:{stack.region}:{stack.account}:autoScalingGroup:*:"
+                f"autoScalingGroupName/{self.stack_name}-*"
+            ],
+            actions=[
+                "autoscaling:CancelInstanceRefresh",
+                "autoscaling:StartInstanceRefresh",
+            ],
+        )
+        for r in self.instance_refreshes.values():
+            refresh.node.add_dependency(*r["asgs"])
+
+    def _efa_security_group(self, scope: cdk.Construct, nodegroup_name: str) -> ec2.SecurityGroup:
+        # EFA traffic must be allowed in and out between all of the nodegroup's interfaces
+        efa_sg = ec2.SecurityGroup(
+            scope,
+            "EfaSG",
+            vpc=self.vpc,
+            security_group_name=f"{self.stack_name}-{nodegroup_name}-efa",
+            allow_all_outbound=False,
+        )
+        efa_sg.add_ingress_rule(efa_sg, ec2.Port.all_traffic(), "EFA traffic within the nodegroup")
+        efa_sg.add_egress_rule(efa_sg, ec2.Port.all_traffic(), "EFA traffic within the nodegroup")
+        return efa_sg
 
-            self.cluster.connect_auto_scaling_group_capacity(asg, **options)
+    def _add_warm_pool(
+        self,
+        asg: aws_autoscaling.AutoScalingGroup,
+        nodegroup_name: str,
+        az: str,
+        warm_pool: config.EKS.UnmanagedNodegroup.WarmPool,
+    ) -> None:
+        region = cdk.Stack.of(self.scope).region
+
+        if not hasattr(self, "lifecycle_action_statement"):
+            self.lifecycle_action_statement = iam.PolicyStatement(
+                actions=["autoscaling:CompleteLifecycleAction"],
+                resources=["*"],
+                conditions={"StringEquals": {"autoscaling:ResourceTag/eks:cluster-name": self.cluster.cluster_name}},
+            )
+            self.ng_role.add_to_principal_policy(self.lifecycle_action_statement)
+
+        asg.add_warm_pool(
+            min_size=warm_pool.min_size,
+            max_group_prepared_capacity=warm_pool.max_group_prepared_capacity,
+            pool_state=aws_autoscaling.PoolState[warm_pool.pool_state.upper()],
+            reuse_on_scale_in=warm_pool.reuse_on_scale_in,
+        )
+        # Holds instances in Pending:Wait (or Warmed:Pending:Wait) until user data completes the action
+        heartbeat_timeout = cdk.Duration.minutes(10)
+        asg.add_lifecycle_hook(
+            "LaunchingHook",
+            lifecycle_hook_name=f"{nodegroup_name}-{az}-launching",
+            lifecycle_transition=aws_autoscaling.LifecycleTransition.INSTANCE_LAUNCHING,
+            default_result=aws_autoscaling.DefaultResult.CONTINUE,
+            heartbeat_timeout=heartbeat_timeout,
+        )
+
+        imds = (
+            'imds() { local token=$(curl -s -X PUT http://169.254.169.254/latest/api/token -H "X-aws-ec2-metadata-token-ttl-seconds: 60"); '
+            'curl -s -H "X-aws-ec2-metadata-token: $token" http://169.254.169.254/latest/meta-data/$1; }'
+        )
+        complete_lifecycle_action = (
+            f"complete_lifecycle_action() {{ aws autoscaling complete-lifecycle-action --region {region} "
+            "--auto-scaling-group-name $ASG_NAME --lifecycle-hook-name $ASG_NAME-launching "
+            "--instance-id $(imds instance-id) --lifecycle-action-result ${1:-CONTINUE}; }"
+        )
+        # The launch template is shared by the nodegroup's per-AZ groups, so the group is found at runtime.
+        asg_name = f"ASG_NAME={nodegroup_name}-$(imds placement/availability-zone)"
+        # Waits stop at the hook's heartbeat timeout: the action is abandoned, which replaces the instance,
+        # and the script fails instead of holding the instance until the hook times out on its own.
+        heartbeat = f"HEARTBEAT_TIMEOUT={int(heartbeat_timeout.to_seconds())}"
+        give_up = (
+            'give_up() { echo "$1, abandoning the launching lifecycle action" >&2; '
+            "complete_lifecycle_action ABANDON; exit 1; }"
+        )
+        # Warmed instances may wait in the pool for any time, only an IMDS that stops answering ends the wait
+        wait_in_service = (
+            "wait_in_service() { local answered=$SECONDS state; while true; do "
+            "state=$(imds autoscaling/target-lifecycle-state); "
+            '[[ "$state" == InService ]] && return; '
+            '[[ -n "$state" ]] && answered=$SECONDS; '
+            '(( SECONDS - answered < HEARTBEAT_TIMEOUT )) || give_up "IMDS did not answer for ${HEARTBEAT_TIMEOUT}s"; '
+            "sleep 10; done; }"
+        )
+
+        # This runs ahead of the bootstrap script. Instances being warmed skip joining the cluster: stopped
+        # instances rerun this script from systemd on their next boot, while hibernated and running ones
+        # continue from the wait loop once they are put in service.
+        asg.user_data.add_commands(
+            imds,
+            asg_name,
+            complete_lifecycle_action,
+            heartbeat,
+            give_up,
+            wait_in_service,
+            'if [[ "$(imds autoscaling/target-lifecycle-state)" == Warmed:* ]]; then',
+            "cat > /etc/systemd/system/warm-pool-join.service <<EOF",
+            "[Unit]",
+            "Description=Join the EKS cluster when leaving the warm pool",
+            "Wants=network-online.target",
+            "After=network-online.target",
+            "[Service]",
+            "Type=oneshot",
+            'ExecStart=/bin/bash $(readlink -f "$0")',
+            "[Install]",
+            "WantedBy=multi-user.target",
+            "EOF",
+            "systemctl enable warm-pool-join.service",
+            "complete_lifecycle_action",
+            "wait_in_service",
+            "fi",
+            "systemctl disable warm-pool-join.service 2>/dev/null || true",
+            # Instances that already joined the cluster and return to the warm pool (reuse_on_scale_in) don't
+            # rerun user data when they leave it again. This service completes the launching action once the
+            # kubelet is up, on every boot as well as on resuming from hibernation. It is enabled after bootstrap.
+            "cat > /usr/local/bin/warm-pool-lifecycle.sh <<'EOF'",
+            "#!/bin/bash",
+            imds,
+            asg_name,
+            complete_lifecycle_action,
+            heartbeat,
+            give_up,
+            wait_in_service,
+            "while true; do",
+            "  wait_in_service",
+            "  deadline=$((SECONDS + HEARTBEAT_TIMEOUT))",
+            "  until systemctl is-active --quiet kubelet && output=$(complete_lifecycle_action 2>&1); do",
+            "    # Nothing to complete, ie the instance was rebooted while in service",
+            '    [[ "$output" == *"No active Lifecycle Action"* ]] && break',
+            '    (( SECONDS < deadline )) || give_up "The kubelet or the launching action did not complete in time"',
+            "    sleep 5",
+            "  done",
+            "  output=",
+            '  while [[ "$(imds autoscaling/target-lifecycle-state)" == InService ]]; do sleep 10; done',
+            "done",
+            "EOF",
+            "chmod +x /usr/local/bin/warm-pool-lifecycle.sh",
+            "cat > /etc/systemd/system/warm-pool-lifecycle.service <<EOF",
+            "[Unit]",
+            "Description=Complete the launching lifecycle action when leaving the warm pool",
+            "Wants=network-online.target",
+            "After=network-online.target kubelet.service",
+            "[Service]",
+            "ExecStart=/usr/local/bin/warm-pool-lifecycle.sh",
+            "Restart=always",
+            "RestartSec=10",
+            "[Install]",
+            "WantedBy=multi-user.target",
+            "EOF",
+        )
+
+    def _bottlerocket_user_data(
+        self, name: str, ng: config.eks.T_NodegroupBase, cluster_settings: bool
+    ) -> ec2.UserData:
+        kubernetes: Dict[str, Any] = {}
+        if cluster_settings:
+            kubernetes = {
+                "cluster-name": self.cluster.cluster_name,
+                "api-server": self.cluster.cluster_endpoint,
+                "cluster-certificate": self.cluster.cluster_certificate_authority_data,
+            }
+        settings = {
+            "settings.kubernetes": {**kubernetes, **self.eks_cfg.kubelet_for(ng).bottlerocket_settings()},
+            # Managed nodegroups get their labels from EKS
+            "settings.kubernetes.node-labels": ng.labels if isinstance(ng, config.EKS.UnmanagedNodegroup) else {},
+            "settings.kubernetes.node-taints": getattr(ng, "taints", {}),
+            "settings.host-containers.admin": {"enabled": bool(ng.key_name)},
+            "settings.host-containers.control": {"enabled": ng.ssm_agent},
+        }
+        user_data = bottlerocket_toml(settings)
+        if ng.user_data:
+            user_data += "\n" + cdk.Fn.sub(
+                ng.user_data,
+                {"NodegroupName": name, "StackName": self.stack_name, "ClusterName": self.cluster.cluster_name},
+            )
+        return ec2.UserData.custom(user_data)
 
     def _handle_user_data(
-        self, name: str, custom_ami: bool, ssm_agent: bool, user_data_list: List[Union[ec2.UserData, str]]
+        self,
+        name: str,
+        custom_ami: bool,
+        ssm_agent: bool,
+        arch: str,
+        kubelet: config.Kubelet,
+        image_snapshot_id: Optional[str],
+        image_lazy_loading: Optional[str],
+        user_data_list: List[Union[ec2.UserData, str]],
     ) -> Optional[ec2.UserData]:
         mime_user_data = ec2.MultipartUserData()
 
-        # If we are using default EKS image, tweak kubelet
         if not custom_ami:
-            mime_user_data.add_part(
-                ec2.MultipartBody.from_user_data(
-                    ec2.UserData.custom(
-                        'KUBELET_CONFIG=/etc/kubernetes/kubelet/kubelet-config.json\n'
-                        'echo "$(jq \'.eventRecordQPS=0\' $KUBELET_CONFIG)" > $KUBELET_CONFIG'
-                    )
-                ),
-            )
+            # If we are using default EKS image, tweak kubelet
+            if kubelet_config := kubelet.kubelet_config():
+                mime_user_data.add_part(
+                    ec2.MultipartBody.from_user_data(ec2.UserData.custom(kubelet_config_script(kubelet_config))),
+                )
 
-            # if not custom AMI, we can install ssm agent. If requested.
-            if ssm_agent:
+            if kernel_modules := self.eks_cfg.kube_proxy.kernel_modules():
+                mime_user_data.add_part(
+                    ec2.MultipartBody.from_user_data(ec2.UserData.custom(kernel_modules_script(kernel_modules))),
+                )
+
+            # Use the pre-pulled image volume (see _launch_template) as the containerd root. The filesystem
+            # type is detected on mount, snapshots may hold xfs or ext4.
+            if image_snapshot_id:
                 mime_user_data.add_part(
                     ec2.MultipartBody.from_user_data(
                         ec2.UserData.custom(
-                            "yum install -y https://s3.amazonaws.com/ec2-downloads-windows/SSMAgent/latest/linux_amd64/amazon-ssm-agent.rpm",
+                            f"while [ ! -e {IMAGE_VOLUME_DEVICE} ]; do sleep 1; done\n"
+                            "systemctl stop containerd\n"
+                            "mkdir -p /var/lib/containerd\n"
+                            f"echo '{IMAGE_VOLUME_DEVICE} /var/lib/containerd auto defaults,nofail 0 2' >> /etc/fstab\n"
+                            "mount /var/lib/containerd\n"
+                            "systemctl start containerd"
                         )
                     ),
                 )
 
+            # bootstrap.sh installs /etc/eks/containerd/containerd-config.toml as the containerd config,
+            # so the snapshotter is registered there and picked up when the node joins.
+            if image_lazy_loading:
+                mime_user_data.add_part(
+                    ec2.MultipartBody.from_user_data(
+                        ec2.UserData.custom(lazy_loading_script(image_lazy_loading, arch))
+                    ),
+                )
+
+            # if not custom AMI, we can install ssm agent. If requested.
+            if ssm_agent:
+                mime_user_data.add_part(
+                    ec2.MultipartBody.from_user_data(ec2.UserData.custom(ssm_agent_script(arch))),
+                )
+
         for ud in user_data_list:
             if isinstance(ud, str):
                 mime_user_data.add_part(
@@ -292,10 +811,11 @@ class DominoEksNodegroupProvisioner:
         }
 
         if not ng.ami_id:
-            root_device_name = "/dev/xvda"  # This only works for AL2
+            # disk_size goes to the AL2 root volume, or the Bottlerocket data volume
+            device_name = BOTTLEROCKET_DATA_DEVICE if ng.ami_family == "bottlerocket" else "/dev/xvda"
             opts["block_devices"] = [
                 ec2.BlockDevice(
-                    device_name=root_device_name,
+                    device_name=device_name,
                     volume=ec2.BlockDeviceVolume.ebs(
                         ng.disk_size,
                         delete_on_termination=True,
@@ -304,5 +824,16 @@ class DominoEksNodegroupProvisioner:
                     ),
                 )
             ]
+            if ng.image_snapshot_id:
+                opts["block_devices"].append(
+                    ec2.BlockDevice(
+                        device_name=IMAGE_VOLUME_DEVICE,
+                        volume=ec2.BlockDeviceVolume.ebs_from_snapshot(
+                            ng.image_snapshot_id,
+                            delete_on_termination=True,
+                            volume_type=ec2.EbsDeviceVolumeType.GP3,
+                        ),
+                    )
+                )
 
         return ec2.LaunchTemplate(scope, name, **{**opts, **kwargs})
@@ -0,0 +1,82 @@
+import json
+
+import aws_cdk.aws_ecr as ecr
+import aws_cdk.aws_iam as iam
+import aws_cdk.aws_secretsmanager as secretsmanager
+from aws_cdk import core as cdk
+
+UPSTREAM_REGISTRY = "quay.io"
+
+
+class DominoEksRegistryCacheProvisioner:
+    def __init__(
+        self,
+        scope: cdk.Construct,
+    ) -> None:
+        self.scope = scope
+
+    def provision(
+        self, stack_name: str, prefix: str, registry_username: str, registry_password: str, ng_role: iam.Role
+    ) -> ecr.CfnPullThroughCacheRule:
+        stack = cdk.Stack.of(self.scope)
+
+        # ECR only reads upstream credentials from secrets with this name prefix
+        secret = secretsmanager.CfnSecret(
+            self.scope,
+            "RegistryCacheCredentials",
+            name=f"ecr-pullthroughcache/{stack_name}-{prefix}",
+            secret_string=json.dumps({"username": registry_username, "password": registry_password}),
+        )
+
+        rule = ecr.CfnPullThroughCacheRule(
+            self.scope, "RegistryCache", ecr_repository_prefix=prefix, upstream_registry_url=UPSTREAM_REGISTRY
+        )
+        # Not in this version of the CloudFormation spec
+        rule.add_property_override("CredentialArn", secret.ref)
+
+        repositories = cdk.Arn.format(
+            cdk.ArnComponents(service="ecr", resource="repository", resource_name=f"{prefix}/*"), stack
+        )
+
+        # Nodes may only pull images of repositories tagged with the deploy id (see DominoEcrRestricted),
+        # so tag the repositories ECR creates on the first pull of an image.
+        template_role = iam.Role(
+            self.scope,
+            "RegistryCacheTemplateRole",
+            role_name=f"{stack_name}-registry-cache",
+            assumed_by=iam.ServicePrincipal("ecr.amazonaws.com"),
+            inline_policies={
+                "repositories": iam.PolicyDocument(
+                    statements=[
+                        iam.PolicyStatement(
+                            actions=["ecr:CreateRepository", "ecr:ReplicateImage", "ecr:TagResource"],
+                            resources=[repositories],
+                        )
+                    ]
+                )
+            },
+        )
+        template = cdk.CfnResource(
+            self.scope,
+            "RegistryCacheTemplate",
+            type="AWS::ECR::RepositoryCreationTemplate",
+            properties={
+                "Prefix": prefix,
+                "Description": f"{UPSTREAM_REGISTRY} pull-through cache of {stack_name}",
+                "AppliedFor": ["PULL_THROUGH_CACHE"],
+                "ImageTagMutability": "MUTABLE",
+                "ResourceTags": [{"Key": "domino-deploy-id", "Value": stack_name}],
+                "CustomRoleArn": template_role.role_arn,
+            },
+        )
+        rule.add_depends_on(template)
+
+        # Pulling an image that isn't cached yet creates its repository and imports it from upstream
+        ng_role.add_to_principal_policy(
+            iam.PolicyStatement(
+                actions=["ecr:BatchImportUpstreamImage", "ecr:CreateRepository"],
+                resources=[repositories],
+            )
+        )
+
+        return rule
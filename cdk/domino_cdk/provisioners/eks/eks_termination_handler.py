@@ -0,0 +1,111 @@
+from typing import Dict, List
+
+import aws_cdk.aws_eks as eks
+import aws_cdk.aws_events as events
+import aws_cdk.aws_iam as iam
+import aws_cdk.aws_sqs as sqs
+from aws_cdk import aws_autoscaling
+from aws_cdk import core as cdk
+
+NTH_CHART_VERSION = "0.21.0"
+NTH_MANAGED_TAG = "aws-node-termination-handler/managed"
+
+# Events aws-node-termination-handler drains nodes on in queue-processor mode
+nth_event_patterns = {
+    "ASGTerminate": events.EventPattern(
+        source=["aws.autoscaling"], detail_type=["EC2 Instance-terminate Lifecycle Action"]
+    ),
+    "SpotInterruption": events.EventPattern(source=["aws.ec2"], detail_type=["EC2 Spot Instance Interruption Warning"]),
+    "Rebalance": events.EventPattern(source=["aws.ec2"], detail_type=["EC2 Instance Rebalance Recommendation"]),
+    "InstanceStateChange": events.EventPattern(
+        source=["aws.ec2"], detail_type=["EC2 Instance State-change Notification"]
+    ),
+    "ScheduledChange": events.EventPattern(source=["aws.health"], detail_type=["AWS Health Event"]),
+}
+
+
+def interruption_queue(
+    scope: cdk.Construct, construct_id: str, queue_name: str, event_patterns: Dict[str, events.EventPattern]
+) -> sqs.Queue:
+    """SQS queue receiving the given EC2 interruption events, for a controller to act on"""
+    queue = sqs.Queue(scope, construct_id, queue_name=queue_name, retention_period=cdk.Duration.minutes(5))
+    queue.add_to_resource_policy(
+        iam.PolicyStatement(
+            principals=[iam.ServicePrincipal("events.amazonaws.com"), iam.ServicePrincipal("sqs.amazonaws.com")],
+            actions=["sqs:SendMessage"],
+            resources=[queue.queue_arn],
+        )
+    )
+
+    for name, pattern in event_patterns.items():
+        rule = events.Rule(scope, f"{construct_id}{name}Rule", event_pattern=pattern)
+        # Plain queue target, aws-events-targets isn't a dependency
+        cfn_rule: events.CfnRule = rule.node.default_child
+        cfn_rule.targets = [events.CfnRule.TargetProperty(arn=queue.queue_arn, id=construct_id)]
+
+    return queue
+
+
+class DominoEksTerminationHandlerProvisioner:
+    def __init__(
+        self,
+        scope: cdk.Construct,
+    ) -> None:
+        self.scope = scope
+
+    def provision(
+        self, stack_name: str, cluster: eks.Cluster, asgs: List[aws_autoscaling.AutoScalingGroup]
+    ) -> eks.HelmChart:
+        queue = interruption_queue(
+            self.scope,
+            "NodeTerminationHandlerQueue",
+            f"{stack_name}-node-termination-handler",
+            nth_event_patterns,
+        )
+
+        for asg in asgs:
+            # Holds terminating instances until the handler has drained them, or the timeout passes
+            asg.add_lifecycle_hook(
+                "TerminatingHook",
+                lifecycle_hook_name=f"{asg.node.id}-terminating",
+                lifecycle_transition=aws_autoscaling.LifecycleTransition.INSTANCE_TERMINATING,
+                default_result=aws_autoscaling.DefaultResult.CONTINUE,
+                heartbeat_timeout=cdk.Duration.minutes(5),
+            )
+            cdk.Tags.of(asg).add(NTH_MANAGED_TAG, "true", apply_to_launched_instances=True)
+
+        sa = cluster.add_service_account(
+            "NodeTerminationHandlerSA", name="aws-node-termination-handler", namespace="kube-system"
+        )
+        sa.add_to_principal_policy(
+            iam.PolicyStatement(
+                actions=[
+                    "autoscaling:CompleteLifecycleAction",
+                    "autoscaling:DescribeAutoScalingInstances",
+                    "autoscaling:DescribeTags",
+                    "ec2:DescribeInstances",
+                ],
+                resources=["*"],
+            )
+        )
+        sa.add_to_principal_policy(
+            iam.PolicyStatement(actions=["sqs:DeleteMessage", "sqs:ReceiveMessage"], resources=[queue.queue_arn])
+        )
+
+        chart = cluster.add_helm_chart(
+            "NodeTerminationHandler",
+            chart="aws-node-termination-handler",
+            repository="https://aws.github.io/eks-charts",
+            version=NTH_CHART_VERSION,
+            namespace="kube-system",
+            values={
+                "enableSqsTerminationDraining": True,
+                "queueURL": queue.queue_url,
+                "awsRegion": cdk.Stack.of(self.scope).region,
+                "checkTagBeforeDraining": True,
+                "managedTag": NTH_MANAGED_TAG,
+                "serviceAccount": {"create": False, "name": sa.service_account_name},
+            },
+        )
+        chart.node.add_dependency(sa)
+        return chart
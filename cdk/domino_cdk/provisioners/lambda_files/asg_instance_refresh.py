@@ -0,0 +1,76 @@
+import os
+import time
+import traceback
+
+import boto3
+import cfnresponse
+
+REMAINING_TIME_MARGIN_MS = 30000
+
+
+def on_event(event, context):
+    print('Debug: event: ', event)
+    print('Debug: environ:', os.environ)
+
+    request_type = event['RequestType']
+    stack_name = event['ResourceProperties']['stack_name']
+    physical_resource_id = f'domino-cluster-{stack_name}-asg-instance-refresh'
+    status = cfnresponse.FAILED
+
+    try:
+        if request_type == 'Update':
+            on_update(event, context)
+        status = cfnresponse.SUCCESS
+    except:  # noqa: E722
+        traceback.print_exc()
+
+    cfnresponse.send(event, context, status, {}, physical_resource_id)
+
+
+def on_update(event, context):
+    autoscaling_client = boto3.client('autoscaling')
+    old_nodegroups = event.get('OldResourceProperties', {}).get('nodegroups', {})
+
+    for name, ng in event['ResourceProperties']['nodegroups'].items():
+        old_version = old_nodegroups.get(name, {}).get('launch_template_version')
+        if old_version is None or old_version == ng['launch_template_version']:
+            # New nodegroups, or ones whose instances already run the current launch template
+            continue
+        print(f'Launch template of nodegroup {name} changed from version {old_version}')
+        for asg_name in ng['asg_names']:
+            start_instance_refresh(autoscaling_client, asg_name, convert_preferences(ng['preferences']), context)
+
+
+def convert_preferences(preferences):
+    # Custom resource properties arrive as strings
+    out = {}
+    for k, v in preferences.items():
+        if k == 'SkipMatching':
+            out[k] = v in [True, 'true']
+        elif k == 'CheckpointPercentages':
+            out[k] = [int(p) for p in v]
+        else:
+            out[k] = int(v)
+    return out
+
+
+def start_instance_refresh(autoscaling_client, asg_name, preferences, context):
+    # Leave time to report the failure to CloudFormation, which would otherwise wait for an hour
+    while context.get_remaining_time_in_millis() > REMAINING_TIME_MARGIN_MS:
+        try:
+            response = autoscaling_client.start_instance_refresh(
+                AutoScalingGroupName=asg_name,
+                Strategy='Rolling',
+                Preferences=preferences,
+            )
+            print(f'Started instance refresh {response["InstanceRefreshId"]} of {asg_name}')
+            return
+        except autoscaling_client.exceptions.InstanceRefreshInProgressFault:
+            # A refresh towards an older launch template, replace it
+            print(f'Cancel running instance refresh of {asg_name}')
+            try:
+                autoscaling_client.cancel_instance_refresh(AutoScalingGroupName=asg_name)
+            except autoscaling_client.exceptions.ActiveInstanceRefreshNotFoundFault:
+                pass
+            time.sleep(10)
+    raise Exception(f'Timed out cancelling the running instance refresh of {asg_name}')
@@ -37,34 +37,46 @@ def tag_cluster(event, eks_client):
 
 
 def on_update(event):
+    # The cluster is tagged and its logging set on creation, later changes only reach it here
     eks_client = boto3.client('eks')
     tag_cluster(event, eks_client)
+    old_logging = event.get('OldResourceProperties', {}).get('control_plane_logging')
+    if old_logging is not None and sorted(old_logging) != sorted(event['ResourceProperties']['control_plane_logging']):
+        update_logging(event, eks_client)
+    set_retention(event)
 
 
 def on_create(event):
-    logs_client = boto3.client('logs')
-    eks_client = boto3.client('eks')
-    cluster_name = event['ResourceProperties']['cluster_name']
+    # Logging and tags are set by the cluster resource itself
+    set_retention(event)
 
-    tag_cluster(event, eks_client)
 
-    print(f'Enable logging in cluster {cluster_name}')
+def update_logging(event, eks_client):
+    cluster_name = event['ResourceProperties']['cluster_name']
+    enabled = event['ResourceProperties']['control_plane_logging']
+    disabled = [t for t in event['ResourceProperties']['control_plane_log_types'] if t not in enabled]
+
+    print(f'Enable logging of {enabled} and disable logging of {disabled} in cluster {cluster_name}')
     try:
         eks_client.update_cluster_config(
             name=cluster_name,
             logging={
-                "clusterLogging": [
-                    {
-                        "enabled": True,
-                        "types": ["api", "audit", "authenticator", "controllerManager", "scheduler"],
-                    },
+                'clusterLogging': [
+                    {'enabled': state, 'types': types} for state, types in [(True, enabled), (False, disabled)] if types
                 ],
             },
         )
     except eks_client.exceptions.InvalidParameterException as e:
-        if "No changes needed for the logging config provided" not in e.response["Error"]["Message"]:
+        if 'No changes needed for the logging config provided' not in e.response['Error']['Message']:
             raise
 
+
+def set_retention(event):
+    if not event['ResourceProperties'].get('control_plane_logging'):
+        return
+
+    logs_client = boto3.client('logs')
+    cluster_name = event['ResourceProperties']['cluster_name']
     while not set_log_groups_retention(f'/aws/eks/{cluster_name}/cluster', logs_client):
         # No limit here. Wait till lambda timeout is reached
         time.sleep(30)
@@ -1,5 +1,4 @@
-from ipaddress import ip_network
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import aws_cdk.aws_ec2 as ec2
 import aws_cdk.aws_iam as iam
@@ -34,6 +33,8 @@ class DominoVpcProvisioner:
         # Note: "SubnetN" is automatically appended to these names by CDK
         self.public_subnet_name = f"{stack_name}-Public"
         self.private_subnet_name = f"{stack_name}-Private"
+        self.pod_subnets: List[ec2.ISubnet] = []
+        self.ipv6_cidr_block: Optional[str] = None
         if not vpc.create:
             self.vpc = ec2.Vpc.from_lookup(self.scope, vpc.id, vpc_id=vpc.id)
             return
@@ -59,7 +60,7 @@ class DominoVpcProvisioner:
             gateway_endpoints={
                 "S3": ec2.GatewayVpcEndpointOptions(service=ec2.GatewayVpcEndpointAwsService.S3),
             }
-            if vpc.endpoints
+            if "s3" in vpc.endpoints
             else {},
             nat_gateway_provider=nat_provider,
         )
@@ -106,9 +107,12 @@ class DominoVpcProvisioner:
         )
 
         # ripped off this: https://github.com/aws/aws-cdk/issues/9573
-        pod_cidr_block = ip_network("100.164.0.0/16")
-        pod_cidr_subnets = [str(x) for x in pod_cidr_block.subnets(prefixlen_diff=2)]
-        pod_cidr = ec2.CfnVPCCidrBlock(self.scope, "PodCidr", vpc_id=self.vpc.vpc_id, cidr_block=str(pod_cidr_block))
+        # The first block keeps the "PodCidr" id it had when the pod cidr was fixed
+        pod_cidrs = [
+            ec2.CfnVPCCidrBlock(self.scope, f"PodCidr{i or ''}", vpc_id=self.vpc.vpc_id, cidr_block=cidr)
+            for i, cidr in enumerate(vpc.pod_cidrs)
+        ]
+        pod_cidr_subnets = vpc.pod_subnet_cidrs(len(self.vpc.availability_zones))
         for c, az in enumerate(self.vpc.availability_zones):
             pod_subnet = ec2.PrivateSubnet(
                 self.scope,
@@ -122,7 +126,8 @@ class DominoVpcProvisioner:
             pod_subnet.add_default_nat_route(
                 [gw for gw in nat_provider.configured_gateways if gw.az == az][0].gateway_id
             )
-            pod_subnet.node.add_dependency(pod_cidr)
+            pod_subnet.node.add_dependency(*pod_cidrs)
+            self.pod_subnets.append(pod_subnet)
             # TODO: need to tag
 
         endpoint_sg = ec2.SecurityGroup(
@@ -132,33 +137,33 @@ class DominoVpcProvisioner:
             security_group_name=f"{stack_name}-endpoints",
         )
 
-        for ip_cidr in [self.vpc.vpc_cidr_block, str(pod_cidr_block)]:
+        peers = [ec2.Peer.ipv4(ip_cidr) for ip_cidr in [self.vpc.vpc_cidr_block, *vpc.pod_cidrs]]
+        if vpc.ip_family == "ipv6":
+            ipv6_cidr = self.provision_ipv6(stack_name)
+            peers.append(ec2.Peer.ipv6(self.ipv6_cidr_block))
+            endpoint_sg.node.add_dependency(ipv6_cidr)
+
+        for peer in peers:
             endpoint_sg.add_ingress_rule(
-                peer=ec2.Peer.ipv4(ip_cidr),
+                peer=peer,
                 connection=ec2.Port(
                     protocol=ec2.Protocol("TCP"),
-                    string_representation=f"HTTPS from {ip_cidr}",
+                    string_representation=f"HTTPS from {peer.unique_id}",
                     from_port=443,
                     to_port=443,
                 ),
             )
 
-        if vpc.endpoints:
-            for endpoint in [
-                "ec2",  # Only these first three have predefined consts
-                "sts",
-                "ecr.api",
-                "autoscaling",
-                "ecr.dkr",
-            ]:  # TODO: Do we need an s3 interface as well? or just the gateway?
-                self.vpc_endpoint = ec2.InterfaceVpcEndpoint(
-                    self.scope,
-                    f"{endpoint}-ENDPOINT",
-                    vpc=self.vpc,
-                    security_groups=[endpoint_sg],
-                    service=ec2.InterfaceVpcEndpointAwsService(endpoint, port=443),
-                    subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE),
-                )
+        # s3 is covered by the gateway endpoint above, which is free and needs no security group
+        for endpoint in [e for e in vpc.endpoints if e != "s3"]:
+            ec2.InterfaceVpcEndpoint(
+                self.scope,
+                f"{endpoint}-ENDPOINT",
+                vpc=self.vpc,
+                security_groups=[endpoint_sg],
+                service=ec2.InterfaceVpcEndpointAwsService(endpoint, port=443),
+                subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE),
+            )
 
         # TODO until https://github.com/aws/aws-cdk/issues/14194
         for idx, subnet_id in enumerate(self.vpc.select_subnets(subnet_type=ec2.SubnetType.PUBLIC).subnet_ids):
@@ -188,6 +193,36 @@ class DominoVpcProvisioner:
                 traffic_type=ec2.FlowLogTrafficType.REJECT,
             )
 
+    def provision_ipv6(self, stack_name: str) -> ec2.CfnVPCCidrBlock:
+        # CDK v1 VPCs are IPv4 only, so the IPv6 CIDR, subnet ranges and routes are added at the L1 level
+        ipv6_cidr = ec2.CfnVPCCidrBlock(
+            self.scope, "Ipv6Cidr", vpc_id=self.vpc.vpc_id, amazon_provided_ipv6_cidr_block=True
+        )
+        # Only resolvable once the CIDR block above is associated, users must depend on it
+        self.ipv6_cidr_block = cdk.Fn.select(0, self.vpc.vpc_ipv6_cidr_blocks)
+        subnet_cidrs = cdk.Fn.cidr(self.ipv6_cidr_block, 256, "64")
+
+        egress_only_igw = ec2.CfnEgressOnlyInternetGateway(self.scope, "EgressOnlyIGW", vpc_id=self.vpc.vpc_id)
+        cdk.Tags.of(egress_only_igw).add("Name", stack_name)
+
+        for i, subnet in enumerate([*self.vpc.public_subnets, *self.vpc.private_subnets]):
+            cfn_subnet: ec2.CfnSubnet = subnet.node.default_child
+            cfn_subnet.ipv6_cidr_block = cdk.Fn.select(i, subnet_cidrs)
+            cfn_subnet.assign_ipv6_address_on_creation = True
+            cfn_subnet.add_depends_on(ipv6_cidr)
+
+            # Public subnets route IPv6 through the internet gateway, private ones only allow outbound
+            public = i < len(self.vpc.public_subnets)
+            subnet.add_route(
+                "DefaultIpv6Route",
+                router_id=self.vpc.internet_gateway_id if public else egress_only_igw.ref,
+                router_type=ec2.RouterType.GATEWAY if public else ec2.RouterType.EGRESS_ONLY_INTERNET_GATEWAY,
+                destination_ipv6_cidr_block="::/0",
+                enables_internet_connectivity=public,
+            )
+
+        return ipv6_cidr
+
     def provision_bastion(self, name: str, bastion: config.VPC.Bastion) -> Optional[ec2.SecurityGroup]:
         if not bastion.enabled:
             return None
@@ -227,7 +262,7 @@ class DominoVpcProvisioner:
         for rule in bastion.ingress_ports:
             for ip_cidr in rule.ip_cidrs:
                 bastion_sg.add_ingress_rule(
-                    peer=ec2.Peer.ipv4(ip_cidr),
+                    peer=ec2.Peer.ipv6(ip_cidr) if ":" in ip_cidr else ec2.Peer.ipv4(ip_cidr),
                     connection=ec2.Port(
                         protocol=ec2.Protocol(rule.protocol),
                         string_representation=rule.name,
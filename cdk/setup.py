@@ -31,9 +31,12 @@ setuptools.setup(
         "aws-cdk.aws-ecr~=1.153.1",
         "aws-cdk.aws-efs~=1.153.1",
         "aws-cdk.aws-eks~=1.153.1",
+        "aws-cdk.aws-events~=1.153.1",
         "aws-cdk.aws-iam~=1.153.1",
         "aws-cdk.aws-lambda~=1.153.1",
         "aws-cdk.aws-s3~=1.153.1",
+        "aws-cdk.aws-secretsmanager~=1.153.1",
+        "aws-cdk.aws-sqs~=1.153.1",
         "aws-cdk.aws-stepfunctions-tasks~=1.153.1",
         "aws-cdk.core~=1.153.1",
         "aws-cdk.lambda-layer-awscli~=1.153.1",
@@ -2,17 +2,25 @@ import unittest
 from unittest.mock import patch
 
 from domino_cdk.config import (
+    CNI,
+    DNS,
     EFS,
     EKS,
     S3,
     VPC,
+    Autoscaler,
     DominoCDKConfig,
     IngressRule,
     Install,
+    Kubelet,
+    KubeProxy,
+    LoadBalancer,
     Route53,
+    Storage,
     config_loader,
 )
 from domino_cdk.config.template import config_template
+from domino_cdk.config.vpc import DEFAULT_ENDPOINTS, RECOMMENDED_ENDPOINTS
 
 default_config = DominoCDKConfig(
     name='domino',
@@ -25,7 +33,12 @@ default_config = DominoCDKConfig(
         hostname=None,
         registry_username=None,
         registry_password=None,
+        registry_cache=None,
         istio_compatible=False,
+        prepull_images=[],
+        autoscaler=Autoscaler.load(None),
+        load_balancer=LoadBalancer.load(None),
+        storage=Storage.load(None),
         overrides={},
     ),
     vpc=VPC(
@@ -33,11 +46,14 @@ default_config = DominoCDKConfig(
         create=True,
         cidr='10.0.0.0/16',
         public_cidr_mask=27,
+        pod_cidrs=["100.164.0.0/16"],
+        pod_cidr_mask=18,
         private_cidr_mask=19,
         availability_zones=[],
         max_azs=3,
         flow_logging=True,
-        endpoints=True,
+        endpoints=DEFAULT_ENDPOINTS,
+        ip_family="ipv4",
         bastion=VPC.Bastion(
             enabled=False,
             key_name=None,
@@ -79,9 +95,20 @@ default_config = DominoCDKConfig(
                 tags={},
                 gpu=False,
                 imdsv2_required=True,
+                warm_pool=None,
+                spot_options=None,
+                placement_group=None,
+                efa=False,
+                instance_refresh=None,
                 ssm_agent=True,
                 taints={},
                 spot=False,
+                kubelet=None,
+                image_snapshot_id=None,
+                image_lazy_loading=None,
+                arch=None,
+                instance_requirements=None,
+                ami_family="al2",
             ),
             'compute-0': EKS.UnmanagedNodegroup(
                 disk_size=1000,
@@ -96,9 +123,20 @@ default_config = DominoCDKConfig(
                 tags={},
                 gpu=False,
                 imdsv2_required=True,
+                warm_pool=None,
+                spot_options=None,
+                placement_group=None,
+                efa=False,
+                instance_refresh=None,
                 ssm_agent=True,
                 taints={},
                 spot=False,
+                kubelet=None,
+                image_snapshot_id=None,
+                image_lazy_loading=None,
+                arch=None,
+                instance_requirements=None,
+                ami_family="al2",
             ),
             'gpu-0': EKS.UnmanagedNodegroup(
                 disk_size=1000,
@@ -113,12 +151,30 @@ default_config = DominoCDKConfig(
                 tags={},
                 gpu=True,
                 imdsv2_required=True,
+                warm_pool=None,
+                spot_options=None,
+                placement_group=None,
+                efa=False,
+                instance_refresh=None,
                 ssm_agent=True,
                 taints={'nvidia.com/gpu': 'true:NoSchedule'},
                 spot=False,
+                kubelet=None,
+                image_snapshot_id=None,
+                image_lazy_loading=None,
+                arch=None,
+                instance_requirements=None,
+                ami_family="al2",
             ),
         },
         secrets_encryption_key_arn=None,
+        kubelet=Kubelet.default(),
+        cni=CNI.load({"custom_networking": True}),
+        node_termination_handler=False,
+        provisioner="asg",
+        dns=DNS.load(None),
+        kube_proxy=KubeProxy.load(None),
+        control_plane_logging=["api", "audit", "authenticator", "controllerManager", "scheduler"],
     ),
     s3=S3(
         buckets=S3.BucketList(
@@ -226,7 +282,12 @@ legacy_config = DominoCDKConfig(
         hostname=None,
         registry_username=None,
         registry_password=None,
+        registry_cache=None,
         istio_compatible=False,
+        prepull_images=[],
+        autoscaler=Autoscaler.load(None),
+        load_balancer=LoadBalancer.load(None),
+        storage=Storage.load(None),
         overrides={},
     ),
     vpc=VPC(
@@ -234,11 +295,14 @@ legacy_config = DominoCDKConfig(
         create=True,
         cidr='10.0.0.0/16',
         public_cidr_mask=24,
+        pod_cidrs=["100.164.0.0/16"],
+        pod_cidr_mask=18,
         private_cidr_mask=24,
         availability_zones=[],
         max_azs=3,
         flow_logging=False,
-        endpoints=True,
+        endpoints=DEFAULT_ENDPOINTS,
+        ip_family="ipv4",
         bastion=VPC.Bastion(
             enabled=False, key_name=None, instance_type=None, ingress_ports=None, ami_id=None, user_data=None
         ),
@@ -275,9 +339,20 @@ legacy_config = DominoCDKConfig(
                 tags={'dominodatalab.com/node-pool': 'platform'},
                 gpu=False,
                 imdsv2_required=False,
+                warm_pool=None,
+                spot_options=None,
+                placement_group=None,
+                efa=False,
+                instance_refresh=None,
                 ssm_agent=True,
                 taints={},
                 spot=False,
+                kubelet=None,
+                image_snapshot_id=None,
+                image_lazy_loading=None,
+                arch=None,
+                instance_requirements=None,
+                ami_family="al2",
             ),
             'compute-0': EKS.UnmanagedNodegroup(
                 disk_size=100,
@@ -292,9 +367,20 @@ legacy_config = DominoCDKConfig(
                 tags={'dominodatalab.com/node-pool': 'default', 'domino/build-node': 'true'},
                 gpu=False,
                 imdsv2_required=False,
+                warm_pool=None,
+                spot_options=None,
+                placement_group=None,
+                efa=False,
+                instance_refresh=None,
                 ssm_agent=True,
                 taints={},
                 spot=False,
+                kubelet=None,
+                image_snapshot_id=None,
+                image_lazy_loading=None,
+                arch=None,
+                instance_requirements=None,
+                ami_family="al2",
             ),
             'gpu-0': EKS.UnmanagedNodegroup(
                 disk_size=100,
@@ -309,12 +395,30 @@ legacy_config = DominoCDKConfig(
                 tags={'dominodatalab.com/node-pool': 'default-gpu'},
                 gpu=True,
                 imdsv2_required=False,
+                warm_pool=None,
+                spot_options=None,
+                placement_group=None,
+                efa=False,
+                instance_refresh=None,
                 ssm_agent=True,
                 taints={'nvidia.com/gpu': 'true:NoSchedule'},
                 spot=False,
+                kubelet=None,
+                image_snapshot_id=None,
+                image_lazy_loading=None,
+                arch=None,
+                instance_requirements=None,
+                ami_family="al2",
             ),
         },
         secrets_encryption_key_arn=None,
+        kubelet=Kubelet.default(),
+        cni=CNI.load(None),
+        node_termination_handler=False,
+        provisioner="asg",
+        dns=DNS.load(None),
+        kube_proxy=KubeProxy.load(None),
+        control_plane_logging=["api", "audit", "authenticator", "controllerManager", "scheduler"],
     ),
     s3=S3(
         buckets=S3.BucketList(
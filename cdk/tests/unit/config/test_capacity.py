@@ -0,0 +1,84 @@
+import unittest
+from copy import deepcopy
+from unittest.mock import patch
+
+from domino_cdk.config import CNI
+from domino_cdk.config.capacity import (
+    SubnetUsage,
+    check_capacity,
+    format_capacity_plan,
+    node_ip_demand,
+    plan_capacity,
+)
+from domino_cdk.config.template import config_template
+
+
+class TestConfigCapacity(unittest.TestCase):
+    def setUp(self):
+        self.cfg = config_template()
+
+    def test_node_ip_demand(self):
+        # 4 ENIs with 15 IPs each
+        self.assertEqual(node_ip_demand("m5.2xlarge", False, False), (60, 0))
+        self.assertEqual(node_ip_demand("m5.2xlarge", False, True), (1, 45))
+        # 110 max pods rounded up to /28 prefixes
+        self.assertEqual(node_ip_demand("m5.2xlarge", True, False), (116, 0))
+
+    def test_plan_capacity(self):
+        usages, notes = plan_capacity(self.cfg.vpc, self.cfg.eks)
+        self.assertEqual(notes, [])
+        # platform, compute: 10 * m5.2xlarge, gpu: 10 * p3.2xlarge
+        self.assertEqual(
+            usages[:2],
+            [SubnetUsage("az1", "private", 30, 8187), SubnetUsage("az1", "pod", 1350, 16379)],
+        )
+        self.assertEqual(len(usages), 6)
+
+        self.cfg.eks.cni = CNI.load(None)
+        self.cfg.vpc.private_cidr_mask = 24
+        self.cfg.vpc.availability_zones = ["us-west-2a", "us-west-2b"]
+        self.cfg.eks.unmanaged_nodegroups["gpu-0"].availability_zones = ["us-west-2b"]
+        usages, _ = plan_capacity(self.cfg.vpc, self.cfg.eks)
+        self.assertEqual(
+            usages,
+            [SubnetUsage("us-west-2a", "private", 1200, 251), SubnetUsage("us-west-2b", "private", 1800, 251)],
+        )
+        self.assertEqual(usages[0].headroom, -949)
+
+    def test_plan_capacity_notes(self):
+        self.cfg.eks.unmanaged_nodegroups["gpu-0"].instance_types = ["x9.mega"]
+        self.cfg.vpc.create = False
+        self.cfg.vpc.id = "vpc-123abc"
+
+        usages, notes = plan_capacity(self.cfg.vpc, self.cfg.eks)
+
+        self.assertEqual(usages, [])
+        self.assertEqual(
+            notes,
+            [
+                "Nodegroup gpu-0: instance types ['x9.mega'] are not in the embedded catalog, skipped",
+                "Using an existing VPC, subnet sizes are unknown",
+            ],
+        )
+
+    def test_format_capacity_plan(self):
+        self.assertEqual(
+            format_capacity_plan([SubnetUsage("az1", "private", 300, 251)], ["some note"]),
+            "AZ               Subnet     Demand Capacity Headroom\n"
+            "az1              private       300      251      -49\n"
+            "some note",
+        )
+
+    def test_check_capacity(self):
+        with patch("domino_cdk.config.capacity.log.warning") as warn:
+            check_capacity(self.cfg.vpc, self.cfg.eks)
+            warn.assert_not_called()
+
+        vpc = deepcopy(self.cfg.vpc)
+        vpc.pod_cidr_mask = 22
+        with patch("domino_cdk.config.capacity.log.warning") as warn:
+            check_capacity(vpc, self.cfg.eks)
+            warn.assert_called_with(
+                "Warning: Worst-case IP demand of nodegroups in az3 (1350) exceeds the pod subnet capacity (1019). "
+                "See `util.py capacity_plan`."
+            )
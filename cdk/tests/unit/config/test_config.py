@@ -7,6 +7,7 @@ from semantic_version import Version
 from domino_cdk import __version__
 from domino_cdk.config import config_loader
 from domino_cdk.config.template import config_template
+from domino_cdk.config.vpc import RECOMMENDED_ENDPOINTS
 
 from . import default_config, legacy_config, legacy_template
 
@@ -18,6 +19,10 @@ class TestConfig(unittest.TestCase):
         c = config_template()
         self.assertEqual(c, default_config)
 
+    def test_private_api_template_endpoints(self):
+        self.assertEqual(config_template(private_api=True).vpc.endpoints, RECOMMENDED_ENDPOINTS)
+        self.assertEqual(config_template(private_api=True, dev_defaults=True).vpc.endpoints, [])
+
     def test_round_trip_template(self):
         c = config_template()
         d = config_loader(c.render())
@@ -57,6 +62,35 @@ class TestConfig(unittest.TestCase):
         with self.assertRaisesRegex(ValueError, f"Invalid version string: '{suffixed_schema}'"):
             config_loader(c)
 
+    def test_custom_networking_existing_vpc(self):
+        c = config_template().render()
+        c["vpc"]["create"] = False
+        c["vpc"]["id"] = "vpc-123abc"
+        with self.assertRaisesRegex(ValueError, "eks.cni.custom_networking uses the pod subnets of a VPC created"):
+            config_loader(c)
+
+        c = config_template().render()
+        c["vpc"]["create"] = False
+        c["vpc"]["id"] = "vpc-123abc"
+        c["eks"]["cni"]["custom_networking"] = False
+        config_loader(c)
+
+    def test_ipv6(self):
+        c = config_template().render()
+        c["vpc"]["ip_family"] = "ipv6"
+        c["eks"]["dns"] = {"node_local_cache": True}
+        with self.assertRaisesRegex(
+            ValueError,
+            "eks.cni.custom_networking is not supported with vpc.ip_family ipv6\n"
+            "eks.dns.node_local_cache listens on an IPv4 address",
+        ):
+            config_loader(c)
+
+        c = config_template().render()
+        c["vpc"]["ip_family"] = "ipv6"
+        c["eks"]["cni"]["custom_networking"] = False
+        self.assertEqual(config_loader(c).vpc.ip_family, "ipv6")
+
     def test_eks_ng_az_mismatch(self):
         with patch("domino_cdk.config.DominoCDKConfig.get_vpc_azs") as get_vpc_azs:
             get_vpc_azs.return_value = ["us-west-2a", "us-west-2b", "us-west-2c"]
@@ -2,7 +2,7 @@ import unittest
 from copy import deepcopy
 from unittest.mock import patch
 
-from domino_cdk.config import EKS
+from domino_cdk.config import CNI, DNS, EKS, Kubelet, KubeProxy
 
 eks_0_0_0_cfg = {
     "version": "1.19",
@@ -73,7 +73,15 @@ managed_ngs = {
         labels={},
         tags={},
         spot=False,
+        kubelet=None,
+        image_snapshot_id=None,
+        image_lazy_loading=None,
+        arch=None,
+        instance_requirements=None,
+        ami_family="al2",
         desired_size=1,
+        max_unavailable=None,
+        max_unavailable_percentage=None,
     )
 }
 unmanaged_ngs = {
@@ -90,9 +98,20 @@ unmanaged_ngs = {
         tags={"dominodatalab.com/node-pool": "platform"},
         gpu=False,
         imdsv2_required=False,
+        warm_pool=None,
+        spot_options=None,
+        placement_group=None,
+        efa=False,
+        instance_refresh=None,
         ssm_agent=True,
         taints={},
         spot=False,
+        kubelet=None,
+        image_snapshot_id=None,
+        image_lazy_loading=None,
+        arch=None,
+        instance_requirements=None,
+        ami_family="al2",
     ),
     "nvidia": EKS.UnmanagedNodegroup(
         disk_size=100,
@@ -107,9 +126,20 @@ unmanaged_ngs = {
         tags={"dominodatalab.com/node-pool": "default-gpu"},
         gpu=True,
         imdsv2_required=False,
+        warm_pool=None,
+        spot_options=None,
+        placement_group=None,
+        efa=False,
+        instance_refresh=None,
         ssm_agent=False,
         taints={"nvidia.com/gpu": "true:NoSchedule"},
         spot=False,
+        kubelet=None,
+        image_snapshot_id=None,
+        image_lazy_loading=None,
+        arch=None,
+        instance_requirements=None,
+        ami_family="al2",
     ),
 }
 
@@ -122,6 +152,13 @@ eks_object = EKS(
     managed_nodegroups=managed_ngs,
     unmanaged_nodegroups=unmanaged_ngs,
     secrets_encryption_key_arn=None,
+    kubelet=Kubelet.default(),
+    cni=CNI.load(None),
+    node_termination_handler=False,
+    provisioner="asg",
+    dns=DNS.load(None),
+    kube_proxy=KubeProxy.load(None),
+    control_plane_logging=["api", "audit", "authenticator", "controllerManager", "scheduler"],
 )
 
 
@@ -328,6 +365,12 @@ class TestConfigEKS(unittest.TestCase):
         test_group_cfg["key_name"] = None
         test_group_cfg["ami_id"] = "ami-1234"
         test_group_cfg["user_data"] = "some-user-data"
+        test_group_cfg["kubelet"] = None
+        test_group_cfg["image_snapshot_id"] = None
+        test_group_cfg["image_lazy_loading"] = None
+        test_group_cfg["arch"] = None
+        test_group_cfg["instance_requirements"] = None
+        test_group_cfg["ami_family"] = "al2"
 
         expected_base_result = deepcopy(test_group_cfg)
         del expected_base_result["desired_size"]
@@ -337,3 +380,616 @@ class TestConfigEKS(unittest.TestCase):
         base_ng_dict = EKS.NodegroupBase.base_load(test_group_cfg)
         self.assertEqual(base_ng_dict, expected_base_result)
         self.assertEqual(test_group_cfg, {"desired_size": 1})
+
+    def test_kubelet(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["kubelet"] = {"event_record_qps": 0, "serialize_image_pulls": False, "kube_api_qps": 50}
+        eks_cfg["unmanaged_nodegroups"]["platform"]["kubelet"] = {"max_pods": 58, "kube_api_qps": 100}
+
+        with patch("domino_cdk.config.util.log.warning") as warn:
+            eks = EKS.from_0_0_1(eks_cfg)
+            warn.assert_not_called()
+
+        self.assertEqual(
+            eks.kubelet_for(eks.unmanaged_nodegroups["platform"]).kubelet_config(),
+            {"eventRecordQPS": 0, "maxPods": 58, "serializeImagePulls": False, "kubeAPIQPS": 100},
+        )
+        self.assertEqual(
+            eks.kubelet_for(eks.unmanaged_nodegroups["nvidia"]).kubelet_config(),
+            {"eventRecordQPS": 0, "serializeImagePulls": False, "kubeAPIQPS": 50},
+        )
+
+    def test_kubelet_default(self):
+        eks = EKS.from_0_0_1(deepcopy(eks_0_0_1_cfg))
+        self.assertEqual(eks.kubelet, Kubelet.default())
+        self.assertEqual(eks.kubelet_for(eks.managed_nodegroups["compute"]).kubelet_config(), {"eventRecordQPS": 0})
+
+    def test_kubelet_extra_args(self):
+        with patch("domino_cdk.config.util.log.warning") as warn:
+            Kubelet.load({"max_pods": 58, "extra_arg": "boing"})
+            warn.assert_called_with(
+                "Warning: Unused/unsupported kubelet attribute in config.eks.kubelet: ['extra_arg']"
+            )
+
+    def test_kubelet_validation(self):
+        for (kubelet, error) in [
+            ({"max_pods": 0}, "kubelet.max_pods must be greater than 0"),
+            ({"registry_burst": -1}, "kubelet.registry_burst must be a non-negative integer"),
+            ({"image_gc_high_threshold_percent": 101}, "kubelet.image_gc_high_threshold_percent must be a percentage"),
+            (
+                {"image_gc_high_threshold_percent": 80, "image_gc_low_threshold_percent": 85},
+                "kubelet.image_gc_low_threshold_percent \\(85\\) must be lower",
+            ),
+            ({"cpu_manager_policy": "dynamic"}, "kubelet.cpu_manager_policy must be none or static"),
+            ({"topology_manager_policy": "numa"}, "kubelet.topology_manager_policy must be none, best-effort"),
+        ]:
+            with self.assertRaisesRegex(ValueError, error):
+                Kubelet.load(kubelet)
+
+    def test_kubelet_max_pods_managed(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["managed_nodegroups"]["compute"]["kubelet"] = {"max_pods": 58}
+        with self.assertRaisesRegex(ValueError, "Managed nodegroup \\[compute\\] has kubelet max_pods set"):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["kubelet"] = {"max_pods": 58}
+        with self.assertRaisesRegex(ValueError, "Managed nodegroup \\[compute\\] has kubelet max_pods set"):
+            EKS.from_0_0_1(eks_cfg)
+
+    def test_kubelet_custom_ami(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["ami_id"] = "some-ami-id"
+        eks_cfg["unmanaged_nodegroups"]["platform"]["user_data"] = "my user data"
+        eks_cfg["unmanaged_nodegroups"]["platform"]["labels"] = {}
+        eks_cfg["unmanaged_nodegroups"]["platform"]["ssm_agent"] = False
+        eks_cfg["unmanaged_nodegroups"]["platform"]["disk_size"] = 0
+        eks_cfg["unmanaged_nodegroups"]["platform"]["kubelet"] = {"kube_api_qps": 50}
+        with self.assertRaisesRegex(
+            ValueError,
+            "Unmanaged nodegroup \\[platform\\]: kubelet cannot be applied when specifying a custom AMI",
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+    def test_cni(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["cni"] = {"prefix_delegation": True, "warm_prefix_target": 1, "minimum_ip_target": 16}
+        with patch("domino_cdk.config.util.log.warning") as warn:
+            eks = EKS.from_0_0_1(eks_cfg)
+            warn.assert_not_called()
+        self.assertEqual(
+            eks.cni,
+            CNI(
+                prefix_delegation=True,
+                warm_ip_target=None,
+                minimum_ip_target=16,
+                warm_prefix_target=1,
+                custom_networking=False,
+            ),
+        )
+        self.assertEqual(
+            eks.cni.addon_configuration(),
+            {
+                "env": {
+                    "ENABLE_PREFIX_DELEGATION": "true",
+                    "MINIMUM_IP_TARGET": "16",
+                    "WARM_PREFIX_TARGET": "1",
+                    "AWS_VPC_K8S_CNI_CUSTOM_NETWORK_CFG": "false",
+                }
+            },
+        )
+        self.assertEqual(
+            CNI.load(None).addon_configuration(),
+            {"env": {"ENABLE_PREFIX_DELEGATION": "false", "AWS_VPC_K8S_CNI_CUSTOM_NETWORK_CFG": "false"}},
+        )
+        self.assertEqual(
+            CNI.load({"warm_ip_target": 0, "minimum_ip_target": 0}).addon_configuration()["env"],
+            {
+                "ENABLE_PREFIX_DELEGATION": "false",
+                "WARM_IP_TARGET": "0",
+                "MINIMUM_IP_TARGET": "0",
+                "AWS_VPC_K8S_CNI_CUSTOM_NETWORK_CFG": "false",
+            },
+        )
+        self.assertEqual(
+            CNI.load({"custom_networking": True}).addon_configuration(),
+            {
+                "env": {
+                    "ENABLE_PREFIX_DELEGATION": "false",
+                    "AWS_VPC_K8S_CNI_CUSTOM_NETWORK_CFG": "true",
+                    "ENI_CONFIG_LABEL_DEF": "topology.kubernetes.io/zone",
+                }
+            },
+        )
+
+    def test_cni_validation(self):
+        with self.assertRaisesRegex(ValueError, "cni.warm_prefix_target requires prefix_delegation"):
+            CNI.load({"warm_prefix_target": 1})
+        with self.assertRaisesRegex(ValueError, "cni.warm_ip_target must be a non-negative integer, got: -1"):
+            CNI.load({"warm_ip_target": -1})
+
+    def test_dns(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["version"] = "1.27"
+        eks_cfg["dns"] = {"coredns_autoscaling": {"max_replicas": 20}, "node_local_cache": True}
+        eks_cfg["managed_nodegroups"]["bottlerocket"] = deepcopy(eks_cfg["managed_nodegroups"]["compute"])
+        eks_cfg["managed_nodegroups"]["bottlerocket"]["ami_family"] = "bottlerocket"
+        with patch("domino_cdk.config.util.log.warning") as warn:
+            eks = EKS.from_0_0_1(eks_cfg)
+            warn.assert_not_called()
+        self.assertEqual(
+            eks.dns,
+            DNS(
+                coredns_replicas=None,
+                coredns_autoscaling=DNS.Autoscaling(min_replicas=2, max_replicas=20),
+                node_local_cache=True,
+            ),
+        )
+        self.assertEqual(
+            eks.dns.addon_configuration(),
+            {"autoScaling": {"enabled": True, "minReplicas": 2, "maxReplicas": 20}},
+        )
+        self.assertEqual(DNS.load({"coredns_replicas": 4}).addon_configuration(), {"replicaCount": 4})
+        self.assertEqual(DNS.load(None).addon_configuration(), {})
+
+        self.assertEqual(eks.kubelet_for(eks.unmanaged_nodegroups["platform"]).cluster_dns, "169.254.20.10")
+        self.assertEqual(
+            eks.kubelet_for(eks.unmanaged_nodegroups["platform"]).kubelet_config()["clusterDNS"], ["169.254.20.10"]
+        )
+        self.assertEqual(
+            eks.kubelet_for(eks.managed_nodegroups["bottlerocket"]).bottlerocket_settings()["cluster-dns-ip"],
+            "169.254.20.10",
+        )
+        # EKS sets the cluster DNS on managed AL2 nodegroups
+        self.assertIsNone(eks.kubelet_for(eks.managed_nodegroups["compute"]).cluster_dns)
+
+    def test_dns_validation(self):
+        with self.assertRaisesRegex(
+            ValueError,
+            "dns.coredns_replicas must be a positive integer, got: 0.*"
+            "dns.coredns_replicas and dns.coredns_autoscaling are mutually exclusive.*"
+            "dns.coredns_autoscaling.min_replicas \\(5\\) must not exceed max_replicas \\(3\\)",
+        ):
+            DNS.load({"coredns_replicas": 0, "coredns_autoscaling": {"min_replicas": 5, "max_replicas": 3}})
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["dns"] = {"coredns_autoscaling": {}}
+        eks_cfg["managed_nodegroups"]["compute"]["kubelet"] = {"cluster_dns": "169.254.20.10"}
+        eks_cfg["unmanaged_nodegroups"]["platform"]["kubelet"] = {"cluster_dns": "local"}
+        with self.assertRaisesRegex(
+            ValueError,
+            "kubelet.cluster_dns must be an IPv4 address, got: local",
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["dns"] = {"coredns_autoscaling": {}}
+        eks_cfg["managed_nodegroups"]["compute"]["kubelet"] = {"cluster_dns": "169.254.20.10"}
+        with self.assertRaisesRegex(
+            ValueError,
+            "Managed nodegroup \\[compute\\] has kubelet cluster_dns set. EKS sets the cluster DNS on managed AL2 "
+            "nodegroups.*eks.dns.coredns_autoscaling requires Kubernetes 1.25 or later",
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+    def test_kube_proxy(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["kube_proxy"] = {"mode": "ipvs", "ipvs_scheduler": "lc"}
+        with patch("domino_cdk.config.util.log.warning") as warn:
+            eks = EKS.from_0_0_1(eks_cfg)
+            warn.assert_not_called()
+        self.assertEqual(eks.kube_proxy, KubeProxy(mode="ipvs", ipvs_scheduler="lc"))
+        self.assertEqual(eks.kube_proxy.addon_configuration(), {"mode": "ipvs", "ipvs": {"scheduler": "lc"}})
+        self.assertEqual(
+            eks.kube_proxy.kernel_modules(), ["ip_vs", "ip_vs_rr", "ip_vs_wrr", "ip_vs_sh", "ip_vs_lc", "nf_conntrack"]
+        )
+        self.assertEqual(KubeProxy.load({"mode": "ipvs"}).kernel_modules()[-1], "nf_conntrack")
+        self.assertEqual(KubeProxy.load(None).addon_configuration(), {})
+        self.assertEqual(KubeProxy.load(None).kernel_modules(), [])
+
+        with self.assertRaisesRegex(
+            ValueError,
+            "kube_proxy.mode must be one of iptables, ipvs, got: nftables.*"
+            "kube_proxy.ipvs_scheduler requires mode ipvs.*"
+            "kube_proxy.ipvs_scheduler must be one of rr, wrr, lc, wlc, lblc, lblcr, sh, dh, sed, nq, got: fifo",
+        ):
+            KubeProxy.load({"mode": "nftables", "ipvs_scheduler": "fifo"})
+
+    def test_control_plane_logging(self):
+        eks = EKS.from_0_0_1(deepcopy(eks_0_0_1_cfg))
+        self.assertEqual(eks.control_plane_logging, ["api", "audit", "authenticator", "controllerManager", "scheduler"])
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["control_plane_logging"] = []
+        self.assertEqual(EKS.from_0_0_1(eks_cfg).control_plane_logging, [])
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["control_plane_logging"] = ["api", "kubelet"]
+        with self.assertRaisesRegex(
+            ValueError,
+            "eks.control_plane_logging must only contain api, audit, authenticator, controllerManager, scheduler, "
+            "got: \\['kubelet'\\]",
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+    def test_cni_max_pods(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["instance_types"] = ["m5.2xlarge", "m5.large"]
+        eks_cfg["cni"] = {"prefix_delegation": True}
+        eks = EKS.from_0_0_1(eks_cfg)
+        self.assertEqual(eks.kubelet_for(eks.unmanaged_nodegroups["platform"]).max_pods, 110)
+        # Managed nodegroups get max pods from EKS
+        self.assertIsNone(eks.kubelet_for(eks.managed_nodegroups["compute"]).max_pods)
+
+        eks.cni = CNI.load({"custom_networking": True})
+        self.assertEqual(eks.kubelet_for(eks.unmanaged_nodegroups["platform"]).max_pods, 20)
+
+        eks.unmanaged_nodegroups["platform"].kubelet = Kubelet.load({"max_pods": 58})
+        self.assertEqual(eks.kubelet_for(eks.unmanaged_nodegroups["platform"]).max_pods, 58)
+
+        eks.cni = CNI.load(None)
+        eks.unmanaged_nodegroups["platform"].kubelet = None
+        self.assertIsNone(eks.kubelet_for(eks.unmanaged_nodegroups["platform"]).max_pods)
+
+    def test_image_snapshot(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["image_snapshot_id"] = "snap-123abc"
+        eks = EKS.from_0_0_1(eks_cfg)
+        self.assertEqual(eks.unmanaged_nodegroups["platform"].image_snapshot_id, "snap-123abc")
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["image_snapshot_id"] = "vol-123abc"
+        with self.assertRaisesRegex(
+            ValueError, "Unmanaged nodegroup \\[platform\\]: image_snapshot_id must be an EBS snapshot id"
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["ami_id"] = "some-ami-id"
+        eks_cfg["unmanaged_nodegroups"]["platform"]["user_data"] = "my user data"
+        eks_cfg["unmanaged_nodegroups"]["platform"]["labels"] = {}
+        eks_cfg["unmanaged_nodegroups"]["platform"]["ssm_agent"] = False
+        eks_cfg["unmanaged_nodegroups"]["platform"]["disk_size"] = 0
+        eks_cfg["unmanaged_nodegroups"]["platform"]["image_snapshot_id"] = "snap-123abc"
+        with self.assertRaisesRegex(
+            ValueError,
+            "Unmanaged nodegroup \\[platform\\]: image_snapshot_id cannot be applied when specifying a custom AMI",
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+    def test_image_snapshot_managed_containerd(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["managed_nodegroups"]["compute"]["image_snapshot_id"] = "snap-123abc"
+        with self.assertRaisesRegex(ValueError, "Managed nodegroup \\[compute\\] has image_snapshot_id set"):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["version"] = "1.24"
+        eks_cfg["managed_nodegroups"]["compute"]["image_snapshot_id"] = "snap-123abc"
+        eks = EKS.from_0_0_1(eks_cfg)
+        self.assertEqual(eks.managed_nodegroups["compute"].image_snapshot_id, "snap-123abc")
+
+    def test_image_lazy_loading(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["image_lazy_loading"] = "soci"
+        eks = EKS.from_0_0_1(eks_cfg)
+        self.assertEqual(eks.unmanaged_nodegroups["platform"].image_lazy_loading, "soci")
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["image_lazy_loading"] = "nydus"
+        with self.assertRaisesRegex(
+            ValueError, "Unmanaged nodegroup \\[platform\\]: image_lazy_loading must be one of soci, stargz"
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["managed_nodegroups"]["compute"]["image_lazy_loading"] = "stargz"
+        with self.assertRaisesRegex(ValueError, "Managed nodegroup \\[compute\\] has image_lazy_loading set"):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["ami_id"] = "some-ami-id"
+        eks_cfg["unmanaged_nodegroups"]["platform"]["user_data"] = "my user data"
+        eks_cfg["unmanaged_nodegroups"]["platform"]["labels"] = {}
+        eks_cfg["unmanaged_nodegroups"]["platform"]["ssm_agent"] = False
+        eks_cfg["unmanaged_nodegroups"]["platform"]["disk_size"] = 0
+        eks_cfg["unmanaged_nodegroups"]["platform"]["image_lazy_loading"] = "soci"
+        with self.assertRaisesRegex(
+            ValueError,
+            "Unmanaged nodegroup \\[platform\\]: image_lazy_loading cannot be applied when specifying a custom AMI",
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+    def test_arch(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["instance_types"] = ["m7g.2xlarge", "r7g.2xlarge"]
+        eks_cfg["managed_nodegroups"]["compute"]["arch"] = "arm64"
+        eks_cfg["managed_nodegroups"]["compute"]["instance_types"] = ["x9.mega"]
+        eks = EKS.from_0_0_1(eks_cfg)
+        self.assertEqual(eks.unmanaged_nodegroups["platform"].arch, None)
+        self.assertEqual(eks.unmanaged_nodegroups["platform"].cpu_arch, "arm64")
+        self.assertEqual(eks.managed_nodegroups["compute"].cpu_arch, "arm64")
+        self.assertEqual(eks.unmanaged_nodegroups["nvidia"].cpu_arch, "x86_64")
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["instance_types"] = ["m5.2xlarge", "m7g.2xlarge"]
+        with self.assertRaisesRegex(
+            ValueError, "Unmanaged nodegroup \\[platform\\]: instance_types mix CPU architectures \\(arm64, x86_64\\)"
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["managed_nodegroups"]["compute"]["arch"] = "arm64"
+        eks_cfg["managed_nodegroups"]["compute"]["instance_types"] = ["m5.2xlarge"]
+        with self.assertRaisesRegex(
+            ValueError, "Managed nodegroup \\[compute\\]: arch is arm64, but instance_types are x86_64"
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["managed_nodegroups"]["compute"]["arch"] = "aarch64"
+        with self.assertRaisesRegex(
+            ValueError, "Managed nodegroup \\[compute\\]: arch must be one of x86_64, arm64, got: aarch64"
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["arch"] = "arm64"
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["instance_types"] = ["g5g.2xlarge"]
+        with self.assertRaisesRegex(
+            ValueError, "Unmanaged nodegroup \\[nvidia\\]: gpu requires x86_64 instance types with the default EKS AMI"
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+    def test_instance_requirements(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["instance_requirements"] = {"vcpu": 8, "memory_gib": 32}
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["instance_requirements"] = {"vcpu": 8, "memory_gib": 32, "gpus": 1}
+        eks_cfg["managed_nodegroups"]["compute"]["instance_types"] = []
+        eks_cfg["managed_nodegroups"]["compute"]["arch"] = "arm64"
+        eks_cfg["managed_nodegroups"]["compute"]["instance_requirements"] = {
+            "vcpu": 4,
+            "memory_gib": 16,
+            "max_types": 3,
+        }
+        eks = EKS.from_0_0_1(eks_cfg)
+
+        platform = eks.unmanaged_nodegroups["platform"]
+        self.assertEqual(platform.instance_types, ["m5.2xlarge"])
+        self.assertEqual(
+            platform.resolved_instance_types[:6],
+            ["m5.2xlarge", "m7i.2xlarge", "m6a.2xlarge", "m6i.2xlarge", "m5a.2xlarge", "m5d.2xlarge"],
+        )
+        self.assertEqual(platform.resolved_instance_types[6], "r7i.2xlarge")
+        self.assertEqual(len(platform.resolved_instance_types), 12)
+        self.assertEqual(
+            eks.unmanaged_nodegroups["nvidia"].resolved_instance_types, ["p3.2xlarge", "g5.2xlarge", "g4dn.2xlarge"]
+        )
+        self.assertEqual(
+            eks.managed_nodegroups["compute"].resolved_instance_types, ["m7g.xlarge", "m6g.xlarge", "r7g.xlarge"]
+        )
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["managed_nodegroups"]["compute"]["instance_types"] = []
+        eks_cfg["managed_nodegroups"]["compute"]["instance_requirements"] = {"vcpu": 3, "memory_gib": 16}
+        with self.assertRaisesRegex(ValueError, "Managed nodegroup \\[compute\\]: no instance types"):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["managed_nodegroups"]["compute"]["instance_requirements"] = {"vcpu": 0, "memory_gib": 16}
+        with self.assertRaisesRegex(ValueError, "instance_requirements.vcpu must be an integer >= 1, got: 0"):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["instance_requirements"] = {"vcpu": 8, "memory_gib": 32}
+        eks_cfg["unmanaged_nodegroups"]["platform"]["warm_pool"] = {"min_size": 1}
+        with self.assertRaisesRegex(ValueError, "warm_pool requires on-demand instances of a single instance type"):
+            EKS.from_0_0_1(eks_cfg)
+
+    def test_spot_options(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["node_termination_handler"] = True
+        eks_cfg["unmanaged_nodegroups"]["platform"]["spot"] = True
+        eks_cfg["unmanaged_nodegroups"]["platform"]["spot_options"] = {
+            "on_demand_base_capacity": 1,
+            "allocation_strategy": "price-capacity-optimized",
+            "capacity_rebalance": True,
+        }
+        with patch("domino_cdk.config.util.log.warning") as warn:
+            eks = EKS.from_0_0_1(eks_cfg)
+            warn.assert_not_called()
+        self.assertTrue(eks.node_termination_handler)
+        self.assertEqual(
+            eks.unmanaged_nodegroups["platform"].spot_options,
+            EKS.UnmanagedNodegroup.SpotOptions(
+                on_demand_base_capacity=1,
+                on_demand_percentage_above_base_capacity=0,
+                allocation_strategy="price-capacity-optimized",
+                capacity_rebalance=True,
+            ),
+        )
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["spot_options"] = {"capacity_rebalance": True}
+        with self.assertRaisesRegex(ValueError, "Unmanaged nodegroup \\[platform\\]: spot_options requires spot: true"):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["spot"] = True
+        eks_cfg["unmanaged_nodegroups"]["platform"]["spot_options"] = {
+            "on_demand_percentage_above_base_capacity": 120,
+            "allocation_strategy": "cheapest",
+        }
+        with self.assertRaisesRegex(
+            ValueError,
+            "on_demand_percentage_above_base_capacity must be a percentage \\(0-100\\), got: 120.*"
+            "allocation_strategy must be one of lowest-price, capacity-optimized, capacity-optimized-prioritized, "
+            "price-capacity-optimized, got: cheapest",
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+    def test_placement_group_efa(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["instance_types"] = ["p4d.24xlarge", "x9.mega"]
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["placement_group"] = "cluster"
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["efa"] = True
+        eks = EKS.from_0_0_1(eks_cfg)
+        self.assertEqual(eks.unmanaged_nodegroups["nvidia"].placement_group, "cluster")
+        self.assertTrue(eks.unmanaged_nodegroups["nvidia"].efa)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["instance_types"] = ["p4d.24xlarge", "p3.2xlarge"]
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["placement_group"] = "tight"
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["efa"] = True
+        with self.assertRaisesRegex(
+            ValueError,
+            "Unmanaged nodegroup \\[nvidia\\]: placement_group must be one of cluster, partition, spread, got: tight.*"
+            "Unmanaged nodegroup \\[nvidia\\]: efa is not supported by instance types p3.2xlarge",
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["placement_group"] = "spread"
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["max_size"] = 8
+        with self.assertRaisesRegex(
+            ValueError,
+            "Unmanaged nodegroup \\[nvidia\\]: spread placement groups hold at most 7 instances, got max_size: 8",
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["placement_group"] = "spread"
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["max_size"] = 7
+        self.assertEqual(EKS.from_0_0_1(eks_cfg).unmanaged_nodegroups["nvidia"].placement_group, "spread")
+
+    def test_update_config(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["managed_nodegroups"]["compute"]["max_unavailable_percentage"] = 33
+        eks_cfg["unmanaged_nodegroups"]["platform"]["instance_refresh"] = {
+            "instance_warmup": 300,
+            "checkpoint_percentages": [50, 100],
+            "checkpoint_delay": 600,
+        }
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["instance_refresh"] = {}
+        eks = EKS.from_0_0_1(eks_cfg)
+        self.assertEqual(eks.managed_nodegroups["compute"].max_unavailable_percentage, 33)
+        self.assertIsNone(eks.managed_nodegroups["compute"].max_unavailable)
+        self.assertEqual(
+            eks.unmanaged_nodegroups["platform"].instance_refresh.preferences(),
+            {
+                "MinHealthyPercentage": 90,
+                "InstanceWarmup": 300,
+                "CheckpointPercentages": [50, 100],
+                "CheckpointDelay": 600,
+                "SkipMatching": True,
+            },
+        )
+        self.assertEqual(
+            eks.unmanaged_nodegroups["nvidia"].instance_refresh.preferences(),
+            {"MinHealthyPercentage": 90, "SkipMatching": True},
+        )
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["managed_nodegroups"]["compute"]["max_unavailable"] = 0
+        eks_cfg["managed_nodegroups"]["compute"]["max_unavailable_percentage"] = 33
+        with self.assertRaisesRegex(
+            ValueError,
+            "Managed nodegroup \\[compute\\]: max_unavailable and max_unavailable_percentage are mutually exclusive.*"
+            "Managed nodegroup \\[compute\\]: max_unavailable must be an integer from 1 to 100, got: 0",
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+        with self.assertRaisesRegex(
+            ValueError,
+            "instance_refresh.min_healthy_percentage must be a percentage \\(0-100\\), got: 110.*"
+            "instance_refresh.checkpoint_delay must be a non-negative integer, got: -1.*"
+            "instance_refresh.checkpoint_percentages must be increasing percentages ending with 100, got: \\[50, 90\\]",
+        ):
+            EKS.UnmanagedNodegroup.InstanceRefresh.load(
+                {"min_healthy_percentage": 110, "checkpoint_percentages": [50, 90], "checkpoint_delay": -1}
+            )
+        with self.assertRaisesRegex(ValueError, "instance_refresh.checkpoint_delay requires checkpoint_percentages"):
+            EKS.UnmanagedNodegroup.InstanceRefresh.load({"checkpoint_delay": 600})
+
+    def test_ami_family(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["managed_nodegroups"]["compute"]["ami_family"] = "bottlerocket"
+        eks_cfg["unmanaged_nodegroups"]["platform"]["ami_family"] = "bottlerocket"
+        eks = EKS.from_0_0_1(eks_cfg)
+        self.assertEqual(eks.managed_nodegroups["compute"].ami_family, "bottlerocket")
+        self.assertEqual(eks.unmanaged_nodegroups["nvidia"].ami_family, "al2")
+        self.assertEqual(
+            eks.kubelet_for(eks.unmanaged_nodegroups["platform"]).bottlerocket_settings(),
+            {"event-qps": 0},
+        )
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["ami_family"] = "bottlerocket"
+        eks_cfg["unmanaged_nodegroups"]["platform"]["image_lazy_loading"] = "soci"
+        eks_cfg["unmanaged_nodegroups"]["platform"]["warm_pool"] = {}
+        eks_cfg["unmanaged_nodegroups"]["platform"]["kubelet"] = {"serialize_image_pulls": False}
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["ami_family"] = "ubuntu"
+        with self.assertRaisesRegex(
+            ValueError,
+            "Unmanaged nodegroup \\[platform\\]: image_lazy_loading, warm_pool, kubelet serialize_image_pulls "
+            "not supported with ami_family bottlerocket.*"
+            "Unmanaged nodegroup \\[nvidia\\]: ami_family must be one of al2, bottlerocket, got: ubuntu",
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+    def test_karpenter(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["provisioner"] = "karpenter"
+        eks = EKS.from_0_0_1(eks_cfg)
+        self.assertEqual(eks.provisioner, "karpenter")
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["provisioner"] = "fargate"
+        with self.assertRaisesRegex(ValueError, "eks.provisioner must be one of asg, karpenter, got: fargate"):
+            EKS.from_0_0_1(eks_cfg)
+
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["provisioner"] = "karpenter"
+        eks_cfg["managed_nodegroups"] = {}
+        eks_cfg["unmanaged_nodegroups"]["platform"]["ami_id"] = "ami-123abc"
+        eks_cfg["unmanaged_nodegroups"]["platform"]["user_data"] = "echo hi"
+        eks_cfg["unmanaged_nodegroups"]["nvidia"]["key_name"] = "some-key"
+        with self.assertRaisesRegex(
+            ValueError,
+            "eks.provisioner karpenter requires a managed nodegroup to run the Karpenter controller.*"
+            "Unmanaged nodegroup \\[platform\\]: ami_id not supported with eks.provisioner karpenter.*"
+            "Unmanaged nodegroup \\[nvidia\\]: key_name not supported with eks.provisioner karpenter",
+        ):
+            EKS.from_0_0_1(eks_cfg)
+
+    def test_warm_pool(self):
+        eks_cfg = deepcopy(eks_0_0_1_cfg)
+        eks_cfg["unmanaged_nodegroups"]["platform"]["warm_pool"] = {"min_size": 1, "pool_state": "hibernated"}
+        with patch("domino_cdk.config.util.log.warning") as warn:
+            eks = EKS.from_0_0_1(eks_cfg)
+            warn.assert_not_called()
+        self.assertEqual(
+            eks.unmanaged_nodegroups["platform"].warm_pool,
+            EKS.UnmanagedNodegroup.WarmPool(
+                min_size=1, max_group_prepared_capacity=None, pool_state="hibernated", reuse_on_scale_in=False
+            ),
+        )
+
+    def test_warm_pool_validation(self):
+        for (warm_pool, error) in [
+            ({"pool_state": "frozen"}, "warm_pool.pool_state must be stopped, hibernated or running"),
+            ({"min_size": -1}, "warm_pool.min_size must not be negative"),
+            ({"min_size": 2, "max_group_prepared_capacity": 1}, "warm_pool.max_group_prepared_capacity \\(1\\)"),
+        ]:
+            with self.assertRaisesRegex(ValueError, error):
+                EKS.UnmanagedNodegroup.WarmPool.load(warm_pool)
+
+    def test_warm_pool_incompatible_options(self):
+        for (option, value) in [("spot", True), ("instance_types", ["m5.2xlarge", "m5.4xlarge"])]:
+            eks_cfg = deepcopy(eks_0_0_1_cfg)
+            eks_cfg["unmanaged_nodegroups"]["platform"]["warm_pool"] = {}
+            eks_cfg["unmanaged_nodegroups"]["platform"][option] = value
+            with self.assertRaisesRegex(
+                ValueError, "Unmanaged nodegroup \\[platform\\]: warm_pool requires on-demand instances"
+            ):
+                EKS.from_0_0_1(eks_cfg)
@@ -0,0 +1,155 @@
+import unittest
+from unittest.mock import patch
+
+from domino_cdk.config import Autoscaler, Install, LoadBalancer, Storage
+
+install_0_0_1_cfg = {
+    "access_list": ["0.0.0.0/0"],
+    "acm_cert_arn": None,
+    "hostname": "domino.example.com",
+    "registry_username": None,
+    "registry_password": None,
+    "overrides": {},
+    "autoscaler": {"expander": "least-waste", "scale_down_unneeded_time": "5m"},
+}
+
+
+class TestConfigInstall(unittest.TestCase):
+    def test_autoscaler(self):
+        with patch("domino_cdk.config.util.log.warning") as warn:
+            install = Install.from_0_0_1(dict(install_0_0_1_cfg, autoscaler=dict(install_0_0_1_cfg["autoscaler"])))
+            warn.assert_not_called()
+        self.assertEqual(
+            install.autoscaler,
+            Autoscaler(
+                expander="least-waste",
+                balance_similar_node_groups=True,
+                scan_interval=None,
+                scale_down_delay_after_add=None,
+                scale_down_unneeded_time="5m",
+                max_node_provision_time=None,
+            ),
+        )
+        self.assertEqual(Install.from_0_0_0({}).autoscaler, Autoscaler.load(None))
+
+    def test_autoscaler_validation(self):
+        with self.assertRaisesRegex(
+            ValueError,
+            "autoscaler.expander must be one of priority, least-waste, most-pods, random, got: cheapest.*"
+            "autoscaler.scan_interval must be a duration \\(ie 30s, 10m, 1h30m\\), got: 10",
+        ):
+            Autoscaler.load({"expander": "cheapest", "scan_interval": 10})
+
+        with patch("domino_cdk.config.util.log.warning") as warn:
+            Autoscaler.load({"scale_down_delay": "5m"})
+            warn.assert_called_with(
+                "Warning: Unused/unsupported autoscaler attribute in config.install.autoscaler: ['scale_down_delay']"
+            )
+
+    def test_load_balancer(self):
+        self.assertEqual(
+            Install.from_0_0_1(dict(install_0_0_1_cfg, autoscaler={})).load_balancer,
+            LoadBalancer(type="elb", target_type="ip", cross_zone=True, idle_timeout=3600),
+        )
+        self.assertEqual(
+            Install.from_0_0_1(
+                dict(install_0_0_1_cfg, load_balancer={"type": "nlb", "idle_timeout": 600})
+            ).load_balancer,
+            LoadBalancer(type="nlb", target_type="ip", cross_zone=True, idle_timeout=600),
+        )
+
+        with self.assertRaisesRegex(
+            ValueError,
+            "load_balancer.type must be one of elb, nlb, got: alb.*"
+            "load_balancer.target_type must be one of ip, instance, got: pod",
+        ):
+            LoadBalancer.load({"type": "alb", "target_type": "pod", "idle_timeout": 0})
+
+        with self.assertRaisesRegex(
+            ValueError, "load_balancer.idle_timeout must be 1-4000 seconds on an elb, got: 5000"
+        ):
+            LoadBalancer.load({"type": "elb", "idle_timeout": 5000})
+        with self.assertRaisesRegex(
+            ValueError, "load_balancer.idle_timeout must be 60-6000 seconds on an nlb, got: 30"
+        ):
+            LoadBalancer.load({"type": "nlb", "idle_timeout": 30})
+        self.assertEqual(LoadBalancer.load({"type": "nlb", "idle_timeout": 5000}).idle_timeout, 5000)
+
+    def test_registry_cache(self):
+        cfg = dict(install_0_0_1_cfg, autoscaler={}, registry_cache="domino-quay")
+        with self.assertRaisesRegex(
+            ValueError, "install.registry_cache requires registry_username and registry_password"
+        ):
+            Install.from_0_0_1(dict(cfg))
+
+        cfg.update(registry_username="user", registry_password="pass")
+        self.assertEqual(Install.from_0_0_1(dict(cfg)).registry_cache, "domino-quay")
+        self.assertIsNone(Install.from_0_0_1(dict(install_0_0_1_cfg, autoscaler={})).registry_cache)
+
+        with self.assertRaisesRegex(ValueError, "install.registry_cache must be 2-30 lowercase .*got: Domino/Quay"):
+            Install.from_0_0_1(dict(cfg, registry_cache="Domino/Quay"))
+
+    def test_storage(self):
+        storage = Install.from_0_0_1(dict(install_0_0_1_cfg, autoscaler={})).storage
+        self.assertEqual(
+            storage.block,
+            Storage.Block(
+                volume_type="gp3",
+                iops=None,
+                throughput=None,
+                kms_key_id=None,
+                volume_binding_mode="WaitForFirstConsumer",
+            ),
+        )
+        self.assertEqual(storage.block.parameters(), {"type": "gp3", "encrypted": "true"})
+
+        storage = Storage.load(
+            {"block": {"iops": 6000, "throughput": 500, "kms_key_id": "arn:aws:kms:us-west-2:1234567890:key/abcd"}}
+        )
+        self.assertEqual(
+            storage.block.parameters(),
+            {
+                "type": "gp3",
+                "encrypted": "true",
+                "iops": "6000",
+                "throughput": "500",
+                "kmsKeyId": "arn:aws:kms:us-west-2:1234567890:key/abcd",
+            },
+        )
+
+    def test_storage_validation(self):
+        with self.assertRaisesRegex(
+            ValueError,
+            "storage.block.iops must be 3000-80000 for gp3 volumes, got: 100.*"
+            "storage.block.throughput must be 125-2000 MiB/s, got: 3000.*"
+            "storage.block.kms_key_id must be a KMS key ARN, got: alias/ebs.*"
+            "storage.block.volume_binding_mode must be one of WaitForFirstConsumer, Immediate, got: Lazy",
+        ):
+            Storage.load(
+                {
+                    "block": {
+                        "iops": 100,
+                        "throughput": 3000,
+                        "kms_key_id": "alias/ebs",
+                        "volume_binding_mode": "Lazy",
+                    }
+                }
+            )
+
+        with self.assertRaisesRegex(
+            ValueError, "storage.block.throughput \\(1000\\) must not exceed iops / 4 \\(750\\)"
+        ):
+            Storage.load({"block": {"throughput": 1000}})
+        with self.assertRaisesRegex(ValueError, "storage.block.iops is required for io2 volumes"):
+            Storage.load({"block": {"volume_type": "io2"}})
+        with self.assertRaisesRegex(
+            ValueError,
+            "storage.block.iops can't be set for gp2 volumes.*storage.block.throughput can only be set for gp3 volumes",
+        ):
+            Storage.load({"block": {"volume_type": "gp2", "iops": 3000, "throughput": 250}})
+
+        with patch("domino_cdk.config.util.log.warning") as warn:
+            Storage.load({"block": {"size": "10Gi"}})
+            warn.assert_called_with(
+                "Warning: Unused/unsupported block storage attribute in config.install.storage.block: ['size']"
+            )
@@ -3,6 +3,7 @@ from copy import deepcopy
 from unittest.mock import patch
 
 from domino_cdk.config import VPC, IngressRule
+from domino_cdk.config.vpc import DEFAULT_ENDPOINTS
 
 vpc_0_0_0_cfg = {"create": True, "id": None, "cidr": "10.0.0.0/24", "max_azs": 3}
 
@@ -44,11 +45,14 @@ vpc_object = VPC(
     id=None,
     cidr="10.0.0.0/24",
     public_cidr_mask=27,
+    pod_cidrs=["100.164.0.0/16"],
+    pod_cidr_mask=18,
     private_cidr_mask=19,
     availability_zones=[],
     max_azs=3,
     flow_logging=False,
-    endpoints=True,
+    endpoints=DEFAULT_ENDPOINTS,
+    ip_family="ipv4",
     bastion=VPC.Bastion(
         enabled=False, key_name=None, instance_type=None, ingress_ports=None, ami_id=None, user_data=None
     ),
@@ -121,3 +125,77 @@ class TestConfigVPC(unittest.TestCase):
         vpc_cfg["bastion"]["user_data"] = "some-user-data"
         with self.assertRaisesRegex(ValueError, "Bastion instance with user_data requires an ami_id!"):
             VPC.from_0_0_1(vpc_cfg)
+
+    def test_endpoints(self):
+        vpc_cfg = deepcopy(vpc_0_0_1_cfg)
+        vpc_cfg["endpoints"] = False
+        self.assertEqual(VPC.from_0_0_1(vpc_cfg).endpoints, [])
+
+        vpc_cfg = deepcopy(vpc_0_0_1_cfg)
+        vpc_cfg["endpoints"] = ["s3", "logs", "ecr.dkr"]
+        self.assertEqual(VPC.from_0_0_1(vpc_cfg).endpoints, ["s3", "logs", "ecr.dkr"])
+
+        vpc_cfg = deepcopy(vpc_0_0_1_cfg)
+        vpc_cfg["endpoints"] = ["logs", "com.amazonaws.us-west-2.kms", "ECR", "-sts"]
+        with self.assertRaisesRegex(
+            ValueError, "vpc.endpoints must be AWS service names \\(ie ecr.api\\), got: \\['ECR', '-sts'\\]"
+        ):
+            VPC.from_0_0_1(vpc_cfg)
+
+        vpc_cfg = deepcopy(vpc_0_0_1_cfg)
+        vpc_cfg["endpoints"] = ["logs", "kms", "logs"]
+        with self.assertRaisesRegex(ValueError, "vpc.endpoints has duplicates"):
+            VPC.from_0_0_1(vpc_cfg)
+
+    def test_ip_family(self):
+        vpc_cfg = deepcopy(vpc_0_0_1_cfg)
+        self.assertEqual(VPC.from_0_0_1(vpc_cfg).ip_family, "ipv4")
+
+        vpc_cfg = deepcopy(vpc_0_0_1_cfg)
+        vpc_cfg["ip_family"] = "ipv6"
+        self.assertEqual(VPC.from_0_0_1(vpc_cfg).ip_family, "ipv6")
+
+        vpc_cfg = deepcopy(vpc_0_0_1_cfg)
+        vpc_cfg["ip_family"] = "dual"
+        with self.assertRaisesRegex(ValueError, "vpc.ip_family must be one of ipv4, ipv6, got: dual"):
+            VPC.from_0_0_1(vpc_cfg)
+
+    def test_pod_cidrs(self):
+        vpc_cfg = deepcopy(vpc_0_0_1_cfg)
+        vpc_cfg["max_azs"] = 6
+        vpc_cfg["pod_cidrs"] = ["100.64.0.0/17", "100.66.0.0/18"]
+        vpc_cfg["pod_cidr_mask"] = 19
+        vpc = VPC.from_0_0_1(vpc_cfg)
+        self.assertEqual(
+            vpc.pod_subnet_cidrs(6),
+            [
+                "100.64.0.0/19",
+                "100.64.32.0/19",
+                "100.64.64.0/19",
+                "100.64.96.0/19",
+                "100.66.0.0/19",
+                "100.66.32.0/19",
+            ],
+        )
+
+        self.assertEqual(vpc_object.pod_subnet_cidrs(3), ["100.164.0.0/18", "100.164.64.0/18", "100.164.128.0/18"])
+
+    def test_pod_cidrs_validation(self):
+        def check(regex: str, **kwargs):
+            vpc_cfg = {**deepcopy(vpc_0_0_1_cfg), **kwargs}
+            with self.assertRaisesRegex(ValueError, regex):
+                VPC.from_0_0_1(vpc_cfg)
+
+        check("only fit 4 /18 pod subnets, but 5 availability zones", max_azs=5)
+        check("must be an IPv4 range between /16 and /28", pod_cidrs=["100.64.0.0/10"])
+        check("overlaps with the VPC cidr", pod_cidrs=["10.0.0.0/16"])
+        check("overlaps with the VPC cidr or another pod cidr", pod_cidrs=["100.64.0.0/16", "100.64.0.0/17"])
+        check("overlaps with 198.19.0.0/16", pod_cidrs=["198.19.0.0/16"])
+        check("different RFC 1918 range than the VPC cidr", pod_cidrs=["192.168.0.0/16"])
+        check("can't have more than 4 ranges", pod_cidrs=[f"100.{64 + i}.0.0/16" for i in range(5)])
+        check("Invalid vpc.cidr/pod_cidrs", pod_cidrs=["not-a-cidr"])
+        check("pod_cidr_mask must be between 16 and 28", pod_cidr_mask=30)
+
+        vpc_cfg = deepcopy(vpc_0_0_1_cfg)
+        vpc_cfg["pod_cidrs"] = ["10.1.0.0/16"]
+        VPC.from_0_0_1(vpc_cfg)
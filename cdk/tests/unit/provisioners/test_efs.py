@@ -0,0 +1,94 @@
+import aws_cdk.aws_ec2 as ec2
+from aws_cdk.assertions import Match, Template
+from aws_cdk.core import App, Environment, Stack
+
+from domino_cdk.config import EFS, VPC, IngressRule
+from domino_cdk.config.vpc import DEFAULT_ENDPOINTS
+from domino_cdk.provisioners.efs import DominoEfsProvisioner
+from domino_cdk.provisioners.vpc import DominoVpcProvisioner
+
+from . import TestCase
+
+
+class TestDominoEfsProvisioner(TestCase):
+    def setUp(self):
+        self.app = App()
+        self.stack = Stack(self.app, "EFS", env=Environment(region="us-west-2", account="1234567890"))
+
+    def test_ipv6(self):
+        vpc_config = VPC(
+            id=None,
+            create=True,
+            cidr="10.0.0.0/16",
+            public_cidr_mask=27,
+            private_cidr_mask=19,
+            pod_cidrs=["100.164.0.0/16"],
+            pod_cidr_mask=18,
+            availability_zones=[],
+            max_azs=3,
+            flow_logging=False,
+            endpoints=DEFAULT_ENDPOINTS,
+            ip_family="ipv6",
+            bastion=VPC.Bastion(
+                enabled=True,
+                key_name="domino-test",
+                instance_type="t2.micro",
+                ami_id="ami-1234567890",
+                ingress_ports=[
+                    IngressRule(
+                        name="ssh", from_port=22, to_port=22, protocol="TCP", ip_cidrs=["0.0.0.0/0", "2001:db8::/32"]
+                    )
+                ],
+                user_data=None,
+            ),
+        )
+        vpc_stack = DominoVpcProvisioner(self.stack, "vpc", "test", vpc_config, False, None)
+        cluster_sg = ec2.SecurityGroup(self.stack, "cluster_sg", vpc=vpc_stack.vpc)
+
+        DominoEfsProvisioner(
+            self.stack,
+            "efs",
+            "test",
+            EFS(
+                backup=EFS.Backup(
+                    enable=False,
+                    schedule=None,
+                    move_to_cold_storage_after=None,
+                    delete_after=None,
+                    removal_policy=None,
+                ),
+                removal_policy_destroy=True,
+            ),
+            vpc_stack.vpc,
+            cluster_sg,
+            False,
+            ipv6_cidr=vpc_stack.ipv6_cidr_block,
+        )
+
+        assertion = Template.from_stack(self.stack)
+        assertion.has_resource_properties(
+            "AWS::EC2::SecurityGroup",
+            {
+                "SecurityGroupIngress": Match.array_with(
+                    [
+                        Match.object_like(
+                            {
+                                "CidrIpv6": {"Fn::Select": [0, Match.any_value()]},
+                                "FromPort": 2049,
+                                "ToPort": 2049,
+                                "IpProtocol": "tcp",
+                            }
+                        )
+                    ]
+                ),
+            },
+        )
+        assertion.has_resource_properties(
+            "AWS::EC2::SecurityGroup",
+            {
+                "GroupName": "test-bastion",
+                "SecurityGroupIngress": Match.array_with(
+                    [Match.object_like({"CidrIpv6": "2001:db8::/32", "FromPort": 22, "ToPort": 22})]
+                ),
+            },
+        )
@@ -1,10 +1,12 @@
-from json import loads
+from json import dumps, loads
 from unittest.mock import patch
 
+import aws_cdk.aws_ec2 as ec2
 import aws_cdk.aws_eks as eks
-from aws_cdk.assertions import Template
+from aws_cdk.assertions import Match, Template
 from aws_cdk.core import App, Environment, Stack
 
+from domino_cdk.config import CNI, DNS, KubeProxy
 from domino_cdk.provisioners.eks import DominoEksClusterProvisioner
 
 from . import TestCase
@@ -30,10 +32,18 @@ class TestEksClusterProvisioner(TestCase):
 
         assertion = Template.from_stack(self.stack)
         assertion.resource_count_is("Custom::AWSCDK-EKS-KubernetesPatch", 1)
-        assertion.resource_count_is("AWS::EKS::Addon", 3)
+        assertion.resource_count_is("AWS::EKS::Addon", 4)
         assertion.has_resource_properties("AWS::EKS::Addon", {"AddonName": "vpc-cni", "AddonVersion": ADDON_VERSION})
         assertion.has_resource_properties("AWS::EKS::Addon", {"AddonName": "kube-proxy", "AddonVersion": ADDON_VERSION})
         assertion.has_resource_properties("AWS::EKS::Addon", {"AddonName": "coredns", "AddonVersion": ADDON_VERSION})
+        assertion.has_resource_properties(
+            "AWS::EKS::Addon",
+            {
+                "AddonName": "aws-ebs-csi-driver",
+                "AddonVersion": ADDON_VERSION,
+                "ServiceAccountRoleArn": {"Fn::GetAtt": [Match.string_like_regexp("EbsCsiDriverRole"), "Arn"]},
+            },
+        )
 
         template = self.app.synth().get_stack(STACK_NAME).template
 
@@ -47,3 +57,221 @@ class TestEksClusterProvisioner(TestCase):
         )
         self.assertEqual("{}", properties["RestorePatchJson"])
         self.assertEqual("strategic", properties["PatchType"])
+
+    @patch("domino_cdk.provisioners.eks.DominoEksClusterProvisioner._get_addon_version")
+    def test_setup_addons_cni_configuration(self, mock_get_addon_version):
+        mock_get_addon_version.return_value = ADDON_VERSION
+
+        eks_provisioner = DominoEksClusterProvisioner(self.stack)
+
+        eks_provisioner.setup_addons(
+            self.eks_cluster, self.eks_version.version, CNI.load({"prefix_delegation": True, "warm_ip_target": 5})
+        )
+
+        template = self.app.synth().get_stack(STACK_NAME).template
+
+        addons = {
+            res["Properties"]["AddonName"]: res["Properties"]
+            for res in template["Resources"].values()
+            if res["Type"] == "AWS::EKS::Addon"
+        }
+        self.assertEqual(
+            {
+                "env": {
+                    "ENABLE_PREFIX_DELEGATION": "true",
+                    "WARM_IP_TARGET": "5",
+                    "AWS_VPC_K8S_CNI_CUSTOM_NETWORK_CFG": "false",
+                }
+            },
+            loads(addons["vpc-cni"]["ConfigurationValues"]),
+        )
+        self.assertNotIn("ConfigurationValues", addons["coredns"])
+
+    @patch("domino_cdk.provisioners.eks.DominoEksClusterProvisioner._get_addon_version")
+    def test_setup_addons_dns(self, mock_get_addon_version):
+        mock_get_addon_version.return_value = ADDON_VERSION
+
+        eks_provisioner = DominoEksClusterProvisioner(self.stack)
+        eks_provisioner.setup_addons(
+            self.eks_cluster,
+            self.eks_version.version,
+            dns=DNS.load({"coredns_replicas": 4, "node_local_cache": True}),
+        )
+
+        template = self.app.synth().get_stack(STACK_NAME).template
+
+        coredns = next(
+            res["Properties"]
+            for res in template["Resources"].values()
+            if res["Type"] == "AWS::EKS::Addon" and res["Properties"]["AddonName"] == "coredns"
+        )
+        self.assertEqual({"replicaCount": 4}, loads(coredns["ConfigurationValues"]))
+
+        kube_dns_ip = self.find_resource(template, "Custom::AWSCDK-EKS-KubernetesObjectValue")
+        self.assertEqual(
+            {"ObjectType": "service", "ObjectName": "kube-dns", "ObjectNamespace": "kube-system"},
+            {k: kube_dns_ip["Properties"][k] for k in ["ObjectType", "ObjectName", "ObjectNamespace"]},
+        )
+        self.assertEqual(len([dep for dep in kube_dns_ip["DependsOn"] if dep.startswith("coredns")]), 1)
+
+        node_local_dns = next(
+            res
+            for res in template["Resources"].values()
+            if res["Type"] == "Custom::AWSCDK-EKS-KubernetesResource"
+            and "node-local-dns" in dumps(res["Properties"]["Manifest"])
+        )
+        manifest = dumps(node_local_dns["Properties"]["Manifest"])
+        self.assertIn("bind 169.254.20.10 ", manifest)
+        self.assertIn('[\\"-localip\\",\\"169.254.20.10,', manifest)
+        self.assertIn("KubeDnsClusterIP", manifest)
+        self.assertIn('\\"name\\":\\"kube-dns-upstream\\"', manifest)
+
+    @patch("domino_cdk.provisioners.eks.DominoEksClusterProvisioner._get_addon_version")
+    def test_setup_addons_ebs_csi(self, mock_get_addon_version):
+        mock_get_addon_version.return_value = ADDON_VERSION
+        kms_key_arn = "arn:aws:kms:us-west-2:1234567890:key/abcd"
+
+        eks_provisioner = DominoEksClusterProvisioner(self.stack)
+        eks_provisioner.setup_addons(self.eks_cluster, self.eks_version.version, ebs_kms_key_arn=kms_key_arn)
+
+        template = self.app.synth().get_stack(STACK_NAME).template
+        role = next(
+            res["Properties"]
+            for logical_id, res in template["Resources"].items()
+            if res["Type"] == "AWS::IAM::Role" and logical_id.startswith("EbsCsiDriverRole")
+        )
+        statement = role["AssumeRolePolicyDocument"]["Statement"][0]
+        self.assertEqual("sts:AssumeRoleWithWebIdentity", statement["Action"])
+        self.assertIn("EbsCsiOidcConditions", dumps(statement["Condition"]))
+        self.assertIn("AmazonEBSCSIDriverPolicy", dumps(role["ManagedPolicyArns"]))
+
+        policy = next(
+            res["Properties"]["PolicyDocument"]
+            for logical_id, res in template["Resources"].items()
+            if res["Type"] == "AWS::IAM::Policy" and logical_id.startswith("EbsCsiDriverRole")
+        )
+        self.assertEqual(
+            [
+                {
+                    "Action": ["kms:CreateGrant", "kms:ListGrants", "kms:RevokeGrant"],
+                    "Condition": {"Bool": {"kms:GrantIsForAWSResource": "true"}},
+                    "Effect": "Allow",
+                    "Resource": kms_key_arn,
+                },
+                {
+                    "Action": [
+                        "kms:Decrypt",
+                        "kms:DescribeKey",
+                        "kms:Encrypt",
+                        "kms:GenerateDataKey*",
+                        "kms:ReEncrypt*",
+                    ],
+                    "Effect": "Allow",
+                    "Resource": kms_key_arn,
+                },
+            ],
+            policy["Statement"],
+        )
+
+    @patch("domino_cdk.provisioners.eks.DominoEksClusterProvisioner._get_addon_version")
+    def test_setup_addons_ipv6(self, mock_get_addon_version):
+        mock_get_addon_version.return_value = ADDON_VERSION
+
+        eks_provisioner = DominoEksClusterProvisioner(self.stack)
+        eks_provisioner.setup_addons(
+            self.eks_cluster,
+            self.eks_version.version,
+            CNI.load({"warm_prefix_target": 1, "prefix_delegation": True}),
+            ip_family="ipv6",
+        )
+
+        template = self.app.synth().get_stack(STACK_NAME).template
+
+        vpc_cni = next(
+            res["Properties"]
+            for res in template["Resources"].values()
+            if res["Type"] == "AWS::EKS::Addon" and res["Properties"]["AddonName"] == "vpc-cni"
+        )
+        self.assertEqual(
+            {
+                "env": {
+                    "ENABLE_PREFIX_DELEGATION": "true",
+                    "WARM_PREFIX_TARGET": "1",
+                    "AWS_VPC_K8S_CNI_CUSTOM_NETWORK_CFG": "false",
+                    "ENABLE_IPv6": "true",
+                    "ENABLE_IPv4": "false",
+                }
+            },
+            loads(vpc_cni["ConfigurationValues"]),
+        )
+
+    @patch("domino_cdk.provisioners.eks.DominoEksClusterProvisioner._get_addon_version")
+    def test_setup_addons_ipvs(self, mock_get_addon_version):
+        mock_get_addon_version.return_value = ADDON_VERSION
+
+        eks_provisioner = DominoEksClusterProvisioner(self.stack)
+        eks_provisioner.setup_addons(
+            self.eks_cluster,
+            self.eks_version.version,
+            dns=DNS.load({"node_local_cache": True}),
+            kube_proxy=KubeProxy.load({"mode": "ipvs"}),
+        )
+
+        template = self.app.synth().get_stack(STACK_NAME).template
+
+        kube_proxy = next(
+            res["Properties"]
+            for res in template["Resources"].values()
+            if res["Type"] == "AWS::EKS::Addon" and res["Properties"]["AddonName"] == "kube-proxy"
+        )
+        self.assertEqual({"mode": "ipvs", "ipvs": {"scheduler": "rr"}}, loads(kube_proxy["ConfigurationValues"]))
+
+        # IPVS owns the kube-dns address, so the cache only takes the link-local one
+        self.assertIsNone(self.find_resource(template, "Custom::AWSCDK-EKS-KubernetesObjectValue"))
+        manifest = dumps(
+            next(
+                res["Properties"]["Manifest"]
+                for res in template["Resources"].values()
+                if res["Type"] == "Custom::AWSCDK-EKS-KubernetesResource"
+                and "node-local-dns" in dumps(res["Properties"]["Manifest"])
+            )
+        )
+        self.assertIn("bind 169.254.20.10", manifest)
+        self.assertNotIn("bind 169.254.20.10 ", manifest)
+        self.assertIn('[\\"-localip\\",\\"169.254.20.10\\",', manifest)
+
+    @patch("domino_cdk.provisioners.eks.DominoEksClusterProvisioner._get_addon_version")
+    def test_setup_eni_configs(self, mock_get_addon_version):
+        mock_get_addon_version.return_value = ADDON_VERSION
+
+        pod_subnets = [
+            ec2.PrivateSubnet(
+                self.stack,
+                f"PodSubnet{i}",
+                vpc_id=self.eks_cluster.vpc.vpc_id,
+                availability_zone=az,
+                cidr_block=cidr,
+            )
+            for i, (az, cidr) in enumerate([("us-west-2a", "100.164.0.0/18"), ("us-west-2b", "100.164.64.0/18")])
+        ]
+
+        eks_provisioner = DominoEksClusterProvisioner(self.stack)
+        vpc_cni_addon = eks_provisioner.setup_addons(
+            self.eks_cluster, self.eks_version.version, CNI.load({"custom_networking": True})
+        )
+        eks_provisioner.setup_eni_configs(self.eks_cluster, vpc_cni_addon, pod_subnets)
+
+        self.assertEqual(len(eks_provisioner.eni_configs), 2)
+
+        template = self.app.synth().get_stack(STACK_NAME).template
+        manifests = [
+            (res, dumps(res["Properties"]["Manifest"]))
+            for res in template["Resources"].values()
+            if res["Type"] == "Custom::AWSCDK-EKS-KubernetesResource"
+        ]
+        eni_configs = [(res, manifest) for res, manifest in manifests if "ENIConfig" in manifest]
+        self.assertEqual(len(eni_configs), 2)
+        for (res, manifest), az in zip(eni_configs, ["us-west-2a", "us-west-2b"]):
+            self.assertIn(f'\\"name\\":\\"{az}\\"', manifest)
+            self.assertIn("ClusterSecurityGroupId", manifest)
+            self.assertEqual(len([dep for dep in res["DependsOn"] if dep.startswith("vpccni")]), 1)
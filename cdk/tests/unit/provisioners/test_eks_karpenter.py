@@ -0,0 +1,102 @@
+import json
+from typing import Dict, List
+
+import aws_cdk.aws_eks as eks
+import aws_cdk.aws_iam as iam
+from aws_cdk.assertions import Match, Template
+from aws_cdk.core import App, Environment, Stack
+
+from domino_cdk.config.template import config_template
+from domino_cdk.provisioners.eks.eks_karpenter import DominoEksKarpenterProvisioner
+
+from . import TestCase
+
+STACK_NAME = "DominoCDK"
+
+
+class TestEksKarpenterProvisioner(TestCase):
+    def setUp(self):
+        self.app = App()
+        self.stack = Stack(self.app, STACK_NAME, env=Environment(region="us-west-2", account="1234567890"))
+        self.cluster = eks.Cluster(self.stack, "eks", version=eks.KubernetesVersion.V1_21, default_capacity=0)
+        self.ng_role = iam.Role(self.stack, "NodegroupRole", assumed_by=iam.ServicePrincipal("ec2.amazonaws.com"))
+        self.eks_cfg = config_template().eks
+        self.eks_cfg.managed_nodegroups["platform-0"] = self.eks_cfg.unmanaged_nodegroups.pop("platform-0")
+        self.eks_cfg.provisioner = "karpenter"
+
+    @staticmethod
+    def nodepool_resource(template: Dict, name: str) -> Dict:
+        return next(res for res_id, res in template["Resources"].items() if f"KarpenterNodePool{name}" in res_id)
+
+    @staticmethod
+    def manifests(resource: Dict) -> List[Dict]:
+        # Tokens (subnet ids, instance profile...) are replaced by a placeholder
+        parts = resource["Properties"]["Manifest"]["Fn::Join"][1]
+        return json.loads("".join(p if isinstance(p, str) else "token" for p in parts))
+
+    def test_provision(self):
+        self.eks_cfg.unmanaged_nodegroups["compute-0"].spot = True
+        DominoEksKarpenterProvisioner(self.stack).provision(
+            STACK_NAME, self.cluster, self.eks_cfg, self.ng_role, self.cluster.vpc, "Private"
+        )
+
+        assertion = Template.from_stack(self.stack)
+        assertion.has_resource_properties("AWS::SQS::Queue", {"QueueName": "DominoCDK-karpenter"})
+        assertion.resource_count_is("AWS::Events::Rule", 4)
+        assertion.has_resource_properties(
+            "AWS::IAM::InstanceProfile",
+            {
+                "InstanceProfileName": "DominoCDK-karpenter-node",
+                "Roles": [{"Ref": Match.string_like_regexp("Nodegroup")}],
+            },
+        )
+        assertion.has_resource_properties(
+            "AWS::IAM::Policy",
+            {
+                "PolicyDocument": {
+                    "Statement": Match.array_with([Match.object_like({"Action": "iam:PassRole", "Effect": "Allow"})])
+                }
+            },
+        )
+
+        template = self.app.synth().get_stack(STACK_NAME).template
+        chart = self.find_resource(template, "Custom::AWSCDK-EKS-HelmChart")["Properties"]
+        self.assertEqual(
+            {
+                "Chart": "karpenter",
+                "Repository": "oci://public.ecr.aws/karpenter/karpenter",
+                "Version": "1.0.6",
+                "Namespace": "kube-system",
+            },
+            {k: chart[k] for k in ["Chart", "Repository", "Version", "Namespace"]},
+        )
+        self.assertIn('"serviceAccount":{"create":false,"name":"karpenter"}', str(chart["Values"]))
+
+        resource = self.nodepool_resource(template, "compute0")
+        self.assertIn("ekschartKarpenterDF8B19F7", resource["DependsOn"])
+        node_class, node_pool = self.manifests(resource)
+        self.assertEqual(node_class["kind"], "EC2NodeClass")
+        self.assertEqual(node_class["spec"]["instanceProfile"], "token")
+        self.assertEqual(node_class["spec"]["kubelet"], {"maxPods": 44})
+        self.assertEqual(node_class["spec"]["blockDeviceMappings"][0]["ebs"]["volumeSize"], "1000Gi")
+        self.assertIn('{"eventRecordQPS": 0}', node_class["spec"]["userData"])
+
+        self.assertEqual(node_pool["kind"], "NodePool")
+        self.assertEqual(node_pool["spec"]["limits"], {"cpu": 80})
+        template_spec = node_pool["spec"]["template"]["spec"]
+        self.assertEqual(
+            template_spec["nodeClassRef"], {"group": "karpenter.k8s.aws", "kind": "EC2NodeClass", "name": "compute-0"}
+        )
+        self.assertIn(
+            {"key": "karpenter.sh/capacity-type", "operator": "In", "values": ["spot"]}, template_spec["requirements"]
+        )
+        self.assertIn(
+            {"key": "node.kubernetes.io/instance-type", "operator": "In", "values": ["m5.2xlarge"]},
+            template_spec["requirements"],
+        )
+
+        _, node_pool = self.manifests(self.nodepool_resource(template, "gpu0"))
+        self.assertEqual(
+            node_pool["spec"]["template"]["spec"]["taints"],
+            [{"key": "nvidia.com/gpu", "value": "true", "effect": "NoSchedule"}],
+        )
@@ -0,0 +1,586 @@
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+import aws_cdk.aws_ec2 as ec2
+import aws_cdk.aws_eks as eks
+import aws_cdk.aws_iam as iam
+from aws_cdk.assertions import Match, Template
+from aws_cdk.core import App, Environment, Stack
+
+from domino_cdk.config import CNI, DNS, EKS, Kubelet, KubeProxy
+from domino_cdk.config.template import config_template
+from domino_cdk.provisioners.eks.eks_nodegroup import (
+    LAZY_LOADING_SNAPSHOTTERS,
+    DominoEksNodegroupProvisioner,
+)
+
+from . import TestCase
+
+STACK_NAME = "DominoCDK"
+
+
+class TestEksNodegroupProvisioner(TestCase):
+    def setUp(self):
+        self.app = App()
+        self.stack = Stack(self.app, STACK_NAME, env=Environment(region="us-west-2", account="1234567890"))
+        self.stack.untagged_resources = {"ec2": [], "iam": []}
+        self.eks_version = eks.KubernetesVersion.V1_21
+        self.vpc = ec2.Vpc(
+            self.stack,
+            "VPC",
+            subnet_configuration=[
+                ec2.SubnetConfiguration(subnet_type=ec2.SubnetType.PUBLIC, name="Public"),
+                ec2.SubnetConfiguration(subnet_type=ec2.SubnetType.PRIVATE, name="Private"),
+            ],
+        )
+        self.cluster = eks.Cluster(self.stack, "eks", version=self.eks_version, vpc=self.vpc, default_capacity=0)
+        self.ng_role = iam.Role(self.stack, "ng-role", assumed_by=iam.ServicePrincipal("ec2.amazonaws.com"))
+        self.eks_cfg: EKS = config_template().eks
+        # The template enables custom networking, which derives kubelet max pods
+        self.eks_cfg.cni = CNI.load(None)
+        self.eks_cfg.managed_nodegroups["managed"] = EKS.ManagedNodegroup.load(
+            {
+                "ssm_agent": True,
+                "disk_size": 100,
+                "min_size": 1,
+                "max_size": 1,
+                "instance_types": ["m5.2xlarge"],
+                "labels": {},
+                "tags": {},
+                "desired_size": 1,
+            }
+        )
+
+    def provision(self, ip_family: str = "ipv4") -> Dict:
+        DominoEksNodegroupProvisioner(
+            self.stack,
+            self.cluster,
+            self.ng_role,
+            STACK_NAME,
+            self.eks_cfg,
+            self.eks_version,
+            self.vpc,
+            "Private",
+            None,
+            ip_family=ip_family,
+        )
+        return self.app.synth().get_stack(STACK_NAME).template
+
+    @staticmethod
+    def user_data_parts(launch_template: Dict) -> List[str]:
+        parts: List[str] = []
+
+        def walk(obj: Any):
+            if isinstance(obj, dict):
+                for k, v in obj.items():
+                    if k == "Fn::Base64" and isinstance(v, str):
+                        parts.append(v)
+                    else:
+                        walk(v)
+            elif isinstance(obj, list):
+                for v in obj:
+                    walk(v)
+            elif isinstance(obj, str):
+                parts.append(obj)
+
+        walk(launch_template["Properties"]["LaunchTemplateData"]["UserData"])
+        return parts
+
+    def launch_template(self, template: Dict, name: str) -> Dict:
+        return next(
+            res
+            for res_name, res in template["Resources"].items()
+            if res["Type"] == "AWS::EC2::LaunchTemplate" and name in res_name
+        )
+
+    def test_default_kubelet_config(self):
+        template = self.provision()
+
+        for name in ["managed", "platform", "compute", "gpu"]:
+            user_data = "\n".join(self.user_data_parts(self.launch_template(template, name)))
+            self.assertIn("""jq '. + {"eventRecordQPS": 0}' $KUBELET_CONFIG""", user_data)
+            if name != "managed":
+                self.assertIn("--use-max-pods true", user_data)
+
+    def test_node_local_dns(self):
+        self.eks_cfg.dns = DNS.load({"node_local_cache": True})
+
+        template = self.provision()
+
+        user_data = "\n".join(self.user_data_parts(self.launch_template(template, "platform")))
+        self.assertIn('"clusterDNS": ["169.254.20.10"]', user_data)
+        self.assertIn("--dns-cluster-ip 169.254.20.10", user_data)
+        user_data = "\n".join(self.user_data_parts(self.launch_template(template, "managed")))
+        self.assertNotIn("clusterDNS", user_data)
+
+    def test_ipvs_kernel_modules(self):
+        self.eks_cfg.kube_proxy = KubeProxy.load({"mode": "ipvs", "ipvs_scheduler": "wlc"})
+
+        template = self.provision()
+
+        for name in ["managed", "platform"]:
+            user_data = "\n".join(self.user_data_parts(self.launch_template(template, name)))
+            self.assertIn("modprobe ip_vs_wlc\nmodprobe nf_conntrack\n", user_data)
+            self.assertIn("echo ip_vs >> /etc/modules-load.d/kube-proxy.conf", user_data)
+
+    def test_ipv6_bootstrap(self):
+        template = self.provision(ip_family="ipv6")
+
+        user_data = "\n".join(self.user_data_parts(self.launch_template(template, "platform")))
+        self.assertIn(
+            "--ip-family ipv6 --service-ipv6-cidr $(aws eks describe-cluster --region us-west-2 --name ",
+            user_data,
+        )
+        self.assertIn("--query cluster.kubernetesNetworkConfig.serviceIpv6Cidr --output text)", user_data)
+
+    def test_nodegroup_kubelet_overrides_global(self):
+        self.eks_cfg.kubelet = self.eks_cfg.kubelet.merge(Kubelet.load({"serialize_image_pulls": False}))
+        self.eks_cfg.unmanaged_nodegroups["platform-0"].kubelet = Kubelet.load(
+            {"max_pods": 58, "event_record_qps": 5, "cpu_manager_policy": "static"}
+        )
+
+        template = self.provision()
+
+        user_data = "\n".join(self.user_data_parts(self.launch_template(template, "platform")))
+        self.assertIn(
+            """jq '. + {"eventRecordQPS": 5, "maxPods": 58, "serializeImagePulls": false, "cpuManagerPolicy": "static"}'""",
+            user_data,
+        )
+        self.assertIn("--use-max-pods false", user_data)
+
+        user_data = "\n".join(self.user_data_parts(self.launch_template(template, "gpu")))
+        self.assertIn("""jq '. + {"eventRecordQPS": 0, "serializeImagePulls": false}'""", user_data)
+        self.assertIn("--use-max-pods true", user_data)
+
+    def test_cni_max_pods(self):
+        self.eks_cfg.cni = CNI.load({"prefix_delegation": True})
+
+        template = self.provision()
+
+        user_data = "\n".join(self.user_data_parts(self.launch_template(template, "platform")))
+        self.assertIn(""""maxPods": 110""", user_data)
+        self.assertIn("--use-max-pods false", user_data)
+
+        user_data = "\n".join(self.user_data_parts(self.launch_template(template, "managed")))
+        self.assertNotIn("maxPods", user_data)
+
+    def test_image_snapshot(self):
+        self.eks_cfg.unmanaged_nodegroups["compute-0"].image_snapshot_id = "snap-123abc"
+
+        template = self.provision()
+
+        launch_template = self.launch_template(template, "compute")
+        block_devices = launch_template["Properties"]["LaunchTemplateData"]["BlockDeviceMappings"]
+        self.assertEqual(
+            {
+                "DeviceName": "/dev/xvdb",
+                "Ebs": {"DeleteOnTermination": True, "SnapshotId": "snap-123abc", "VolumeType": "gp3"},
+            },
+            block_devices[1],
+        )
+        user_data = "".join(self.user_data_parts(launch_template))
+        self.assertIn("/dev/xvdb /var/lib/containerd auto defaults,nofail 0 2", user_data)
+        self.assertLess(
+            user_data.index("mount /var/lib/containerd"),
+            user_data.index("/etc/eks/bootstrap.sh"),
+        )
+        self.assertIn("--container-runtime containerd", user_data)
+
+        platform_template = self.launch_template(template, "platform")
+        self.assertEqual(len(platform_template["Properties"]["LaunchTemplateData"]["BlockDeviceMappings"]), 1)
+        self.assertNotIn("/var/lib/containerd", "".join(self.user_data_parts(platform_template)))
+
+    @patch.dict(LAZY_LOADING_SNAPSHOTTERS["soci"]["sha256"], {"amd64": "abc123"})
+    def test_image_lazy_loading(self):
+        self.eks_cfg.unmanaged_nodegroups["gpu-0"].image_lazy_loading = "soci"
+
+        template = self.provision()
+
+        user_data = "".join(self.user_data_parts(self.launch_template(template, "gpu")))
+        self.assertIn("curl -fsSL --retry 5", user_data)
+        # containerd is only reconfigured once the pinned checksum matched
+        verify = user_data.index('echo "abc123  $SNAPSHOTTER_TARBALL" | sha256sum -c -')
+        self.assertLess(verify, user_data.index("systemctl enable --now soci-snapshotter-grpc.service"))
+        self.assertLess(verify, user_data.index('snapshotter = "soci"'))
+        self.assertLess(user_data.index("[proxy_plugins.soci]"), user_data.index("else\n"))
+        self.assertIn('snapshotter = "soci"', user_data)
+        self.assertIn('address = "/run/soci-snapshotter-grpc/soci-snapshotter-grpc.sock"', user_data)
+        self.assertLess(user_data.index("[proxy_plugins.soci]"), user_data.index("/etc/eks/bootstrap.sh"))
+        self.assertIn("--container-runtime containerd", user_data)
+
+        self.assertNotIn("proxy_plugins", "".join(self.user_data_parts(self.launch_template(template, "platform"))))
+
+    @patch.dict(LAZY_LOADING_SNAPSHOTTERS["stargz"]["sha256"], {"amd64": None})
+    def test_image_lazy_loading_unpinned(self):
+        self.eks_cfg.unmanaged_nodegroups["gpu-0"].image_lazy_loading = "stargz"
+
+        with self.assertRaisesRegex(ValueError, "No pinned sha256 of the stargz snapshotter for amd64"):
+            self.provision()
+
+    @patch.dict(LAZY_LOADING_SNAPSHOTTERS["soci"]["sha256"], {"arm64": "abc123"})
+    def test_arm64(self):
+        self.eks_cfg.managed_nodegroups["managed"].instance_types = ["m7g.2xlarge"]
+        self.eks_cfg.unmanaged_nodegroups["platform-0"].instance_types = ["m7g.2xlarge", "r7g.2xlarge"]
+        self.eks_cfg.unmanaged_nodegroups["platform-0"].image_lazy_loading = "soci"
+
+        template = self.provision()
+
+        assertion = Template.from_json(template)
+        assertion.has_resource_properties("AWS::EKS::Nodegroup", {"AmiType": "AL2_ARM_64"})
+        self.assertIn("amazon-linux-2-arm64", str(template["Parameters"]))
+        self.assertIn("amazon-linux-2-gpu", str(template["Parameters"]))
+
+        def arch_tag(asg_name: str) -> str:
+            asg = next(
+                res["Properties"]
+                for res in template["Resources"].values()
+                if res["Type"] == "AWS::AutoScaling::AutoScalingGroup"
+                and res["Properties"]["AutoScalingGroupName"].startswith(asg_name)
+            )
+            return next(
+                tag["Value"]
+                for tag in asg["Tags"]
+                if tag["Key"] == "k8s.io/cluster-autoscaler/node-template/label/kubernetes.io/arch"
+            )
+
+        self.assertEqual(arch_tag("DominoCDK-platform-0"), "arm64")
+        self.assertEqual(arch_tag("DominoCDK-gpu-0"), "amd64")
+
+        user_data = "".join(self.user_data_parts(self.launch_template(template, "platform")))
+        self.assertIn("soci-snapshotter-0.4.0-linux-arm64.tar.gz", user_data)
+        self.assertIn("SSMAgent/latest/linux_arm64/amazon-ssm-agent.rpm", user_data)
+
+    def test_bottlerocket(self):
+        self.eks_cfg.managed_nodegroups["managed"].ami_family = "bottlerocket"
+        self.eks_cfg.managed_nodegroups["managed"].instance_types = ["m7g.2xlarge"]
+        for name in ["platform-0", "gpu-0"]:
+            self.eks_cfg.unmanaged_nodegroups[name].ami_family = "bottlerocket"
+        self.eks_cfg.unmanaged_nodegroups["platform-0"].kubelet = Kubelet.load({"max_pods": 58})
+
+        template = self.provision()
+
+        assertion = Template.from_json(template)
+        assertion.has_resource_properties("AWS::EKS::Nodegroup", {"AmiType": "BOTTLEROCKET_ARM_64"})
+        self.assertIn("/aws/service/bottlerocket/aws-k8s-1.21/x86_64/latest/image_id", str(template["Parameters"]))
+        self.assertIn(
+            "/aws/service/bottlerocket/aws-k8s-1.21-nvidia/x86_64/latest/image_id", str(template["Parameters"])
+        )
+
+        managed = self.launch_template(template, "managed")
+        self.assertEqual(
+            managed["Properties"]["LaunchTemplateData"]["BlockDeviceMappings"][0]["DeviceName"], "/dev/xvdb"
+        )
+        user_data = "".join(self.user_data_parts(managed))
+        self.assertEqual(
+            user_data,
+            '[settings.kubernetes]\n"event-qps" = 0\n'
+            '[settings.host-containers.admin]\n"enabled" = false\n'
+            '[settings.host-containers.control]\n"enabled" = true',
+        )
+
+        user_data = "".join(self.user_data_parts(self.launch_template(template, "platform")))
+        self.assertNotIn("bootstrap.sh", user_data)
+        self.assertIn('"cluster-name" = "', user_data)
+        self.assertIn('"event-qps" = 0\n"max-pods" = 58\n', user_data)
+        self.assertIn('[settings.kubernetes.node-labels]\n"dominodatalab.com/node-pool" = "platform"', user_data)
+
+        user_data = "".join(self.user_data_parts(self.launch_template(template, "gpu")))
+        self.assertIn('[settings.kubernetes.node-taints]\n"nvidia.com/gpu" = "true:NoSchedule"', user_data)
+
+    def test_instance_requirements(self):
+        self.eks_cfg.managed_nodegroups["managed"].instance_requirements = EKS.NodegroupBase.InstanceRequirements.load(
+            {"vcpu": 8, "memory_gib": 32, "max_types": 3}
+        )
+        self.eks_cfg.unmanaged_nodegroups["compute-0"].spot = True
+        self.eks_cfg.unmanaged_nodegroups[
+            "compute-0"
+        ].instance_requirements = EKS.NodegroupBase.InstanceRequirements.load(
+            {"vcpu": 8, "memory_gib": 32, "max_types": 4}
+        )
+
+        template = self.provision()
+
+        assertion = Template.from_json(template)
+        assertion.has_resource_properties(
+            "AWS::EKS::Nodegroup", {"InstanceTypes": ["m5.2xlarge", "m7i.2xlarge", "m6a.2xlarge"]}
+        )
+        compute_asg = next(
+            res["Properties"]
+            for res in template["Resources"].values()
+            if res["Type"] == "AWS::AutoScaling::AutoScalingGroup"
+            and res["Properties"]["AutoScalingGroupName"].startswith("DominoCDK-compute-0")
+        )
+        self.assertEqual(
+            [o["InstanceType"] for o in compute_asg["MixedInstancesPolicy"]["LaunchTemplate"]["Overrides"]],
+            ["m5.2xlarge", "m7i.2xlarge", "m6a.2xlarge", "m6i.2xlarge"],
+        )
+
+    def test_spot_options(self):
+        self.eks_cfg.unmanaged_nodegroups["compute-0"].spot = True
+        self.eks_cfg.unmanaged_nodegroups["gpu-0"].spot = True
+        self.eks_cfg.unmanaged_nodegroups["gpu-0"].spot_options = EKS.UnmanagedNodegroup.SpotOptions.load(
+            {
+                "on_demand_base_capacity": 1,
+                "on_demand_percentage_above_base_capacity": 25,
+                "allocation_strategy": "price-capacity-optimized",
+                "capacity_rebalance": True,
+            }
+        )
+
+        template = self.provision()
+
+        def asg(name: str) -> Dict:
+            return next(
+                res["Properties"]
+                for res in template["Resources"].values()
+                if res["Type"] == "AWS::AutoScaling::AutoScalingGroup"
+                and res["Properties"]["AutoScalingGroupName"].startswith(name)
+            )
+
+        compute = asg("DominoCDK-compute-0")
+        self.assertEqual(
+            {
+                "OnDemandBaseCapacity": 0,
+                "OnDemandPercentageAboveBaseCapacity": 0,
+                "SpotAllocationStrategy": "capacity-optimized-prioritized",
+            },
+            compute["MixedInstancesPolicy"]["InstancesDistribution"],
+        )
+        self.assertNotIn("CapacityRebalance", compute)
+
+        gpu = asg("DominoCDK-gpu-0")
+        self.assertEqual(
+            {
+                "OnDemandBaseCapacity": 1,
+                "OnDemandPercentageAboveBaseCapacity": 25,
+                "SpotAllocationStrategy": "price-capacity-optimized",
+            },
+            gpu["MixedInstancesPolicy"]["InstancesDistribution"],
+        )
+        self.assertTrue(gpu["CapacityRebalance"])
+
+        self.assertNotIn("InstancesDistribution", asg("DominoCDK-platform-0")["MixedInstancesPolicy"])
+
+    def test_node_template_resources(self):
+        self.eks_cfg.unmanaged_nodegroups["compute-0"].instance_types = ["m5.2xlarge", "c5.4xlarge", "x9.mega"]
+        self.eks_cfg.unmanaged_nodegroups["platform-0"].instance_types = ["m5.2xlarge", "c6i.2xlarge"]
+
+        template = self.provision()
+
+        def resource_tags(asg_name: str) -> Dict[str, str]:
+            asg = next(
+                res["Properties"]
+                for res in template["Resources"].values()
+                if res["Type"] == "AWS::AutoScaling::AutoScalingGroup"
+                and res["Properties"]["AutoScalingGroupName"].startswith(asg_name)
+            )
+            prefix = "k8s.io/cluster-autoscaler/node-template/resources/"
+            return {
+                tag["Key"][len(prefix) :]: tag["Value"]
+                for tag in asg["Tags"]
+                if isinstance(tag["Key"], str) and tag["Key"].startswith(prefix)
+            }
+
+        self.assertEqual(
+            {
+                "cpu": "8",
+                "memory": "16384Mi",
+                "ephemeral-storage": "100Gi",
+                "pods": "58",
+                "smarter-devices/fuse": "20",
+            },
+            resource_tags("DominoCDK-platform-0"),
+        )
+        self.assertEqual(
+            {
+                "cpu": "8",
+                "memory": "62464Mi",
+                "ephemeral-storage": "1000Gi",
+                "nvidia.com/gpu": "1",
+                "pods": "58",
+                "smarter-devices/fuse": "20",
+            },
+            resource_tags("DominoCDK-gpu-0"),
+        )
+        # Unknown instance types can't be sized
+        self.assertEqual({"smarter-devices/fuse": "20"}, resource_tags("DominoCDK-compute-0"))
+
+        assertion = Template.from_json(template)
+        assertion.has_resource_properties(
+            "AWS::EKS::Nodegroup",
+            {
+                "Tags": Match.object_like(
+                    {
+                        "k8s.io/cluster-autoscaler/node-template/resources/cpu": "8",
+                        "k8s.io/cluster-autoscaler/node-template/resources/pods": "58",
+                    }
+                )
+            },
+        )
+
+    def test_placement_group_efa(self):
+        gpu = self.eks_cfg.unmanaged_nodegroups["gpu-0"]
+        gpu.instance_types = ["p4d.24xlarge"]
+        gpu.placement_group = "cluster"
+        gpu.efa = True
+
+        template = self.provision()
+
+        assertion = Template.from_json(template)
+        assertion.resource_count_is("AWS::EC2::PlacementGroup", 3)
+        assertion.has_resource_properties("AWS::EC2::PlacementGroup", {"Strategy": "cluster"})
+        gpu_asgs = [
+            res["Properties"]
+            for res in template["Resources"].values()
+            if res["Type"] == "AWS::AutoScaling::AutoScalingGroup"
+            and res["Properties"]["AutoScalingGroupName"].startswith("DominoCDK-gpu-0")
+        ]
+        self.assertEqual(len({str(asg["PlacementGroup"]) for asg in gpu_asgs}), 3)
+
+        efa_sg = next(
+            (res_name, res["Properties"])
+            for res_name, res in template["Resources"].items()
+            if res["Type"] == "AWS::EC2::SecurityGroup" and res["Properties"].get("GroupName") == "DominoCDK-gpu-0-efa"
+        )
+        assertion.has_resource_properties(
+            "AWS::EC2::SecurityGroupIngress",
+            {
+                "IpProtocol": "-1",
+                "GroupId": {"Fn::GetAtt": [efa_sg[0], "GroupId"]},
+                "SourceSecurityGroupId": {"Fn::GetAtt": [efa_sg[0], "GroupId"]},
+            },
+        )
+        assertion.has_resource_properties(
+            "AWS::EC2::SecurityGroupEgress",
+            {
+                "IpProtocol": "-1",
+                "GroupId": {"Fn::GetAtt": [efa_sg[0], "GroupId"]},
+                "DestinationSecurityGroupId": {"Fn::GetAtt": [efa_sg[0], "GroupId"]},
+            },
+        )
+
+        lt_data = self.launch_template(template, "gpu")["Properties"]["LaunchTemplateData"]
+        self.assertNotIn("SecurityGroupIds", lt_data)
+        interface = lt_data["NetworkInterfaces"][0]
+        self.assertEqual(
+            {"DeviceIndex": 0, "InterfaceType": "efa", "DeleteOnTermination": True},
+            {k: v for k, v in interface.items() if k != "Groups"},
+        )
+        self.assertEqual(len(interface["Groups"]), 3)
+        self.assertIn({"Fn::GetAtt": [efa_sg[0], "GroupId"]}, interface["Groups"])
+
+        platform_lt_data = self.launch_template(template, "platform")["Properties"]["LaunchTemplateData"]
+        self.assertNotIn("NetworkInterfaces", platform_lt_data)
+        self.assertEqual(len(platform_lt_data["SecurityGroupIds"]), 2)
+
+    def test_update_config(self):
+        self.eks_cfg.managed_nodegroups["managed"].max_unavailable = 2
+        self.eks_cfg.unmanaged_nodegroups["gpu-0"].instance_refresh = EKS.UnmanagedNodegroup.InstanceRefresh.load(
+            {"instance_warmup": 300}
+        )
+
+        template = self.provision()
+
+        assertion = Template.from_json(template)
+        assertion.has_resource_properties(
+            "AWS::EKS::Nodegroup",
+            {"NodegroupName": Match.string_like_regexp("DominoCDK-managed-"), "UpdateConfig": {"MaxUnavailable": 2}},
+        )
+        refresh = next(
+            res for res in template["Resources"].values() if res["Type"] == "AWS::CloudFormation::CustomResource"
+        )
+        nodegroups = refresh["Properties"]["nodegroups"]
+        self.assertEqual(list(nodegroups), ["gpu-0"])
+        self.assertEqual(len(nodegroups["gpu-0"]["asg_names"]), 3)
+        self.assertEqual(
+            nodegroups["gpu-0"]["preferences"],
+            {"MinHealthyPercentage": 90, "InstanceWarmup": 300, "SkipMatching": True},
+        )
+        self.assertEqual(nodegroups["gpu-0"]["launch_template_version"]["Fn::GetAtt"][1], "LatestVersionNumber")
+        # Refreshes start once the ASGs use the new launch template version
+        gpu_asgs = [
+            res_name
+            for res_name, res in template["Resources"].items()
+            if res["Type"] == "AWS::AutoScaling::AutoScalingGroup" and res_name.startswith("UnmanagedNodeGroupgpu0")
+        ]
+        self.assertEqual(len(gpu_asgs), 3)
+        self.assertTrue(set(gpu_asgs) <= set(refresh["DependsOn"]))
+        assertion.has_resource_properties(
+            "AWS::IAM::Policy",
+            {
+                "PolicyDocument": {
+                    "Statement": Match.array_with(
+                        [
+                            Match.object_like(
+                                {"Action": ["autoscaling:CancelInstanceRefresh", "autoscaling:StartInstanceRefresh"]}
+                            )
+                        ]
+                    )
+                }
+            },
+        )
+
+        # Without instance_refresh, there is no custom resource
+        self.setUp()
+        assertion = Template.from_json(self.provision())
+        assertion.resource_count_is("AWS::CloudFormation::CustomResource", 0)
+
+    def test_warm_pool(self):
+        self.eks_cfg.unmanaged_nodegroups["compute-0"].warm_pool = EKS.UnmanagedNodegroup.WarmPool.load(
+            {"min_size": 2, "pool_state": "hibernated", "reuse_on_scale_in": True}
+        )
+
+        template = self.provision()
+
+        assertion = Template.from_json(template)
+        assertion.resource_count_is("AWS::AutoScaling::WarmPool", 3)
+        assertion.has_resource_properties(
+            "AWS::AutoScaling::WarmPool",
+            {"MinSize": 2, "PoolState": "Hibernated", "InstanceReusePolicy": {"ReuseOnScaleIn": True}},
+        )
+        assertion.has_resource_properties(
+            "AWS::AutoScaling::LifecycleHook",
+            {
+                "LifecycleHookName": "DominoCDK-compute-0-dummy1a-launching",
+                "LifecycleTransition": "autoscaling:EC2_INSTANCE_LAUNCHING",
+                "DefaultResult": "CONTINUE",
+            },
+        )
+
+        compute_asgs = [
+            res["Properties"]
+            for res in template["Resources"].values()
+            if res["Type"] == "AWS::AutoScaling::AutoScalingGroup"
+            and res["Properties"]["AutoScalingGroupName"].startswith("DominoCDK-compute-0")
+        ]
+        self.assertEqual(len(compute_asgs), 3)
+        for asg in compute_asgs:
+            self.assertIn("LaunchTemplate", asg)
+            self.assertNotIn("MixedInstancesPolicy", asg)
+
+        launch_template = self.launch_template(template, "compute")
+        self.assertEqual(
+            {"Configured": True}, launch_template["Properties"]["LaunchTemplateData"]["HibernationOptions"]
+        )
+        user_data = "".join(self.user_data_parts(launch_template))
+        # The launch template is shared by the nodegroup's per-AZ ASGs
+        self.assertIn("ASG_NAME=DominoCDK-compute-0-$(imds placement/availability-zone)", user_data)
+        self.assertIn("--lifecycle-hook-name $ASG_NAME-launching", user_data)
+        gate = user_data.index("systemctl enable warm-pool-join.service")
+        bootstrap = user_data.index("/etc/eks/bootstrap.sh")
+        self.assertLess(gate, bootstrap)
+        # Completed by a service that stays enabled, so instances reused from the warm pool get their action completed
+        self.assertLess(bootstrap, user_data.rindex("systemctl enable --now warm-pool-lifecycle.service"))
+        self.assertLess(user_data.index("After=network-online.target kubelet.service"), bootstrap)
+        self.assertIn(
+            "until systemctl is-active --quiet kubelet && output=$(complete_lifecycle_action 2>&1); do", user_data
+        )
+        # Waits end at the hook's heartbeat timeout by abandoning the action
+        self.assertEqual(user_data.count("HEARTBEAT_TIMEOUT=600"), 2)
+        self.assertIn("complete_lifecycle_action ABANDON; exit 1; }", user_data)
+        self.assertNotIn("while true; do sleep", user_data)
+        self.assertEqual(user_data.count("Wants=network-online.target"), 2)
+
+        platform_template = self.launch_template(template, "platform")
+        self.assertNotIn("HibernationOptions", platform_template["Properties"]["LaunchTemplateData"])
+        self.assertNotIn("warm-pool-join", "".join(self.user_data_parts(platform_template)))
@@ -0,0 +1,73 @@
+import aws_cdk.aws_iam as iam
+from aws_cdk.assertions import Match, Template
+from aws_cdk.core import App, Environment, Stack
+
+from domino_cdk.provisioners.eks.eks_registry_cache import (
+    DominoEksRegistryCacheProvisioner,
+)
+
+from . import TestCase
+
+STACK_NAME = "DominoCDK"
+
+
+class TestEksRegistryCacheProvisioner(TestCase):
+    def setUp(self):
+        self.app = App()
+        self.stack = Stack(self.app, STACK_NAME, env=Environment(region="us-west-2", account="1234567890"))
+        self.ng_role = iam.Role(self.stack, "NG", assumed_by=iam.ServicePrincipal("ec2.amazonaws.com"))
+
+    def test_provision(self):
+        DominoEksRegistryCacheProvisioner(self.stack).provision(
+            STACK_NAME, "domino-quay", "quay-user", "quay-pass", self.ng_role
+        )
+
+        assertion = Template.from_stack(self.stack)
+        assertion.has_resource_properties(
+            "AWS::SecretsManager::Secret",
+            {
+                "Name": "ecr-pullthroughcache/DominoCDK-domino-quay",
+                "SecretString": '{"username": "quay-user", "password": "quay-pass"}',
+            },
+        )
+        assertion.has_resource_properties(
+            "AWS::ECR::PullThroughCacheRule",
+            {
+                "EcrRepositoryPrefix": "domino-quay",
+                "UpstreamRegistryUrl": "quay.io",
+                "CredentialArn": {"Ref": Match.string_like_regexp("RegistryCacheCredentials")},
+            },
+        )
+        assertion.has_resource_properties(
+            "AWS::ECR::RepositoryCreationTemplate",
+            {
+                "Prefix": "domino-quay",
+                "AppliedFor": ["PULL_THROUGH_CACHE"],
+                "ResourceTags": [{"Key": "domino-deploy-id", "Value": STACK_NAME}],
+                "CustomRoleArn": {"Fn::GetAtt": [Match.string_like_regexp("RegistryCacheTemplateRole"), "Arn"]},
+            },
+        )
+        assertion.has_resource_properties(
+            "AWS::IAM::Policy",
+            {
+                "PolicyDocument": {
+                    "Statement": [
+                        {
+                            "Action": ["ecr:BatchImportUpstreamImage", "ecr:CreateRepository"],
+                            "Effect": "Allow",
+                            "Resource": {
+                                "Fn::Join": [
+                                    "",
+                                    [
+                                        "arn:",
+                                        {"Ref": "AWS::Partition"},
+                                        ":ecr:us-west-2:1234567890:repository/domino-quay/*",
+                                    ],
+                                ]
+                            },
+                        }
+                    ],
+                },
+                "Roles": [{"Ref": Match.string_like_regexp("NG")}],
+            },
+        )
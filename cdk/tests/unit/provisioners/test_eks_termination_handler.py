@@ -0,0 +1,86 @@
+import aws_cdk.aws_ec2 as ec2
+import aws_cdk.aws_eks as eks
+from aws_cdk import aws_autoscaling
+from aws_cdk.assertions import Match, Template
+from aws_cdk.core import App, Environment, Stack
+
+from domino_cdk.provisioners.eks.eks_termination_handler import (
+    DominoEksTerminationHandlerProvisioner,
+)
+
+from . import TestCase
+
+STACK_NAME = "DominoCDK"
+
+
+class TestEksTerminationHandlerProvisioner(TestCase):
+    def setUp(self):
+        self.app = App()
+        self.stack = Stack(self.app, STACK_NAME, env=Environment(region="us-west-2", account="1234567890"))
+        self.cluster = eks.Cluster(self.stack, "eks", version=eks.KubernetesVersion.V1_21, default_capacity=0)
+        self.asgs = [
+            aws_autoscaling.AutoScalingGroup(
+                self.stack,
+                f"{STACK_NAME}-compute-{i}",
+                vpc=self.cluster.vpc,
+                instance_type=ec2.InstanceType("m5.2xlarge"),
+                machine_image=ec2.MachineImage.latest_amazon_linux(),
+            )
+            for i in range(2)
+        ]
+
+    def test_provision(self):
+        DominoEksTerminationHandlerProvisioner(self.stack).provision(STACK_NAME, self.cluster, self.asgs)
+
+        assertion = Template.from_stack(self.stack)
+        assertion.has_resource_properties(
+            "AWS::SQS::Queue", {"QueueName": "DominoCDK-node-termination-handler", "MessageRetentionPeriod": 300}
+        )
+        assertion.resource_count_is("AWS::Events::Rule", 5)
+        assertion.has_resource_properties(
+            "AWS::Events::Rule",
+            {
+                "EventPattern": {
+                    "source": ["aws.ec2"],
+                    "detail-type": ["EC2 Spot Instance Interruption Warning"],
+                },
+                "Targets": [{"Arn": {"Fn::GetAtt": [Match.any_value(), "Arn"]}, "Id": "NodeTerminationHandlerQueue"}],
+            },
+        )
+        assertion.resource_count_is("AWS::AutoScaling::LifecycleHook", 2)
+        assertion.has_resource_properties(
+            "AWS::AutoScaling::LifecycleHook",
+            {
+                "LifecycleHookName": "DominoCDK-compute-1-terminating",
+                "LifecycleTransition": "autoscaling:EC2_INSTANCE_TERMINATING",
+                "DefaultResult": "CONTINUE",
+            },
+        )
+        assertion.has_resource_properties(
+            "AWS::AutoScaling::AutoScalingGroup",
+            {
+                "Tags": Match.array_with(
+                    [
+                        {
+                            "Key": "aws-node-termination-handler/managed",
+                            "PropagateAtLaunch": True,
+                            "Value": "true",
+                        }
+                    ]
+                )
+            },
+        )
+
+        template = self.app.synth().get_stack(STACK_NAME).template
+        chart = self.find_resource(template, "Custom::AWSCDK-EKS-HelmChart")["Properties"]
+        self.assertEqual(
+            {
+                "Chart": "aws-node-termination-handler",
+                "Repository": "https://aws.github.io/eks-charts",
+                "Version": "0.21.0",
+                "Namespace": "kube-system",
+            },
+            {k: chart[k] for k in ["Chart", "Repository", "Version", "Namespace"]},
+        )
+        self.assertIn('"enableSqsTerminationDraining":true', str(chart["Values"]))
+        self.assertIn('"serviceAccount":{"create":false,"name":"aws-node-termination-handler"}', str(chart["Values"]))
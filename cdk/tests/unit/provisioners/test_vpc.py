@@ -3,6 +3,7 @@ from aws_cdk.assertions import Template
 from aws_cdk.core import App, Environment, Stack
 
 from domino_cdk.config import VPC, IngressRule
+from domino_cdk.config.vpc import DEFAULT_ENDPOINTS
 from domino_cdk.provisioners.vpc import DominoVpcProvisioner
 
 from . import TestCase
@@ -19,11 +20,14 @@ class TestDominoVPCProvisioner(TestCase):
             create=True,
             cidr="10.0.0.0/16",
             public_cidr_mask=27,
+            pod_cidrs=["100.164.0.0/16"],
+            pod_cidr_mask=18,
             private_cidr_mask=19,
             availability_zones=[],
             max_azs=3,
             flow_logging=False,
-            endpoints=False,
+            endpoints=[],
+            ip_family="ipv4",
             bastion=VPC.Bastion(
                 enabled=True,
                 key_name="domino-test",
@@ -64,11 +68,14 @@ class TestDominoVPCProvisioner(TestCase):
             create=True,
             cidr="10.0.0.0/16",
             public_cidr_mask=27,
+            pod_cidrs=["100.164.0.0/16"],
+            pod_cidr_mask=18,
             private_cidr_mask=19,
             availability_zones=[],
             max_azs=3,
             flow_logging=True,
-            endpoints=True,
+            endpoints=DEFAULT_ENDPOINTS,
+            ip_family="ipv4",
             bastion=VPC.Bastion(
                 enabled=False,
                 key_name="",
@@ -88,11 +95,14 @@ class TestDominoVPCProvisioner(TestCase):
             create=True,
             cidr="10.0.0.0/16",
             public_cidr_mask=27,
+            pod_cidrs=["100.164.0.0/16"],
+            pod_cidr_mask=18,
             private_cidr_mask=19,
             availability_zones=[],
             max_azs=3,
             flow_logging=True,
-            endpoints=True,
+            endpoints=DEFAULT_ENDPOINTS,
+            ip_family="ipv4",
             bastion=VPC.Bastion(
                 enabled=False,
                 key_name="",
@@ -115,11 +125,14 @@ class TestDominoVPCProvisioner(TestCase):
             create=False,
             cidr="10.0.0.0/16",
             public_cidr_mask=27,
+            pod_cidrs=["100.164.0.0/16"],
+            pod_cidr_mask=18,
             private_cidr_mask=19,
             availability_zones=[],
             max_azs=3,
             flow_logging=False,
-            endpoints=True,
+            endpoints=DEFAULT_ENDPOINTS,
+            ip_family="ipv4",
             bastion=VPC.Bastion(
                 enabled=False,
                 key_name="",
@@ -141,11 +154,14 @@ class TestDominoVPCProvisioner(TestCase):
             create=True,
             cidr="10.0.0.0/16",
             public_cidr_mask=27,
+            pod_cidrs=["100.164.0.0/16"],
+            pod_cidr_mask=18,
             private_cidr_mask=19,
             availability_zones=[],
             max_azs=3,
             flow_logging=False,
-            endpoints=True,
+            endpoints=DEFAULT_ENDPOINTS,
+            ip_family="ipv4",
             bastion=VPC.Bastion(
                 enabled=True,
                 key_name="domino-test",
@@ -167,3 +183,153 @@ class TestDominoVPCProvisioner(TestCase):
         instance = self.find_resource(template, "AWS::EC2::Instance")
         self.assertIsNone(instance["Properties"].get("BlockDeviceMappings"))
         self.assertEqual("ami-1234567890", instance["Properties"]["ImageId"])
+
+    def test_pod_subnets(self):
+        vpc_config = VPC(
+            id=None,
+            create=True,
+            cidr="10.0.0.0/16",
+            public_cidr_mask=27,
+            private_cidr_mask=19,
+            pod_cidrs=["100.64.0.0/17", "100.66.0.0/18"],
+            pod_cidr_mask=18,
+            availability_zones=[],
+            max_azs=3,
+            flow_logging=False,
+            endpoints=[],
+            ip_family="ipv4",
+            bastion=VPC.Bastion(
+                enabled=False,
+                key_name="",
+                instance_type="",
+                ingress_ports=[],
+                ami_id=None,
+                user_data=None,
+            ),
+        )
+
+        vpc = DominoVpcProvisioner(self.stack, "construct-1", "test-vpc", vpc_config, False, None)
+
+        self.assertEqual(len(vpc.pod_subnets), 3)
+        assertion = Template.from_stack(self.stack)
+        assertion.resource_count_is("AWS::EC2::VPCCidrBlock", 2)
+        for cidr in ["100.64.0.0/18", "100.64.64.0/18", "100.66.0.0/18"]:
+            assertion.has_resource_properties("AWS::EC2::Subnet", {"CidrBlock": cidr})
+        for cidr in ["100.64.0.0/17", "100.66.0.0/18"]:
+            assertion.has_resource_properties("AWS::EC2::VPCCidrBlock", {"CidrBlock": cidr})
+
+    def test_endpoints(self):
+        vpc_config = VPC(
+            id=None,
+            create=True,
+            cidr="10.0.0.0/16",
+            public_cidr_mask=27,
+            private_cidr_mask=19,
+            pod_cidrs=["100.164.0.0/16"],
+            pod_cidr_mask=18,
+            availability_zones=[],
+            max_azs=3,
+            flow_logging=False,
+            endpoints=["logs", "kms"],
+            ip_family="ipv4",
+            bastion=VPC.Bastion(
+                enabled=False,
+                key_name="",
+                instance_type="",
+                ingress_ports=[],
+                ami_id=None,
+                user_data=None,
+            ),
+        )
+
+        DominoVpcProvisioner(self.stack, "construct-1", "test-vpc", vpc_config, False, None)
+
+        assertion = Template.from_stack(self.stack)
+        # No s3, so no gateway endpoint
+        assertion.resource_count_is("AWS::EC2::VPCEndpoint", 2)
+        for service in ["logs", "kms"]:
+            assertion.has_resource_properties(
+                "AWS::EC2::VPCEndpoint",
+                {
+                    "ServiceName": f"com.amazonaws.us-west-2.{service}",
+                    "VpcEndpointType": "Interface",
+                    "PrivateDnsEnabled": True,
+                },
+            )
+
+        template = self.app.synth().get_stack("VPC").template
+        endpoint_sgs = {
+            str(res["Properties"]["SecurityGroupIds"])
+            for res in template["Resources"].values()
+            if res["Type"] == "AWS::EC2::VPCEndpoint"
+        }
+        self.assertEqual(len(endpoint_sgs), 1)
+
+    def test_ipv6(self):
+        vpc_config = VPC(
+            id=None,
+            create=True,
+            cidr="10.0.0.0/16",
+            public_cidr_mask=27,
+            private_cidr_mask=19,
+            pod_cidrs=["100.164.0.0/16"],
+            pod_cidr_mask=18,
+            availability_zones=[],
+            max_azs=3,
+            flow_logging=False,
+            endpoints=DEFAULT_ENDPOINTS,
+            ip_family="ipv6",
+            bastion=VPC.Bastion(
+                enabled=False,
+                key_name="",
+                instance_type="",
+                ingress_ports=[],
+                ami_id=None,
+                user_data=None,
+            ),
+        )
+
+        DominoVpcProvisioner(self.stack, "construct-1", "test-vpc", vpc_config, False, None)
+
+        assertion = Template.from_stack(self.stack)
+        assertion.has_resource_properties("AWS::EC2::VPCCidrBlock", {"AmazonProvidedIpv6CidrBlock": True})
+        assertion.resource_count_is("AWS::EC2::EgressOnlyInternetGateway", 1)
+
+        template = self.app.synth().get_stack("VPC").template
+        ipv6_cidr = next(
+            name
+            for name, res in template["Resources"].items()
+            if res["Type"] == "AWS::EC2::VPCCidrBlock" and res["Properties"].get("AmazonProvidedIpv6CidrBlock")
+        )
+        dual_stack = [
+            res
+            for res in template["Resources"].values()
+            if res["Type"] == "AWS::EC2::Subnet" and "Ipv6CidrBlock" in res["Properties"]
+        ]
+        # Public and private subnets, not the pod subnets
+        self.assertEqual(len(dual_stack), 6)
+        self.assertEqual(
+            {res["Properties"]["Ipv6CidrBlock"]["Fn::Select"][0] for res in dual_stack}, {0, 1, 2, 3, 4, 5}
+        )
+        for res in dual_stack:
+            self.assertTrue(res["Properties"]["AssignIpv6AddressOnCreation"])
+            self.assertIn(ipv6_cidr, res["DependsOn"])
+
+        ipv6_routes = [
+            res["Properties"]
+            for res in template["Resources"].values()
+            if res["Type"] == "AWS::EC2::Route" and res["Properties"].get("DestinationIpv6CidrBlock") == "::/0"
+        ]
+        self.assertEqual(len([r for r in ipv6_routes if "GatewayId" in r]), 3)
+        self.assertEqual(len([r for r in ipv6_routes if "EgressOnlyInternetGatewayId" in r]), 3)
+
+        endpoint_sg = next(
+            res
+            for res in template["Resources"].values()
+            if res["Type"] == "AWS::EC2::SecurityGroup" and res["Properties"]["GroupName"] == "test-vpc-endpoints"
+        )
+        self.assertIn(ipv6_cidr, endpoint_sg["DependsOn"])
+        self.assertEqual(
+            [rule.get("CidrIpv6") is not None for rule in endpoint_sg["Properties"]["SecurityGroupIngress"]],
+            [False, False, True],
+        )
@@ -1,10 +1,18 @@
+import re
+from typing import List
 from unittest import TestCase
 
 from aws_cdk.aws_s3 import Bucket
 from aws_cdk.core import App, Environment, Stack
 
-from domino_cdk.agent import generate_install_config
-from domino_cdk.config import Install
+from domino_cdk.agent import (
+    cache_image_references,
+    ecr_registry,
+    generate_install_config,
+    install_image_list,
+)
+from domino_cdk.config import Autoscaler, Install, LoadBalancer, Storage
+from domino_cdk.config.template import config_template
 
 
 class TestAgent(TestCase):
@@ -29,8 +37,13 @@ class TestAgent(TestCase):
                 hostname="test.example.com",
                 registry_username=None,
                 registry_password=None,
+                registry_cache=None,
                 overrides={},
                 istio_compatible=True,
+                prepull_images=[],
+                autoscaler=Autoscaler.load(None),
+                load_balancer=LoadBalancer.load(None),
+                storage=Storage.load(None),
             ),
             "us-west-2",
             "test-cluster",
@@ -83,8 +96,13 @@ class TestAgent(TestCase):
                 hostname="test.example.com",
                 registry_username=None,
                 registry_password=None,
+                registry_cache=None,
                 overrides={},
                 istio_compatible=False,
+                prepull_images=[],
+                autoscaler=Autoscaler.load(None),
+                load_balancer=LoadBalancer.load(None),
+                storage=Storage.load(None),
             ),
             "us-west-2",
             "test-cluster",
@@ -126,3 +144,269 @@ class TestAgent(TestCase):
                 }
             },
         )
+
+    def test_generate_install_config_autoscaler(self):
+        eks = config_template().eks
+        eks.unmanaged_nodegroups["compute-0"].spot = True
+        install = config_template().install
+        install.autoscaler = Autoscaler.load({"scan_interval": "20s", "max_node_provision_time": "10m"})
+
+        config = generate_install_config(
+            "test",
+            install,
+            "us-west-2",
+            "test-cluster",
+            "10.0.0.0/16",
+            {},
+            self.buckets,
+            None,
+            "fsid-blah",
+            "apid-blah",
+            "ZONE-ABC",
+            "TXTOWNER",
+            eks,
+        )
+
+        chart_values = config["release_overrides"]["cluster-autoscaler"]["chart_values"]
+        self.assertEqual(
+            chart_values["extraArgs"],
+            {
+                "expander": "priority",
+                "balance-similar-node-groups": "true",
+                "balancing-ignore-label": "topology.ebs.csi.aws.com/zone",
+                "scan-interval": "20s",
+                "max-node-provision-time": "10m",
+            },
+        )
+        priorities = chart_values["expanderPriorities"]
+        self.assertEqual(sorted(priorities), [10, 20, 30])
+
+        def priority(asg_name: str) -> List[int]:
+            return [p for p, patterns in priorities.items() if any(re.match(pat, asg_name) for pat in patterns)]
+
+        self.assertEqual(priority("test-compute-0-us-west-2a"), [30])
+        self.assertEqual(priority("eks-test-compute-0-us-west-2b-a1b2c3d4-e5f6"), [30])
+        self.assertEqual(priority("test-platform-0-us-west-2c"), [20])
+        self.assertEqual(priority("test-gpu-0-us-gov-west-1a"), [10])
+        self.assertEqual(priority("test-compute-0-extra-us-west-2a"), [])
+
+        # The cluster-autoscaler only scales managed nodegroups alongside Karpenter
+        eks.provisioner = "karpenter"
+        eks.managed_nodegroups["platform-0"] = eks.unmanaged_nodegroups["platform-0"]
+        config = generate_install_config(
+            "test",
+            install,
+            "us-west-2",
+            "test-cluster",
+            "10.0.0.0/16",
+            {},
+            self.buckets,
+            None,
+            "fsid-blah",
+            "apid-blah",
+            "ZONE-ABC",
+            "TXTOWNER",
+            eks,
+        )
+        self.assertEqual(
+            config["release_overrides"]["cluster-autoscaler"]["chart_values"]["expanderPriorities"],
+            {10: [f"^(eks-)?{re.escape('test-platform-0')}-[a-z]{{2}}(-[a-z]+)+-[0-9][a-z](-.*)?$"]},
+        )
+
+        install.autoscaler = Autoscaler.load({"expander": "least-waste", "balance_similar_node_groups": False})
+        config = generate_install_config(
+            "test",
+            install,
+            "us-west-2",
+            "test-cluster",
+            "10.0.0.0/16",
+            {},
+            self.buckets,
+            None,
+            "fsid-blah",
+            "apid-blah",
+            "ZONE-ABC",
+            "TXTOWNER",
+            eks,
+        )
+        self.assertEqual(
+            config["release_overrides"]["cluster-autoscaler"],
+            {"chart_values": {"extraArgs": {"expander": "least-waste"}}},
+        )
+
+    def test_generate_install_config_nlb(self):
+        install = config_template().install
+        install.acm_cert_arn = "acm:cert:arn"
+        install.load_balancer = LoadBalancer.load({"type": "nlb", "cross_zone": False, "idle_timeout": 600})
+
+        def annotations(monitoring_bucket):
+            config = generate_install_config(
+                "test",
+                install,
+                "us-west-2",
+                "test-cluster",
+                "10.0.0.0/16",
+                {},
+                self.buckets,
+                monitoring_bucket,
+                "fsid-blah",
+                "apid-blah",
+                "ZONE-ABC",
+                "TXTOWNER",
+            )
+            return config["release_overrides"]["nginx-ingress"]["chart_values"]["controller"]["service"]["annotations"]
+
+        self.assertEqual(
+            annotations(None),
+            {
+                "service.beta.kubernetes.io/aws-load-balancer-ssl-negotiation-policy": "ELBSecurityPolicy-TLS-1-2-2017-01",
+                "service.beta.kubernetes.io/aws-load-balancer-backend-protocol": "tcp",
+                "service.beta.kubernetes.io/aws-load-balancer-ssl-cert": "acm:cert:arn",
+                "service.beta.kubernetes.io/aws-load-balancer-ssl-ports": "443",
+                "service.beta.kubernetes.io/aws-load-balancer-proxy-protocol": "*",
+                "service.beta.kubernetes.io/aws-load-balancer-type": "external",
+                "service.beta.kubernetes.io/aws-load-balancer-nlb-target-type": "ip",
+                "service.beta.kubernetes.io/aws-load-balancer-scheme": "internet-facing",
+                "service.beta.kubernetes.io/aws-load-balancer-listener-attributes.TCP-80": "tcp.idle_timeout.seconds=600",
+                "service.beta.kubernetes.io/aws-load-balancer-attributes": "load_balancing.cross_zone.enabled=false",
+            },
+        )
+
+        monitoring_bucket = Bucket(self.stack, "s3-monitoring")
+        attributes = annotations(monitoring_bucket)["service.beta.kubernetes.io/aws-load-balancer-attributes"]
+        self.assertTrue(attributes.startswith("load_balancing.cross_zone.enabled=false,access_logs.s3.enabled=true,"))
+        self.assertTrue(attributes.endswith("access_logs.s3.prefix=NLBAccessLogs"))
+        self.assertNotIn(
+            "service.beta.kubernetes.io/aws-load-balancer-access-log-enabled",
+            annotations(monitoring_bucket),
+        )
+
+    def test_generate_install_config_registry_cache(self):
+        install = config_template(registry_username="user", registry_password="pass").install
+        install.registry_cache = "domino-quay"
+
+        config = generate_install_config(
+            "test",
+            install,
+            "us-west-2",
+            "test-cluster",
+            "10.0.0.0/16",
+            {},
+            self.buckets,
+            None,
+            "fsid-blah",
+            "apid-blah",
+            "ZONE-ABC",
+            "TXTOWNER",
+            aws_account_id="1234567890",
+        )
+        self.assertEqual(
+            config["helm"]["image_registries"],
+            [{"server": "1234567890.dkr.ecr.us-west-2.amazonaws.com", "username": "", "password": ""}],
+        )
+
+        with self.assertRaisesRegex(ValueError, "aws_account_id is required"):
+            generate_install_config(
+                "test",
+                install,
+                "us-west-2",
+                "test-cluster",
+                "10.0.0.0/16",
+                {},
+                self.buckets,
+                None,
+                "fsid-blah",
+                "apid-blah",
+                "ZONE-ABC",
+                "TXTOWNER",
+            )
+
+        cache = f"{ecr_registry('1234567890', 'cn-north-1')}/domino-quay"
+        self.assertEqual(cache, "1234567890.dkr.ecr.cn-north-1.amazonaws.com.cn/domino-quay")
+        self.assertEqual(
+            cache_image_references(
+                {
+                    "release_overrides": {
+                        "nucleus": {"chart_values": {"image": {"repository": "quay.io/domino/nucleus"}}},
+                        "other": {"chart_values": {"images": ["quay.io/domino/a:1", "docker.io/quay.io/b"]}},
+                    },
+                    "hostname": "quay.io",
+                },
+                cache,
+            ),
+            {
+                "release_overrides": {
+                    "nucleus": {
+                        "chart_values": {
+                            "image": {
+                                "repository": "1234567890.dkr.ecr.cn-north-1.amazonaws.com.cn/domino-quay/domino/nucleus"
+                            }
+                        }
+                    },
+                    "other": {
+                        "chart_values": {
+                            "images": [
+                                "1234567890.dkr.ecr.cn-north-1.amazonaws.com.cn/domino-quay/domino/a:1",
+                                "docker.io/quay.io/b",
+                            ]
+                        }
+                    },
+                },
+                "hostname": "quay.io",
+            },
+        )
+
+    def test_generate_install_config_storage(self):
+        install = config_template().install
+        install.storage = Storage.load({"block": {"iops": 6000, "throughput": 250}})
+
+        config = generate_install_config(
+            "test",
+            install,
+            "us-west-2",
+            "test-cluster",
+            "10.0.0.0/16",
+            {},
+            self.buckets,
+            None,
+            "fsid-blah",
+            "apid-blah",
+            "ZONE-ABC",
+            "TXTOWNER",
+        )
+        self.assertEqual(
+            config["storage_classes"]["block"],
+            {
+                "create": True,
+                "name": "dominodisk",
+                "type": "ebs",
+                "access_modes": ["ReadWriteOnce"],
+                "base_path": "",
+                "provisioner": "ebs.csi.aws.com",
+                "parameters": {"type": "gp3", "encrypted": "true", "iops": "6000", "throughput": "250"},
+                "volume_binding_mode": "WaitForFirstConsumer",
+            },
+        )
+
+    def test_install_image_list(self):
+        install = config_template().install
+        install.overrides = {
+            "release_overrides": {
+                "nucleus": {
+                    "chart_values": {"image": {"registry": "quay.io", "repository": "domino/nucleus", "tag": "5.1"}}
+                },
+                "executor": {"chart_values": {"image": "quay.io/domino/executor:5.1", "replicas": 2}},
+                "fluentd": {"chart_values": {"sidecars": [{"image": {"repository": "fluent/fluentd"}}]}},
+            }
+        }
+        install.prepull_images = ["quay.io/domino/executor:5.1", "quay.io/domino/environment:base"]
+
+        self.assertEqual(
+            install_image_list(install),
+            [
+                "quay.io/domino/nucleus:5.1",
+                "quay.io/domino/executor:5.1",
+                "fluent/fluentd",
+                "quay.io/domino/environment:base",
+            ],
+        )
@@ -8,7 +8,9 @@ from ruamel.yaml import YAML, SafeLoader
 from ruamel.yaml import load as yaml_load
 
 from domino_cdk import __version__
+from domino_cdk.agent import install_image_list
 from domino_cdk.config import config_loader
+from domino_cdk.config.capacity import format_capacity_plan, plan_capacity
 from domino_cdk.config.iam import generate_iam
 from domino_cdk.config.template import config_template
 from domino_cdk.util import DominoCdkUtil
@@ -87,6 +89,22 @@ def parse_args():
     load_parser.add_argument("--no-comments", help="Strip comments from template", action="store_true")
     load_parser.set_defaults(func=load_config)
 
+    image_list_parser = subparsers.add_parser(
+        "generate_image_list",
+        help="List images to pre-pull into nodegroup image snapshots",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    image_list_parser.add_argument("-f", "--file", help="Config file to read, otherwise reads stdin", default=None)
+    image_list_parser.set_defaults(func=generate_image_list)
+
+    capacity_parser = subparsers.add_parser(
+        "capacity_plan",
+        help="Report worst-case IP demand of nodegroups against subnet capacity per availability zone",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    capacity_parser.add_argument("-f", "--file", help="Config file to read, otherwise reads stdin", default=None)
+    capacity_parser.set_defaults(func=capacity_plan)
+
     asset_parser = subparsers.add_parser(
         "generate_asset_parameters",
         help="Generate CloudFormation parameters for CDK assets",
@@ -209,6 +227,26 @@ def load_config(args):
             YAML().dump(cfg.render(args.no_comments), out)
 
 
+def generate_image_list(args):
+    with open(args.file or 0) as f:
+        cfg = config_loader(yaml_load(f, Loader=SafeLoader))
+
+    if cfg.install:
+        for image in install_image_list(cfg.install):
+            print(image)
+
+
+def capacity_plan(args):
+    with open(args.file or 0) as f:
+        cfg = config_loader(yaml_load(f, Loader=SafeLoader))
+
+    usages, notes = plan_capacity(cfg.vpc, cfg.eks)
+    print(format_capacity_plan(usages, notes))
+
+    if any(u.headroom < 0 for u in usages):
+        exit(1)
+
+
 def generate_asset_parameters(args):
     print(
         json_dumps(